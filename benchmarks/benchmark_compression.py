@@ -0,0 +1,88 @@
+"""
+compressed notes file storage benchmark, reports the file size, load time
+and save time of plain text, gzip and xz notes files
+
+usage:
+python -m benchmarks.benchmark_compression [max size in MB, default 50]
+"""
+import os
+import sys
+import tempfile
+
+from benchmarks.common import (
+    KB,
+    MB,
+    FileReader,
+    format_size,
+    generate_notes_file_content,
+    time_it,
+)
+from notes_app.compression import (
+    FILE_COMPRESSION_GZIP,
+    FILE_COMPRESSION_XZ,
+    write_text_data,
+)
+from notes_app.defaults import Defaults
+from notes_app.file import File
+
+SIZES = [100 * KB, 1 * MB, 10 * MB, 50 * MB]
+FILE_FORMATS = [
+    ("plain", ".txt", None),
+    ("gzip", ".gz", FILE_COMPRESSION_GZIP),
+    ("xz", ".xz", FILE_COMPRESSION_XZ),
+]
+
+
+def run(max_size: int) -> None:
+    defaults = Defaults()
+
+    print(
+        f"{'size':>8} {'format':>7} {'file size':>10} {'ratio':>6} "
+        f"{'load (s)':>9} {'save (s)':>9}"
+    )
+    for size in [size for size in SIZES if size <= max_size]:
+        data = generate_notes_file_content(size=size)
+
+        for file_format, suffix, compression in FILE_FORMATS:
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+                write_text_data(
+                    binary_file=f, data=data, encoding="utf-8", compression=compression
+                )
+                file_path = f.name
+
+            try:
+                reader = FileReader(file_path=file_path)
+                repeat = 3 if size < 10 * MB else 1
+
+                load_time, file = time_it(
+                    lambda: File(
+                        file_path=file_path, controller=reader, defaults=defaults
+                    ),
+                    repeat=repeat,
+                )
+
+                def save():
+                    # changing the first section makes the whole file rewritten
+                    file.set_section_content(
+                        section_separator=file.default_section_separator,
+                        section_content=f"changed {os.urandom(4).hex()}",
+                    )
+                    file.save()
+
+                save_time, _ = time_it(save, repeat=repeat)
+                file_size = os.path.getsize(file_path)
+
+                print(
+                    f"{format_size(size):>8} "
+                    f"{file_format:>7} "
+                    f"{format_size(file_size):>10} "
+                    f"{file_size / len(data):>6.2f} "
+                    f"{load_time:>9.4f} "
+                    f"{save_time:>9.4f}"
+                )
+            finally:
+                os.remove(file_path)
+
+
+if __name__ == "__main__":
+    run(max_size=int(sys.argv[1]) * MB if len(sys.argv) > 1 else SIZES[-1])
@@ -0,0 +1,91 @@
+"""
+notes file parsing benchmark
+
+usage:
+python -m benchmarks.benchmark_file [max size in MB, default 500]
+"""
+import os
+import sys
+import tempfile
+
+from benchmarks.common import (
+    KB,
+    MB,
+    FileReader,
+    format_size,
+    generate_notes_file_content,
+    time_it,
+)
+from notes_app.defaults import Defaults
+from notes_app.file import File
+from notes_app.section_index import get_section_index_file_path
+
+SIZES = [1 * KB, 10 * KB, 100 * KB, 1 * MB, 10 * MB, 50 * MB, 100 * MB, 500 * MB]
+
+
+def run(max_size: int) -> None:
+    defaults = Defaults()
+
+    memory_mapped_defaults = Defaults()
+    memory_mapped_defaults.DEFAULT_FILE_MEMORY_MAPPED = True
+
+    section_index_defaults = Defaults()
+    section_index_defaults.DEFAULT_FILE_MEMORY_MAPPED = True
+    section_index_defaults.DEFAULT_FILE_SECTION_INDEX_ENABLED = True
+
+    print(
+        f"{'size':>8} {'sections':>9} {'open (s)':>10} {'reload (s)':>11} {'s/MB':>8} "
+        f"{'mmap open (s)':>14} {'mmap+index open (s)':>20}"
+    )
+    for size in [size for size in SIZES if size <= max_size]:
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
+            f.write(generate_notes_file_content(size=size))
+            file_path = f.name
+
+        try:
+            reader = FileReader(file_path=file_path)
+            repeat = 3 if size < 100 * MB else 1
+
+            open_time, file = time_it(
+                lambda: File(file_path=file_path, controller=reader, defaults=defaults),
+                repeat=repeat,
+            )
+            reload_time, _ = time_it(file.reload, repeat=repeat)
+
+            memory_mapped_open_time, _ = time_it(
+                lambda: File(
+                    file_path=file_path,
+                    controller=reader,
+                    defaults=memory_mapped_defaults,
+                ),
+                repeat=repeat,
+            )
+
+            # the first open writes the section index
+            File(file_path=file_path, controller=reader, defaults=section_index_defaults)
+            section_index_open_time, _ = time_it(
+                lambda: File(
+                    file_path=file_path,
+                    controller=reader,
+                    defaults=section_index_defaults,
+                ),
+                repeat=repeat,
+            )
+
+            print(
+                f"{format_size(size):>8} "
+                f"{len(file.section_separators_sorted):>9} "
+                f"{open_time:>10.4f} "
+                f"{reload_time:>11.4f} "
+                f"{open_time / (size / MB):>8.4f} "
+                f"{memory_mapped_open_time:>14.4f} "
+                f"{section_index_open_time:>20.4f}"
+            )
+        finally:
+            os.remove(file_path)
+            if os.path.exists(get_section_index_file_path(file_path=file_path)):
+                os.remove(get_section_index_file_path(file_path=file_path))
+
+
+if __name__ == "__main__":
+    run(max_size=int(sys.argv[1]) * MB if len(sys.argv) > 1 else SIZES[-1])
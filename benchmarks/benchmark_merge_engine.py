@@ -0,0 +1,174 @@
+"""
+merge_strings diff engine benchmark, checks the merge output of the difflib, Myers
+and patience engines against the tests/test_unit_diff.py merge_strings cases
+and compares their latency on edited sections,
+it also compares merging a section with a single edit window by window
+with merging the whole section and the memoized merges of a section typed into
+while an external update is pending with the merges without the memo
+
+usage:
+python -m benchmarks.benchmark_merge_engine [max section size in KB, default 200]
+"""
+import random
+import sys
+
+from benchmarks.common import (
+    KB,
+    format_size,
+    get_sample_text,
+    merge_strings_without_memo,
+    time_it,
+)
+from notes_app.diff import (
+    DIFF_ENGINE_DIFFLIB,
+    DIFF_ENGINE_MYERS,
+    DIFF_ENGINE_PATIENCE,
+    _merge_window,
+    merge_memo,
+    merge_strings,
+)
+
+ENGINES = [DIFF_ENGINE_DIFFLIB, DIFF_ENGINE_MYERS, DIFF_ENGINE_PATIENCE]
+SIZES = [1 * KB, 10 * KB, 50 * KB, 100 * KB, 200 * KB]
+EDITS_COUNT = 20
+TYPED_TEXT = " typed words"
+
+# the merge_strings cases of tests/test_unit_diff.py
+MERGE_CASES = [
+    ("is", "this is some section.yeah", "this is some section.yeah"),
+    ("is", "this some section.yeah", "is this some section.yeah"),
+    ("", "this is some section.yeah", "this is some section.yeah"),
+    (
+        "some section text",
+        "this is some section.yeah",
+        "this is some section text.yeah",
+    ),
+    (
+        "some section text",
+        "another text this is some section.yeah",
+        "another text this is some section text.yeah",
+    ),
+    (
+        "some \n section text",
+        "this is some section.yeah",
+        "this is some \n section text.yeah",
+    ),
+]
+
+
+def generate_edited_section(size: int) -> tuple:
+    """
+    returns a section of approximately `size` characters
+    and its copy with EDITS_COUNT words replaced, inserted or deleted
+    """
+    random.seed(size)
+    sample_text = get_sample_text()
+    before = (sample_text * (size // len(sample_text) + 1))[:size]
+
+    after = before
+    for _ in range(EDITS_COUNT):
+        position = random.randrange(len(after))
+        deleted_length = random.randint(0, 30)
+        after = (
+            after[:position]
+            + random.choice(["", "new words ", "changed\n"])
+            + after[position + deleted_length :]
+        )
+    return before, after
+
+
+def run(max_size: int) -> None:
+    print("merge_strings test cases")
+    print(f"{'engine':>9} {'matching':>9}")
+    for engine in ENGINES:
+        matching = sum(
+            merge_strings(before=before, after=after, engine=engine) == result
+            for before, after, result in MERGE_CASES
+        )
+        print(f"{engine:>9} {f'{matching}/{len(MERGE_CASES)}':>9}")
+
+    print()
+    print("edited sections, a smaller merged size means fewer duplicated words")
+    print(
+        f"{'size':>8} {'engine':>9} {'merge (s)':>10} {'merged size':>12} "
+        f"{'same as difflib':>16}"
+    )
+    for size in [size for size in SIZES if size <= max_size]:
+        before, after = generate_edited_section(size=size)
+        repeat = 3 if size < 100 * KB else 1
+
+        difflib_result = None
+        for engine in ENGINES:
+            merge_time, result = time_it(
+                lambda: merge_strings_without_memo(
+                    before=before, after=after, engine=engine
+                ),
+                repeat=repeat,
+            )
+            if engine == DIFF_ENGINE_DIFFLIB:
+                difflib_result = result
+
+            print(
+                f"{format_size(size):>8} "
+                f"{engine:>9} "
+                f"{merge_time:>10.4f} "
+                f"{len(result):>12} "
+                f"{'yes' if result == difflib_result else 'no':>16}"
+            )
+
+    print()
+    print("single edit in the middle of a section, patience engine")
+    print(f"{'size':>8} {'whole section (s)':>18} {'windows (s)':>12}")
+    for size in [size for size in SIZES if size <= max_size]:
+        before, _ = generate_edited_section(size=size)
+        after = f"{before[: size // 2]} new words {before[size // 2 :]}"
+        repeat = 3 if size < 100 * KB else 1
+
+        whole_section_time, _ = time_it(
+            lambda: _merge_window(
+                before=before, after=after, engine=DIFF_ENGINE_PATIENCE
+            ),
+            repeat=repeat,
+        )
+        windows_time, _ = time_it(
+            lambda: merge_strings_without_memo(
+                before=before, after=after, engine=DIFF_ENGINE_PATIENCE
+            ),
+            repeat=repeat,
+        )
+        print(
+            f"{format_size(size):>8} {whole_section_time:>18.4f} {windows_time:>12.4f}"
+        )
+
+    print()
+    print(
+        "typing at the end of a section changed in the middle by an external update, "
+        "a merge per typed character, patience engine"
+    )
+    print(f"{'size':>8} {'without memo (s)':>17} {'memo (s)':>9}")
+    for size in [size for size in SIZES if size <= max_size]:
+        section, _ = generate_edited_section(size=size)
+        # numbered sentence lines occur once in the section
+        # so that the section splits into merge windows
+        after = "\n".join(
+            f"{number} {line}" for number, line in enumerate(section.split(". "))
+        )
+        before = f"{after[: size // 2]} external words {after[size // 2 :]}"
+        typed_afters = [
+            after + TYPED_TEXT[:length] for length in range(len(TYPED_TEXT) + 1)
+        ]
+
+        def merge_typed(merge):
+            for typed_after in typed_afters:
+                merge(before=before, after=typed_after, engine=DIFF_ENGINE_PATIENCE)
+
+        without_memo_time, _ = time_it(
+            lambda: merge_typed(merge=merge_strings_without_memo), repeat=1
+        )
+        merge_memo.clear()
+        memo_time, _ = time_it(lambda: merge_typed(merge=merge_strings), repeat=1)
+        print(f"{format_size(size):>8} {without_memo_time:>17.4f} {memo_time:>9.4f}")
+
+
+if __name__ == "__main__":
+    run(max_size=int(sys.argv[1]) * KB if len(sys.argv) > 1 else SIZES[-1])
@@ -0,0 +1,207 @@
+"""
+merge_strings benchmark and quality corpus, builds concurrent edits of notes sections
+made of the sample text paragraphs, an external (before) and a local (after) version
+of the same section, and reports the merge time, the tokens merged per second
+and the peak memory of each diff engine,
+it checks the merge invariants on each merge so that a faster engine
+is only accepted when it keeps both versions of the text,
+the stable column tells whether merging the result again leaves it unchanged
+
+usage:
+python -m benchmarks.benchmark_merge_quality [max section size in KB, default 10240]
+"""
+import random
+import sys
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from benchmarks.common import (
+    KB,
+    MB,
+    format_size,
+    get_sample_text,
+    merge_strings_without_memo,
+    time_it,
+)
+from notes_app.diff import (
+    DIFF_ENGINE_DIFFLIB,
+    DIFF_ENGINE_MYERS,
+    DIFF_ENGINE_PATIENCE,
+    _split,
+)
+
+ENGINES = [DIFF_ENGINE_DIFFLIB, DIFF_ENGINE_MYERS, DIFF_ENGINE_PATIENCE]
+SIZES = [1 * KB, 10 * KB, 100 * KB, 1 * MB, 10 * MB]
+# difflib is roughly quadratic on long token sequences
+ENGINE_MAX_SIZES = {
+    DIFF_ENGINE_DIFFLIB: 100 * KB,
+    DIFF_ENGINE_MYERS: 10 * MB,
+    DIFF_ENGINE_PATIENCE: 10 * MB,
+}
+EDITS_COUNT = 10
+PARAGRAPH_SENTENCES_COUNT = 4
+
+
+def get_sample_sentences() -> List[str]:
+    sample_text = get_sample_text().split("> ", 1)[-1]
+    return [f"{sentence.strip()}." for sentence in sample_text.split(".") if sentence]
+
+
+def generate_paragraphs(size: int, sentences: List[str]) -> List[str]:
+    """
+    returns numbered paragraphs of sample sentences,
+    approximately `size` characters in total
+    """
+    paragraphs = []
+    length = 0
+    while length < size:
+        paragraph = " ".join(
+            random.choice(sentences) for _ in range(PARAGRAPH_SENTENCES_COUNT)
+        )
+        paragraph = f"{len(paragraphs) + 1}. {paragraph}\n"
+        paragraphs.append(paragraph)
+        length += len(paragraph)
+    return paragraphs
+
+
+def insert_sentences(paragraphs: List[str], sentences: List[str]) -> List[str]:
+    paragraphs = list(paragraphs)
+    for _ in range(EDITS_COUNT):
+        idx = random.randrange(len(paragraphs))
+        paragraphs[idx] = f"{paragraphs[idx][:-1]} {random.choice(sentences)}\n"
+    return paragraphs
+
+
+def delete_sentences(paragraphs: List[str], sentences: List[str]) -> List[str]:
+    paragraphs = list(paragraphs)
+    for _ in range(EDITS_COUNT):
+        idx = random.randrange(len(paragraphs))
+        paragraph_sentences = paragraphs[idx].split(". ")
+        if len(paragraph_sentences) > 1:
+            del paragraph_sentences[random.randrange(len(paragraph_sentences) - 1)]
+        paragraphs[idx] = ". ".join(paragraph_sentences)
+    return paragraphs
+
+
+def delete_paragraphs(paragraphs: List[str], sentences: List[str]) -> List[str]:
+    paragraphs = list(paragraphs)
+    for _ in range(min(EDITS_COUNT, len(paragraphs) // 2)):
+        del paragraphs[random.randrange(len(paragraphs))]
+    return paragraphs
+
+
+def move_paragraph(paragraphs: List[str], sentences: List[str]) -> List[str]:
+    paragraphs = list(paragraphs)
+    paragraph = paragraphs.pop(random.randrange(len(paragraphs)))
+    paragraphs.insert(random.randrange(len(paragraphs) + 1), paragraph)
+    return paragraphs
+
+
+def convert_line_endings(paragraphs: List[str], sentences: List[str]) -> List[str]:
+    return [paragraph.replace("\n", "\r\n") for paragraph in paragraphs]
+
+
+# scenario name -> the edits of the external and of the local version
+SCENARIOS: List[Tuple[str, Callable, Callable]] = [
+    ("insertions", insert_sentences, insert_sentences),
+    ("deletions", delete_sentences, delete_paragraphs),
+    ("moved paragraph", insert_sentences, move_paragraph),
+    ("CRLF", insert_sentences, convert_line_endings),
+]
+
+
+def generate_scenario(
+    size: int, edit_before: Callable, edit_after: Callable
+) -> Tuple[str, str]:
+    random.seed(size)
+    sentences = get_sample_sentences()
+    paragraphs = generate_paragraphs(size=size, sentences=sentences)
+    return (
+        "".join(edit_before(paragraphs=paragraphs, sentences=sentences)),
+        "".join(edit_after(paragraphs=paragraphs, sentences=sentences)),
+    )
+
+
+def is_subsequence(tokens: List[str], other_tokens: List[str]) -> bool:
+    other_tokens_iterator = iter(other_tokens)
+    return all(token in other_tokens_iterator for token in tokens)
+
+
+def get_failed_invariants(before: str, after: str, result: str) -> List[str]:
+    """
+    the merge keeps all the tokens of both versions in their order
+    """
+    result_tokens = _split(result)
+    failed_invariants = []
+    if not is_subsequence(tokens=_split(after), other_tokens=result_tokens):
+        failed_invariants.append("after not kept")
+    if not is_subsequence(tokens=_split(before), other_tokens=result_tokens):
+        failed_invariants.append("before not kept")
+    return failed_invariants
+
+
+def get_peak_memory(function: Callable) -> int:
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run(max_size: int) -> None:
+    print(
+        f"{'scenario':>15} {'size':>8} {'engine':>9} {'merge (s)':>10} "
+        f"{'tokens/s':>10} {'peak memory':>12} {'stable':>7} {'invariants':>16}"
+    )
+    failed_merges_count = 0
+
+    for scenario, edit_before, edit_after in SCENARIOS:
+        for size in [size for size in SIZES if size <= max_size]:
+            before, after = generate_scenario(
+                size=size, edit_before=edit_before, edit_after=edit_after
+            )
+            tokens_count = len(_split(before)) + len(_split(after))
+            repeat = 3 if size < 1 * MB else 1
+
+            for engine in ENGINES:
+                if size > ENGINE_MAX_SIZES[engine]:
+                    continue
+
+                def merge():
+                    return merge_strings_without_memo(
+                        before=before, after=after, engine=engine
+                    )
+
+                merge_time, result = time_it(merge, repeat=repeat)
+                peak_memory = get_peak_memory(function=merge)
+                is_stable = (
+                    merge_strings_without_memo(
+                        before=before, after=result, engine=engine
+                    )
+                    == result
+                )
+                failed_invariants = get_failed_invariants(
+                    before=before, after=after, result=result
+                )
+                failed_merges_count += bool(failed_invariants)
+
+                print(
+                    f"{scenario:>15} "
+                    f"{format_size(size):>8} "
+                    f"{engine:>9} "
+                    f"{merge_time:>10.4f} "
+                    f"{tokens_count / merge_time:>10.0f} "
+                    f"{format_size(peak_memory):>12} "
+                    f"{'yes' if is_stable else 'no':>7} "
+                    f"{', '.join(failed_invariants) or 'ok':>16}"
+                )
+
+    if failed_merges_count:
+        print(f"{failed_merges_count} merges failed the invariants")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run(max_size=int(sys.argv[1]) * KB if len(sys.argv) > 1 else SIZES[-1])
@@ -0,0 +1,182 @@
+"""
+all sections search benchmark, compares the search of the previous implementation,
+an uncompiled regex of the lowercased pattern run on the lowercased sections,
+with the literal and the regex search modes on notes files of 4 KB sections,
+the regular expressions are only searched for in the regex mode,
+the worker column is the regex mode search of the search worker,
+in its process pool for the files of at least DEFAULT_SEARCH_PARALLEL_MIN_SIZE
+
+usage:
+python -m benchmarks.benchmark_search [max size in MB, default 50]
+"""
+import os
+import re
+import sys
+import tempfile
+import threading
+
+from benchmarks.common import (
+    MB,
+    FileReader,
+    format_size,
+    generate_notes_file_content,
+    time_it,
+)
+from notes_app.defaults import Defaults
+from notes_app.file import File
+from notes_app.search import Search
+from notes_app.search_index import is_literal_pattern
+from notes_app.search_worker import SearchWorker
+
+SIZES = [1 * MB, 10 * MB, 50 * MB]
+# a frequent word, a word missing in the sample text, a phrase and regular expressions
+PATTERNS = ["dolor", "missing", "Lorem ipsum", "dolor|amet", "s[a-z]t "]
+
+
+def previous_search_function(pattern, text, case_sensitive_search):
+    if not case_sensitive_search:
+        pattern = pattern.lower()
+        text = text.lower()
+    return [m.start() for m in re.finditer(pattern, text)]
+
+
+def previous_search_for_occurrences(pattern, file, case_sensitive_search):
+    found_occurrences = dict()
+    for section_separator in file.section_separators_sorted:
+        search_result = previous_search_function(
+            pattern=pattern,
+            text=file.get_section_content(section_separator=section_separator),
+            case_sensitive_search=case_sensitive_search,
+        )
+        if search_result:
+            found_occurrences[section_separator] = search_result
+    return found_occurrences
+
+
+def get_search(defaults, case_sensitive_search, search_regex):
+    search = Search(defaults=defaults)
+    search.search_all_sections = True
+    search.search_case_sensitive = case_sensitive_search
+    search.search_regex = search_regex
+    return search
+
+
+def worker_search_for_occurrences(search_worker, search, pattern, file):
+    results = []
+    is_done = threading.Event()
+
+    def on_result(found_occurrences):
+        results.append(found_occurrences)
+        is_done.set()
+
+    search_worker.submit(
+        search=search,
+        pattern=pattern,
+        file=file,
+        current_section_identifier=file.default_section_separator,
+        on_result=on_result,
+    )
+    is_done.wait()
+    return results[0]
+
+
+def run(max_size: int) -> None:
+    defaults = Defaults()
+    # the results are delivered right away in the worker thread
+    # instead of the UI thread
+    search_worker = SearchWorker(
+        schedule=lambda callback, timeout: callback(0),
+        parallel_min_size=defaults.DEFAULT_SEARCH_PARALLEL_MIN_SIZE,
+    )
+
+    print(
+        f"{'size':>8} {'pattern':>12} {'case':>9} {'previous (s)':>13} "
+        f"{'literal (s)':>12} {'regex (s)':>10} {'worker (s)':>11} "
+        f"{'same matches':>13}"
+    )
+    for size in [size for size in SIZES if size <= max_size]:
+        with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as f:
+            f.write(generate_notes_file_content(size=size).encode("utf-8"))
+            file_path = f.name
+
+        try:
+            file = File(
+                file_path=file_path,
+                controller=FileReader(file_path=file_path),
+                defaults=defaults,
+            )
+            current_section = file.default_section_separator
+            repeat = 3 if size < 10 * MB else 1
+
+            for pattern in PATTERNS:
+                for case_sensitive_search in (False, True):
+                    previous_time, previous_result = time_it(
+                        lambda: previous_search_for_occurrences(
+                            pattern=pattern,
+                            file=file,
+                            case_sensitive_search=case_sensitive_search,
+                        ),
+                        repeat=repeat,
+                    )
+
+                    results = []
+                    search_times = []
+                    search_modes = (
+                        (False, True)
+                        if is_literal_pattern(pattern=pattern)
+                        else (True,)
+                    )
+                    for search_regex in search_modes:
+                        # every run gets a new Search so that the repeated runs
+                        # are not answered by its recent queries
+                        search_time, result = time_it(
+                            lambda: get_search(
+                                defaults=defaults,
+                                case_sensitive_search=case_sensitive_search,
+                                search_regex=search_regex,
+                            ).search_for_occurrences(
+                                pattern=pattern,
+                                file=file,
+                                current_section_identifier=current_section,
+                            ),
+                            repeat=repeat,
+                        )
+                        results.append(result)
+                        search_times.append(f"{search_time:.4f}")
+                    if len(search_times) == 1:
+                        search_times.insert(0, "-")
+
+                    worker_time, result = time_it(
+                        lambda: worker_search_for_occurrences(
+                            search_worker=search_worker,
+                            search=get_search(
+                                defaults=defaults,
+                                case_sensitive_search=case_sensitive_search,
+                                search_regex=True,
+                            ),
+                            pattern=pattern,
+                            file=file,
+                        ),
+                        repeat=repeat,
+                    )
+                    results.append(result)
+                    is_same = all(result == previous_result for result in results)
+
+                    print(
+                        f"{format_size(size):>8} "
+                        f"{pattern:>12} "
+                        f"{'sensitive' if case_sensitive_search else 'ignore':>9} "
+                        f"{previous_time:>13.4f} "
+                        f"{search_times[0]:>12} "
+                        f"{search_times[1]:>10} "
+                        f"{worker_time:>11.4f} "
+                        f"{'yes' if is_same else 'no':>13}"
+                    )
+        finally:
+            os.remove(file_path)
+
+    search_worker.shutdown()
+
+
+if __name__ == "__main__":
+    run(max_size=int(sys.argv[1]) * MB if len(sys.argv) > 1 else SIZES[-1])
@@ -0,0 +1,67 @@
+"""
+section separator grammar micro-benchmark,
+compares the compiled grammar with calling the re module with the Defaults patterns
+
+usage:
+python -m benchmarks.benchmark_section_separator [number of calls, default 100000]
+"""
+import re
+import sys
+import timeit
+
+from benchmarks.common import MB, generate_notes_file_content
+from notes_app.defaults import Defaults
+from notes_app.section_separator import get_section_separator_grammar
+
+PARSE_SIZE = 1 * MB
+
+
+def run(number: int) -> None:
+    defaults = Defaults()
+    section_separator_grammar = get_section_separator_grammar(defaults=defaults)
+
+    raw_data = generate_notes_file_content(size=PARSE_SIZE)
+    section_separator = section_separator_grammar.format(section_name="some section")
+
+    cases = [
+        (
+            "extract name",
+            lambda: re.search(
+                defaults.DEFAULT_SECTION_FILE_SEPARATOR_GROUP_SUBSTR_REGEX,
+                section_separator,
+            ).group(1),
+            lambda: section_separator_grammar.extract_name(
+                section_separator=section_separator
+            ),
+            number,
+        ),
+        (
+            "format",
+            lambda: defaults.DEFAULT_SECTION_FILE_SEPARATOR.format(name="some section"),
+            lambda: section_separator_grammar.format(section_name="some section"),
+            number,
+        ),
+        (
+            "search",
+            lambda: re.search(defaults.DEFAULT_SECTION_FILE_SEPARATOR_REGEX, raw_data),
+            lambda: section_separator_grammar.search(raw_data=raw_data),
+            number,
+        ),
+        (
+            "parse 1 MB",
+            lambda: re.findall(defaults.DEFAULT_SECTION_FILE_SEPARATOR_REGEX, raw_data)
+            and re.split(defaults.DEFAULT_SECTION_FILE_SEPARATOR_REGEX, raw_data),
+            lambda: section_separator_grammar.parse(raw_data=raw_data),
+            max(number // 10000, 1),
+        ),
+    ]
+
+    print(f"{'operation':>14} {'calls':>8} {'re module (s)':>14} {'grammar (s)':>12}")
+    for name, re_module_function, grammar_function, calls in cases:
+        re_module_time = min(timeit.repeat(re_module_function, number=calls, repeat=3))
+        grammar_time = min(timeit.repeat(grammar_function, number=calls, repeat=3))
+        print(f"{name:>14} {calls:>8} {re_module_time:>14.4f} {grammar_time:>12.4f}")
+
+
+if __name__ == "__main__":
+    run(number=int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
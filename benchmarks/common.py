@@ -0,0 +1,103 @@
+import time
+from os import path
+from typing import Callable, Tuple
+
+from notes_app.compression import (
+    get_file_compression,
+    open_text_reader,
+    write_text_data,
+)
+from notes_app.diff import merge_memo, merge_strings
+
+SAMPLE_FILE_PATH = path.join(
+    path.dirname(path.dirname(__file__)), "notes_app", "assets", "sample.txt"
+)
+
+KB = 1024
+MB = 1024 * KB
+
+
+class FileReader:
+    """
+    minimal stand-in for the NotesController read and save interface used by File,
+    so the benchmarks run without building the Kivy view
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def read_file_data(self, file_path=None) -> str:
+        file_path = file_path or self.file_path
+        with open_text_reader(
+            file_path=file_path,
+            encoding="utf-8",
+            compression=get_file_compression(file_path=file_path),
+        ) as f:
+            return f.read()
+
+    def read_file_journal_records(self, file_path=None, offset=0):
+        return [], offset
+
+    def save_file_data(self, data, offset=0) -> None:
+        if offset:
+            with open(self.file_path, "r+b") as f:
+                f.seek(offset)
+                f.write(data.encode("utf-8"))
+                f.truncate()
+            return
+
+        compression = get_file_compression(file_path=self.file_path)
+        with open(self.file_path, "wb") as f:
+            write_text_data(
+                binary_file=f, data=data, encoding="utf-8", compression=compression
+            )
+
+
+def get_sample_text() -> str:
+    with open(SAMPLE_FILE_PATH, "r") as f:
+        return f.read()
+
+
+def generate_notes_file_content(size: int, section_size: int = 4 * KB) -> str:
+    """
+    generate notes file content of approximately `size` characters
+    made of sections of approximately `section_size` characters
+    """
+    section_size = min(section_size, size)
+    sample_text = get_sample_text().replace("<section=", "<sectio=")
+    section_text = (sample_text * (section_size // len(sample_text) + 1))[
+        :section_size
+    ]
+    sections_count = max(size // section_size, 1)
+    return "".join(
+        f"<section=s {chr(97 + idx % 26)}{chr(97 + idx // 26 % 26)}{chr(97 + idx // 676 % 26)}> {section_text}"
+        for idx in range(sections_count)
+    )
+
+
+def time_it(function: Callable, repeat: int = 3) -> Tuple[float, object]:
+    """
+    returns the best wall time in seconds out of `repeat` runs and the last result
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def merge_strings_without_memo(before: str, after: str, engine: str) -> str:
+    """
+    merge_strings with the memoized merges cleared so that the merge is timed
+    """
+    merge_memo.clear()
+    return merge_strings(before=before, after=after, engine=engine)
+
+
+def format_size(size: int) -> str:
+    if size >= MB:
+        return f"{size / MB:.0f} MB"
+    return f"{size / KB:.0f} KB"
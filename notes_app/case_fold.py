@@ -0,0 +1,70 @@
+import bisect
+from typing import List
+
+CASE_FOLD_CHUNK_SIZE = 1024
+
+
+class CaseFoldedText:
+    """
+    CaseFoldedText is the case folded copy of a text searched case insensitively,
+    case folding turns some characters into several ones, for example ß into ss,
+    so the positions found in the copy are mapped back to the positions in the text
+    by the folded start, the position and the folded length of each such character
+    """
+
+    def __init__(self, text: str):
+        self.text = text.casefold()
+        # texts folded the same, ßxa and ssxa for example, keep their own hash
+        # as the positions found in them differ
+        self.text_hash = hash(text)
+        self._expansion_folded_starts: List[int] = []
+        self._expansion_positions: List[int] = []
+        self._expansion_folded_lengths: List[int] = []
+
+        if len(self.text) == len(text):
+            return
+
+        # only the chunks of the text which change length are folded char by char
+        folded_position = 0
+        for chunk_start in range(0, len(text), CASE_FOLD_CHUNK_SIZE):
+            chunk = text[chunk_start : chunk_start + CASE_FOLD_CHUNK_SIZE]
+            folded_chunk_length = len(chunk.casefold())
+            if folded_chunk_length == len(chunk):
+                folded_position += folded_chunk_length
+                continue
+
+            for position, char in enumerate(chunk, start=chunk_start):
+                folded_length = len(char.casefold())
+                if folded_length != 1:
+                    self._expansion_folded_starts.append(folded_position)
+                    self._expansion_positions.append(position)
+                    self._expansion_folded_lengths.append(folded_length)
+                folded_position += folded_length
+
+    @property
+    def has_expanded_chars(self) -> bool:
+        return bool(self._expansion_folded_starts)
+
+    def get_position(self, folded_position: int) -> int:
+        """
+        returns the position in the text of the character folded
+        into the character at the folded position
+        """
+        idx = bisect.bisect_right(self._expansion_folded_starts, folded_position) - 1
+        if idx < 0:
+            return folded_position
+
+        folded_end = (
+            self._expansion_folded_starts[idx] + self._expansion_folded_lengths[idx]
+        )
+        if folded_position < folded_end:
+            return self._expansion_positions[idx]
+        return self._expansion_positions[idx] + 1 + folded_position - folded_end
+
+    def get_positions(self, folded_positions: List[int]) -> List[int]:
+        if not self._expansion_folded_starts:
+            return folded_positions
+        return [
+            self.get_position(folded_position=folded_position)
+            for folded_position in folded_positions
+        ]
@@ -0,0 +1,88 @@
+import gzip
+import lzma
+import os
+from typing import BinaryIO, Optional, TextIO
+
+FILE_COMPRESSION_GZIP = "gzip"
+FILE_COMPRESSION_XZ = "xz"
+
+FILE_COMPRESSION_BY_EXTENSION = {
+    ".gz": FILE_COMPRESSION_GZIP,
+    ".xz": FILE_COMPRESSION_XZ,
+}
+FILE_COMPRESSION_BY_HEADER = {
+    b"\x1f\x8b": FILE_COMPRESSION_GZIP,
+    b"\xfd7zXZ\x00": FILE_COMPRESSION_XZ,
+}
+FILE_COMPRESSION_HEADER_SIZE = max(len(header) for header in FILE_COMPRESSION_BY_HEADER)
+
+GZIP_COMPRESS_LEVEL = 6
+XZ_PRESET = 6
+# the text data is encoded and compressed in chunks of TEXT_DATA_CHUNK_SIZE characters
+TEXT_DATA_CHUNK_SIZE = 1024 * 1024
+
+
+def get_file_compression(file_path: str) -> Optional[str]:
+    """
+    the compression of an existing file is recognized by its header,
+    the compression of a new or empty file by its extension
+    """
+    try:
+        with open(file_path, "rb") as f:
+            header = f.read(FILE_COMPRESSION_HEADER_SIZE)
+    except OSError:
+        header = b""
+
+    if header:
+        for compression_header, compression in FILE_COMPRESSION_BY_HEADER.items():
+            if header.startswith(compression_header):
+                return compression
+        return None
+
+    return FILE_COMPRESSION_BY_EXTENSION.get(
+        os.path.splitext(file_path)[1].lower()
+    )
+
+
+def open_text_reader(
+    file_path: str, encoding: str, compression: Optional[str]
+) -> TextIO:
+    """
+    open the file for reading text, compressed files are decompressed while read
+    """
+    if compression == FILE_COMPRESSION_GZIP:
+        return gzip.open(file_path, "rt", encoding=encoding)
+    if compression == FILE_COMPRESSION_XZ:
+        return lzma.open(file_path, "rt", encoding=encoding)
+    return open(file_path, "r", encoding=encoding)
+
+
+def _get_compressed_writer(binary_file: BinaryIO, compression: str) -> BinaryIO:
+    if compression == FILE_COMPRESSION_GZIP:
+        return gzip.GzipFile(
+            fileobj=binary_file, mode="wb", compresslevel=GZIP_COMPRESS_LEVEL
+        )
+    if compression == FILE_COMPRESSION_XZ:
+        return lzma.LZMAFile(binary_file, mode="wb", preset=XZ_PRESET)
+    raise ValueError(f"Unknown file compression {compression}")
+
+
+def write_text_data(
+    binary_file: BinaryIO, data: str, encoding: str, compression: Optional[str]
+) -> None:
+    """
+    write the text data encoded and compressed to the binary file chunk by chunk,
+    line endings are written as they are and the binary file is left open
+    """
+    writer = (
+        _get_compressed_writer(binary_file=binary_file, compression=compression)
+        if compression
+        else binary_file
+    )
+
+    for start in range(0, len(data), TEXT_DATA_CHUNK_SIZE):
+        writer.write(data[start : start + TEXT_DATA_CHUNK_SIZE].encode(encoding))
+
+    # closing the compressed writer writes the end of the stream, not closing binary_file
+    if writer is not binary_file:
+        writer.close()
@@ -1,3 +1,22 @@
+import os
+import shutil
+import tempfile
+import threading
+from typing import Tuple
+
+from notes_app.compression import (
+    get_file_compression,
+    open_text_reader,
+    write_text_data,
+)
+from notes_app.journal import (
+    append_journal_records,
+    apply_journal_records,
+    get_journal_file_path,
+    get_journal_size,
+    read_journal_records,
+)
+from notes_app.section_separator import get_section_separator_grammar
 from notes_app.view.notes_view import NotesView
 
 
@@ -19,6 +38,9 @@ class NotesController:
         self.model = model
         self._generate_default_file_if_not_exists()
 
+        self._file_journal_lock = threading.Lock()
+        self._file_journal_compaction_thread = None
+
         self.view = NotesView(
             settings=settings, controller=self, model=self.model, defaults=self.defaults
         )
@@ -38,22 +60,201 @@ class NotesController:
         self.model.dump()
 
     def read_file_data(self, file_path=None) -> str:
-        f = open(file_path or self.model.file_path, "r")
+        """
+        read_file_data reads the file data with the records from the file journal replayed
+        """
+        file_path = file_path or self.model.file_path
+
+        f = open_text_reader(
+            file_path=file_path,
+            encoding=self.defaults.DEFAULT_NOTES_FILE_ENCODING,
+            compression=get_file_compression(file_path=file_path),
+        )
         s = f.read()
         f.close()
-        return s
 
-    def save_file_data(self, data) -> None:
+        records, _ = self.read_file_journal_records(file_path=file_path)
+        if not records:
+            return s
+
+        try:
+            data_by_sections = {
+                section_separator: s[start:end]
+                for section_separator, start, end in get_section_separator_grammar(
+                    defaults=self.defaults
+                ).parse(raw_data=s)
+            }
+        except ValueError:
+            data_by_sections = dict()
+
+        apply_journal_records(data_by_sections=data_by_sections, records=records)
+
+        return "".join(
+            f"{section_separator}{section_content}"
+            for section_separator, section_content in data_by_sections.items()
+        )
+
+    def read_file_journal_records(self, file_path=None, offset=0):
         """
-        save_file_data saves provided data to the file with location set in model.file_path
+        read_file_journal_records reads the file journal records appended after the offset
         """
-        f = open(self.model.file_path, "w")
-        f.write(data)
-        f.close()
+        with self._file_journal_lock:
+            return read_journal_records(
+                file_path=file_path or self.model.file_path, offset=offset
+            )
+
+    def append_file_journal_records(self, records) -> Tuple[int, int]:
+        """
+        append_file_journal_records appends the records to the journal of the file
+        with location set in model.file_path, the journal gets compacted into the file
+        in the background when it grows over DEFAULT_FILE_JOURNAL_COMPACTION_SIZE
+        """
+        file_path = self.model.file_path
+
+        with self._file_journal_lock:
+            journal_start, journal_size = append_journal_records(
+                file_path=file_path, records=records
+            )
 
         self.model.update()
         self.model.dump()
 
+        if journal_size > self.defaults.DEFAULT_FILE_JOURNAL_COMPACTION_SIZE and not (
+            self._file_journal_compaction_thread
+            and self._file_journal_compaction_thread.is_alive()
+        ):
+            self._file_journal_compaction_thread = threading.Thread(
+                target=self.compact_file_journal, args=(file_path,), daemon=True
+            )
+            self._file_journal_compaction_thread.start()
+
+        return journal_start, journal_size
+
+    def compact_file_journal(self, file_path=None) -> None:
+        """
+        compact_file_journal writes the file with the journal records replayed
+        and removes the replayed records from the journal
+        """
+        file_path = file_path or self.model.file_path
+
+        with self._file_journal_lock:
+            journal_size = get_journal_size(file_path=file_path)
+        if not journal_size:
+            return
+
+        data = self.read_file_data(file_path=file_path)
+
+        with self._file_journal_lock:
+            try:
+                self._write_file_data(data=data, file_path=file_path)
+            # the file can be locked by a reader on some platforms, the journal stays valid
+            except OSError:
+                return
+
+            # records appended during the compaction are kept in the journal,
+            # replaying them again over the compacted file is harmless
+            journal_file_path = get_journal_file_path(file_path=file_path)
+            with open(journal_file_path, "rb") as f:
+                f.seek(journal_size)
+                journal_tail = f.read()
+
+            if journal_tail:
+                temp_journal_file_path = f"{journal_file_path}.tmp"
+                with open(temp_journal_file_path, "wb") as f:
+                    f.write(journal_tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_journal_file_path, journal_file_path)
+            else:
+                os.remove(journal_file_path)
+
+        if file_path == self.model.file_path:
+            # the compaction is not an external update
+            self.model.update(notify=False)
+
+    def save_file_data(self, data, offset=0) -> None:
+        """
+        save_file_data saves provided data to the file with location set in model.file_path,
+        the file content starting from the byte offset gets replaced by the data,
+        saving the whole data supersedes the file journal
+        """
+        if offset:
+            self._write_file_data_from_offset(data=data, offset=offset)
+        else:
+            self._write_file_data(data=data)
+            # the whole data read from the file includes the replayed journal records
+            with self._file_journal_lock:
+                if get_journal_size(file_path=self.model.file_path):
+                    os.remove(get_journal_file_path(file_path=self.model.file_path))
+
+        self.model.update()
+        self.model.dump()
+
+    def _replace_file(self, file_path, write_data) -> None:
+        """
+        the data is written by write_data to a temporary file first
+        which then atomically replaces the file, so an interrupted save
+        leaves either the previous or the saved file behind
+        """
+        fd, temp_file_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(file_path)), suffix=".tmp"
+        )
+        try:
+            with open(fd, "wb") as f:
+                write_data(f)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(file_path):
+                shutil.copymode(file_path, temp_file_path)
+            os.replace(temp_file_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
+            raise
+
+    def _write_file_data(self, data, file_path=None) -> None:
+        """
+        a compressed file is written compressed
+        """
+        file_path = file_path or self.model.file_path
+        compression = get_file_compression(file_path=file_path)
+
+        self._replace_file(
+            file_path=file_path,
+            write_data=lambda f: write_text_data(
+                binary_file=f,
+                data=data,
+                encoding=self.defaults.DEFAULT_NOTES_FILE_ENCODING,
+                compression=compression,
+            ),
+        )
+
+    def _write_file_data_from_offset(self, data, offset) -> None:
+        """
+        the bytes of the file up to the offset are copied as they are
+        and only the data replacing the rest of the file gets encoded,
+        the copy keeps the save atomic but makes it cost the whole file size
+        """
+        file_path = self.model.file_path
+
+        def write_data(f) -> None:
+            with open(file_path, "rb") as source_file:
+                remaining_length = offset
+                while remaining_length:
+                    chunk = source_file.read(
+                        min(
+                            remaining_length,
+                            self.defaults.DEFAULT_FILE_STREAM_CHUNK_SIZE,
+                        )
+                    )
+                    if not chunk:
+                        raise ValueError("File is shorter than the save offset")
+                    f.write(chunk)
+                    remaining_length -= len(chunk)
+            f.write(data.encode(self.defaults.DEFAULT_NOTES_FILE_ENCODING))
+
+        self._replace_file(file_path=file_path, write_data=write_data)
+
     def get_screen(self):
         """
         The method creates get the view.
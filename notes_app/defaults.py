@@ -5,10 +5,29 @@ class Defaults:
     DEFAULT_SECTION_FILE_SEPARATOR_REGEX = "<section=[a-z A-Z]+> "
     DEFAULT_SECTION_FILE_SEPARATOR_GROUP_SUBSTR_REGEX = "<section=(.+?)> "
     DEFAULT_NOTES_FILE_CONTENT = f"{DEFAULT_SECTION_FILE_SEPARATOR.format(name='first')} Your first section. Here you can write your notes."
+    DEFAULT_NOTES_FILE_ENCODING = "utf-8"
+    DEFAULT_FILE_MEMORY_MAPPED = False
+    DEFAULT_FILE_SECTION_CACHE_SIZE = 16
+    DEFAULT_FILE_SECTION_INDEX_ENABLED = False
+    DEFAULT_FILE_SEARCH_INDEX_ENABLED = False
+    DEFAULT_FILE_JOURNAL_ENABLED = False
+    DEFAULT_FILE_JOURNAL_COMPACTION_SIZE = 1024 * 1024
+    DEFAULT_FILE_JOURNAL_SNAPSHOT_PATCH_COUNT = 32
+    DEFAULT_FILE_STREAM_CHUNK_SIZE = 1024 * 1024
+    DEFAULT_DIFF_ENGINE = "patience"
+    DEFAULT_FILE_MERGE_PROCESSES = 1
+    DEFAULT_MERGE_TIME_BUDGET = 2.0
+    DEFAULT_MERGE_INLINE_WAIT = 0.05
+    DEFAULT_MERGE_MODE = "union"
     DEFAULT_AUTO_SAVE_TEXT_INPUT_CHANGE_COUNT = 5
     DEFAULT_VALUE_SEARCH_CASE_SENSITIVE = False
     DEFAULT_VALUE_SEARCH_ALL_SECTIONS = False
     DEFAULT_VALUE_SEARCH_FULL_WORDS = False
+    DEFAULT_VALUE_SEARCH_REGEX = False
+    DEFAULT_SEARCH_WORKER_MIN_SECTION_COUNT = 256
+    DEFAULT_SEARCH_PARALLEL_MIN_SIZE = 16 * 1024 * 1024
+    DEFAULT_SEARCH_AS_YOU_TYPE_DELAY = 0.3
+    DEFAULT_SEARCH_RECENT_QUERY_COUNT = 16
     DEFAULT_SETTINGS_STORE_FILE_NAME = "settings.json"
     DEFAULT_SETTINGS_VALUE_FONT_NAME = "RobotoMono-Regular"
     DEFAULT_SETTINGS_VALUE_FONT_SIZE = "14.0"
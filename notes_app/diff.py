@@ -1,20 +1,342 @@
+import bisect
 import difflib
-from typing import List
+import hashlib
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from functools import partial
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
 TEXT_FILE_LINE_BREAK_CHAR = "\n"
-# TEXT_FILE_LINE_BREAK_CHAR_TEMP_REPLACEMENT is used because difflib SequenceMatcher consumes line endings
-# so we replace line endings with this temporary replacement and after retrieving the matched results we replace
-# back text file line ending defined in TEXT_FILE_LINE_BREAK_CHAR
-TEXT_FILE_LINE_BREAK_CHAR_TEMP_REPLACEMENT = "Y3j28cXxSDaoSStrtLsj"
+# texts are compared in chunks of TEXT_DELTA_CHUNK_SIZE characters when looking for the changed part
+TEXT_DELTA_CHUNK_SIZE = 4096
 
+DIFF_ENGINE_DIFFLIB = "difflib"
+DIFF_ENGINE_MYERS = "myers"
+DIFF_ENGINE_PATIENCE = "patience"
 
-def _merge(left, right):
+
+def _bisect(left, left_lo, left_hi, right, right_lo, right_hi) -> Optional[Tuple]:
+    """
+    _bisect finds the middle of the shortest edit script of the token ranges
+    walking the Myers diagonals from both ends in linear space,
+    the ranges are expected to be non-empty and to differ in the first and last tokens,
+    returns the (left, right) split point or None if the ranges have no token in common
+    https://neil.fraser.name/writing/diff/myers.pdf
+    """
+    left_length = left_hi - left_lo
+    right_length = right_hi - right_lo
+    max_d = (left_length + right_length + 1) // 2
+    v_offset = max_d
+    v_length = 2 * max_d + 2
+    forward = [-1] * v_length
+    forward[v_offset + 1] = 0
+    backward = forward[:]
+    delta = left_length - right_length
+    # with an odd delta the paths meet while walking forward, otherwise backward
+    front = delta % 2 != 0
+    k1_start = k1_end = k2_start = k2_end = 0
+
+    for d in range(max_d):
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            k1_offset = v_offset + k1
+            if k1 == -d or (
+                k1 != d and forward[k1_offset - 1] < forward[k1_offset + 1]
+            ):
+                x1 = forward[k1_offset + 1]
+            else:
+                x1 = forward[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while (
+                x1 < left_length
+                and y1 < right_length
+                and left[left_lo + x1] == right[right_lo + y1]
+            ):
+                x1 += 1
+                y1 += 1
+            forward[k1_offset] = x1
+            if x1 > left_length:
+                k1_end += 2
+            elif y1 > right_length:
+                k1_start += 2
+            elif front:
+                k2_offset = v_offset + delta - k1
+                if 0 <= k2_offset < v_length and backward[k2_offset] != -1:
+                    if x1 >= left_length - backward[k2_offset]:
+                        return left_lo + x1, right_lo + y1
+
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            k2_offset = v_offset + k2
+            if k2 == -d or (
+                k2 != d and backward[k2_offset - 1] < backward[k2_offset + 1]
+            ):
+                x2 = backward[k2_offset + 1]
+            else:
+                x2 = backward[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while (
+                x2 < left_length
+                and y2 < right_length
+                and left[left_hi - x2 - 1] == right[right_hi - y2 - 1]
+            ):
+                x2 += 1
+                y2 += 1
+            backward[k2_offset] = x2
+            if x2 > left_length:
+                k2_end += 2
+            elif y2 > right_length:
+                k2_start += 2
+            elif not front:
+                k1_offset = v_offset + delta - k2
+                if 0 <= k1_offset < v_length and forward[k1_offset] != -1:
+                    x1 = forward[k1_offset]
+                    if x1 >= left_length - x2:
+                        return left_lo + x1, right_lo + x1 - (k1_offset - v_offset)
+
+    return None
+
+
+def _trim_common_tokens(
+    left, left_lo, left_hi, right, right_lo, right_hi, matching_blocks: List
+) -> Tuple[int, int, int, int]:
+    """
+    _trim_common_tokens adds the common prefix and suffix of the token ranges
+    to the matching blocks and returns the ranges without them
+    """
+    prefix_length = 0
+    while (
+        left_lo + prefix_length < left_hi
+        and right_lo + prefix_length < right_hi
+        and left[left_lo + prefix_length] == right[right_lo + prefix_length]
+    ):
+        prefix_length += 1
+    if prefix_length:
+        matching_blocks.append((left_lo, right_lo, prefix_length))
+        left_lo += prefix_length
+        right_lo += prefix_length
+
+    suffix_length = 0
+    while (
+        left_hi - suffix_length > left_lo
+        and right_hi - suffix_length > right_lo
+        and left[left_hi - suffix_length - 1] == right[right_hi - suffix_length - 1]
+    ):
+        suffix_length += 1
+    if suffix_length:
+        left_hi -= suffix_length
+        right_hi -= suffix_length
+        matching_blocks.append((left_hi, right_hi, suffix_length))
+
+    return left_lo, left_hi, right_lo, right_hi
+
+
+def _join_matching_blocks(matching_blocks: List) -> List[Tuple[int, int, int]]:
+    """
+    _join_matching_blocks sorts the matching blocks and joins the adjacent ones
+    so that no two equal opcodes follow each other
+    """
+    joined_matching_blocks: List[Tuple[int, int, int]] = []
+    for left_start, right_start, size in sorted(matching_blocks):
+        if joined_matching_blocks:
+            last_left_start, last_right_start, last_size = joined_matching_blocks[-1]
+            if (
+                last_left_start + last_size == left_start
+                and last_right_start + last_size == right_start
+            ):
+                joined_matching_blocks[-1] = (
+                    last_left_start,
+                    last_right_start,
+                    last_size + size,
+                )
+                continue
+        joined_matching_blocks.append((left_start, right_start, size))
+    return joined_matching_blocks
+
+
+def _add_myers_matching_blocks(
+    left, left_lo, left_hi, right, right_lo, right_hi, matching_blocks: List
+) -> None:
+    """
+    _add_myers_matching_blocks adds the equal tokens of a shortest edit script
+    of the token ranges to the matching blocks,
+    the ranges are split at the middle of the edit script until they are trivial
+    """
+    ranges = [(left_lo, left_hi, right_lo, right_hi)]
+
+    while ranges:
+        left_lo, left_hi, right_lo, right_hi = ranges.pop()
+        left_lo, left_hi, right_lo, right_hi = _trim_common_tokens(
+            left, left_lo, left_hi, right, right_lo, right_hi, matching_blocks
+        )
+        if left_lo == left_hi or right_lo == right_hi:
+            continue
+
+        split = _bisect(left, left_lo, left_hi, right, right_lo, right_hi)
+        if split is None or split in ((left_lo, right_lo), (left_hi, right_hi)):
+            continue
+
+        left_split, right_split = split
+        ranges.append((left_split, left_hi, right_split, right_hi))
+        ranges.append((left_lo, left_split, right_lo, right_split))
+
+
+def _get_unique_common_tokens(
+    left, left_lo, left_hi, right, right_lo, right_hi
+) -> List[Tuple[int, int]]:
+    """
+    _get_unique_common_tokens returns the (left, right) positions of the tokens
+    occurring exactly once in both token ranges ordered by the left position
+    """
+    left_positions: Dict = {}
+    for i in range(left_lo, left_hi):
+        token = left[i]
+        left_positions[token] = None if token in left_positions else i
+
+    right_positions: Dict = {}
+    for j in range(right_lo, right_hi):
+        token = right[j]
+        if left_positions.get(token) is not None:
+            right_positions[token] = None if token in right_positions else j
+
+    return sorted(
+        (left_positions[token], j)
+        for token, j in right_positions.items()
+        if j is not None
+    )
+
+
+def _get_longest_increasing_anchors(
+    unique_common_tokens: List[Tuple[int, int]]
+) -> List[Tuple[int, int]]:
+    """
+    _get_longest_increasing_anchors returns the longest chain of unique common tokens
+    in the same order in both ranges using patience sorting
+    """
+    pile_tops: List[int] = []
+    pile_top_indexes: List[int] = []
+    previous_indexes: List[int] = []
+
+    for idx, (_, j) in enumerate(unique_common_tokens):
+        pile = bisect.bisect_left(pile_tops, j)
+        previous_indexes.append(pile_top_indexes[pile - 1] if pile else -1)
+        if pile == len(pile_tops):
+            pile_tops.append(j)
+            pile_top_indexes.append(idx)
+        else:
+            pile_tops[pile] = j
+            pile_top_indexes[pile] = idx
+
+    anchors = []
+    idx = pile_top_indexes[-1] if pile_top_indexes else -1
+    while idx != -1:
+        anchors.append(unique_common_tokens[idx])
+        idx = previous_indexes[idx]
+    anchors.reverse()
+    return anchors
+
+
+def _get_matching_blocks(left, right, engine: str) -> List[Tuple[int, int, int]]:
+    """
+    _get_matching_blocks returns the (left start, right start, size) blocks
+    of equal tokens in the same form as difflib.SequenceMatcher.get_matching_blocks
+    without the last dummy block,
+    the patience engine matches the tokens occurring once in both ranges first
+    and diffs the ranges between them again, ranges without such tokens
+    are diffed by the Myers engine
+    """
+    if engine == DIFF_ENGINE_DIFFLIB:
+        return [
+            tuple(matching_block)
+            for matching_block in difflib.SequenceMatcher(
+                None, left, right
+            ).get_matching_blocks()[:-1]
+        ]
+    if engine not in (DIFF_ENGINE_MYERS, DIFF_ENGINE_PATIENCE):
+        raise ValueError(f"Unknown diff engine {engine}")
+
+    matching_blocks: List[Tuple[int, int, int]] = []
+
+    if engine == DIFF_ENGINE_MYERS:
+        _add_myers_matching_blocks(
+            left, 0, len(left), right, 0, len(right), matching_blocks
+        )
+        return _join_matching_blocks(matching_blocks=matching_blocks)
+
+    ranges = [(0, len(left), 0, len(right))]
+    while ranges:
+        left_lo, left_hi, right_lo, right_hi = ranges.pop()
+        left_lo, left_hi, right_lo, right_hi = _trim_common_tokens(
+            left, left_lo, left_hi, right, right_lo, right_hi, matching_blocks
+        )
+        if left_lo == left_hi or right_lo == right_hi:
+            continue
+
+        anchors = _get_longest_increasing_anchors(
+            unique_common_tokens=_get_unique_common_tokens(
+                left, left_lo, left_hi, right, right_lo, right_hi
+            )
+        )
+        if not anchors:
+            _add_myers_matching_blocks(
+                left, left_lo, left_hi, right, right_lo, right_hi, matching_blocks
+            )
+            continue
+
+        for i, j in anchors:
+            ranges.append((left_lo, i, right_lo, j))
+            matching_blocks.append((i, j, 1))
+            left_lo, right_lo = i + 1, j + 1
+        ranges.append((left_lo, left_hi, right_lo, right_hi))
+
+    return _join_matching_blocks(matching_blocks=matching_blocks)
+
+
+def _get_opcodes(left, right, engine: str) -> Iterator[Tuple[str, int, int, int, int]]:
+    """
+    _get_opcodes yields the opcodes turning left into right found by the diff engine
+    in the same form as difflib.SequenceMatcher.get_opcodes,
+    difflib.SequenceMatcher is roughly quadratic on long token sequences,
+    the Myers engine runs in O((N + M) * D) time and linear space
+    where D is the count of the changed tokens,
+    the patience engine prefers matching the distinctive words
+    over the frequent separators matched by the shortest edit script
+    """
+    if engine == DIFF_ENGINE_DIFFLIB:
+        yield from difflib.SequenceMatcher(None, left, right).get_opcodes()
+        return
+
+    i = j = 0
+    for left_start, right_start, size in _get_matching_blocks(
+        left=left, right=right, engine=engine
+    ) + [(len(left), len(right), 0)]:
+        if i < left_start and j < right_start:
+            yield "replace", i, left_start, j, right_start
+        elif i < left_start:
+            yield "delete", i, left_start, j, right_start
+        elif j < right_start:
+            yield "insert", i, left_start, j, right_start
+        i = left_start + size
+        j = right_start + size
+        if size:
+            yield "equal", left_start, i, right_start, j
+
+
+def _merge(left, right, engine: str = DIFF_ENGINE_PATIENCE):
     """
     _merge
     https://stackoverflow.com/questions/37263682/how-to-find-union-of-two-strings-and-maintain-the-order
     """
-    m = difflib.SequenceMatcher(None, left, right)
-    for o, i1, i2, j1, j2 in m.get_opcodes():
+    for o, i1, i2, j1, j2 in _get_opcodes(left=left, right=right, engine=engine):
         if o == "equal":
             yield left[i1:i2]
         elif o == "delete":
@@ -26,15 +348,6 @@ def _merge(left, right):
             yield right[j1:j2]
 
 
-def _replace_line_endings(
-    input_text: str, line_ending: str, line_ending_replacement: str
-) -> str:
-    """
-    _replace_line_endings
-    """
-    return input_text.replace(line_ending, line_ending_replacement)
-
-
 SEPARATORS = {
     " ",  # (blank space)
     "~",  # (tilde)
@@ -70,60 +383,945 @@ SEPARATORS = {
 }
 
 
-def _split(input_text: str) -> List:
+# line breaks are tokens of their own like the separators
+TOKEN_SEPARATORS = SEPARATORS | {TEXT_FILE_LINE_BREAK_CHAR}
+TOKEN_REGEX = re.compile(
+    "[{separators}]|[^{separators}]+".format(
+        separators=re.escape("".join(sorted(TOKEN_SEPARATORS)))
+    )
+)
+# merge windows start and end next to these chars so that no word is cut
+MERGE_WINDOW_BOUNDARY_CHARS = TOKEN_SEPARATORS
+
+
+def _split(input_text: str) -> List[str]:
+    """
+    _split splits the text into words and separators, joining them gives the text back
+    """
+    return TOKEN_REGEX.findall(input_text)
+
+
+def _join(input_list: List[str], separator: str) -> str:
+    """
+    _join joins the tokens putting the separator between adjacent words
+    """
     result = []
-    offset = 0
-    for idx, string in enumerate(input_text):
-        if string in SEPARATORS:
-            result.append(input_text[offset:idx])
-            result.append(string)
-            offset = idx + 1
-        # the last word in the enumerated input text
-        if idx + 1 == len(input_text):
-            result.append(input_text[offset : idx + 1])
+    is_previous_word = False
+    for el in input_list:
+        is_word = el not in TOKEN_SEPARATORS
+        if is_word and is_previous_word:
+            result.append(separator)
+        result.append(el)
+        is_previous_word = is_word
+    return "".join(result)
+
+
+def _get_token_ids() -> Dict[str, int]:
+    """
+    _get_token_ids returns a new token table mapping the tokens to integer ids,
+    the dict order gives the tokens by their ids
+    """
+    return {separator: idx for idx, separator in enumerate(sorted(TOKEN_SEPARATORS))}
+
+
+def _intern(input_list: List[str], token_ids: Dict[str, int]) -> array:
+    """
+    _intern returns the token ids of the tokens, new tokens are added to the table,
+    comparing and hashing integer ids is cheaper than comparing strings
+    """
+    return array(
+        "i", [token_ids.setdefault(token, len(token_ids)) for token in input_list]
+    )
+
+
+def _merge_window(before: str, after: str, engine: str) -> str:
+    """
+    _merge_window merges the window token by token
+    """
+    default_separator = " "
+    token_ids = _get_token_ids()
+    merged = _merge(
+        _intern(input_list=_split(before), token_ids=token_ids),
+        _intern(input_list=_split(after), token_ids=token_ids),
+        engine=engine,
+    )
+
+    tokens = list(token_ids)
+    return _join(
+        input_list=[tokens[token_id] for sublist in merged for token_id in sublist],
+        separator=default_separator,
+    )
+
+
+def _is_token_boundary(input_text: str, position: int) -> bool:
+    return (
+        position == 0
+        or position == len(input_text)
+        or input_text[position - 1] in MERGE_WINDOW_BOUNDARY_CHARS
+        or input_text[position] in MERGE_WINDOW_BOUNDARY_CHARS
+    )
+
+
+def _get_versions_common_boundary_lengths(versions: List[str]) -> Tuple[int, int]:
+    """
+    _get_versions_common_boundary_lengths returns the lengths of the prefix
+    and the suffix common to all the versions shortened to end and start
+    at a token boundary in each of them so that no word is diffed in parts
+    """
+    first_version = versions[0]
+    prefix_length = min(
+        _get_common_prefix_length(
+            before=first_version,
+            after=version,
+            max_length=min(len(first_version), len(version)),
+        )
+        for version in versions[1:]
+    )
+    while not all(
+        _is_token_boundary(input_text=version, position=prefix_length)
+        for version in versions
+    ):
+        prefix_length -= 1
+
+    suffix_length = min(
+        _get_common_suffix_length(
+            before=first_version,
+            after=version,
+            max_length=min(len(first_version), len(version)) - prefix_length,
+        )
+        for version in versions[1:]
+    )
+    while not all(
+        _is_token_boundary(input_text=version, position=len(version) - suffix_length)
+        for version in versions
+    ):
+        suffix_length -= 1
+
+    return prefix_length, suffix_length
+
+
+def _get_common_boundary_lengths(before: str, after: str) -> Tuple[int, int]:
+    """
+    _get_common_boundary_lengths returns the lengths of the common prefix and suffix
+    shortened to end and start at a token boundary so that no word is diffed in parts
+    """
+    return _get_versions_common_boundary_lengths(versions=[before, after])
+
+
+def _get_trimmed_windows(before: str, after: str) -> List[Tuple[str, str]]:
+    """
+    _get_trimmed_windows splits the texts into the common prefix,
+    the differing middle and the common suffix, empty windows are left out
+    """
+    prefix_length, suffix_length = _get_common_boundary_lengths(
+        before=before, after=after
+    )
+    windows = [
+        (before[:prefix_length], before[:prefix_length]),
+        (
+            before[prefix_length : len(before) - suffix_length],
+            after[prefix_length : len(after) - suffix_length],
+        ),
+        (before[len(before) - suffix_length :], before[len(before) - suffix_length :]),
+    ]
+    return [window for window in windows if window[0] or window[1]]
+
+
+def _split_lines(input_text: str) -> List[str]:
+    lines = input_text.split(TEXT_FILE_LINE_BREAK_CHAR)
+    return [f"{line}{TEXT_FILE_LINE_BREAK_CHAR}" for line in lines[:-1]] + (
+        [lines[-1]] if lines[-1] else []
+    )
+
+
+def get_merge_windows(before: str, after: str) -> List[Tuple[str, str]]:
+    """
+    get_merge_windows splits the texts into (before, after) windows merged
+    independently, the common prefix and suffix are stripped and the middle
+    is split at the lines occurring once in both texts in the same order,
+    windows with the same text on both sides need no merge
+    """
+    windows = []
+
+    for before_window, after_window in _get_trimmed_windows(before=before, after=after):
+        if before_window == after_window:
+            windows.append((before_window, after_window))
+            continue
+
+        before_lines = _split_lines(input_text=before_window)
+        after_lines = _split_lines(input_text=after_window)
+        anchors = _get_longest_increasing_anchors(
+            unique_common_tokens=_get_unique_common_tokens(
+                before_lines, 0, len(before_lines), after_lines, 0, len(after_lines)
+            )
+        )
+
+        before_start = after_start = 0
+        for before_idx, after_idx in anchors + [(len(before_lines), len(after_lines))]:
+            line_windows = _get_trimmed_windows(
+                before="".join(before_lines[before_start:before_idx]),
+                after="".join(after_lines[after_start:after_idx]),
+            )
+            windows.extend(line_windows)
+            if before_idx < len(before_lines):
+                windows.append((before_lines[before_idx], before_lines[before_idx]))
+            before_start, after_start = before_idx + 1, after_idx + 1
+
+    return windows
+
+
+# the merge results are memoized up to MERGE_MEMO_MAX_SIZE characters in total
+MERGE_MEMO_MAX_SIZE = 4 * 1024 * 1024
+MERGE_MEMO_DIGEST_SIZE = 16
+
+
+def _get_digest(input_text: str) -> bytes:
+    return hashlib.blake2b(
+        input_text.encode("utf-8", "surrogatepass"),
+        digest_size=MERGE_MEMO_DIGEST_SIZE,
+    ).digest()
+
+
+class MergeMemo:
+    """
+    MergeMemo keeps the least recently used merge results keyed by the engine
+    and the content digests of the merged texts, the total size of the kept results
+    is bounded by max_size characters
+    """
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._size = 0
+        # (engine, before digest, after digest) -> result
+        self._results: OrderedDict = OrderedDict()
+        # the merges run both in the UI thread and in the merge worker thread
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: Tuple[str, bytes, bytes]) -> Optional[str]:
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def put(self, key: Tuple[str, bytes, bytes], result: str) -> None:
+        if len(result) > self._max_size:
+            return
+
+        with self._lock:
+            previous_result = self._results.pop(key, None)
+            if previous_result is not None:
+                self._size -= len(previous_result)
+
+            self._results[key] = result
+            self._size += len(result)
+
+            while self._size > self._max_size:
+                _, evicted_result = self._results.popitem(last=False)
+                self._size -= len(evicted_result)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+            self._size = 0
+
+
+merge_memo = MergeMemo(max_size=MERGE_MEMO_MAX_SIZE)
+
+
+def _get_memo_key(before: str, after: str, engine: str) -> Tuple[str, bytes, bytes]:
+    return engine, _get_digest(input_text=before), _get_digest(input_text=after)
+
+
+def _merge_memoized_window(before: str, after: str, engine: str) -> str:
+    key = _get_memo_key(before=before, after=after, engine=engine)
+    result = merge_memo.get(key=key)
+    if result is None:
+        result = _merge_window(before=before, after=after, engine=engine)
+        merge_memo.put(key=key, result=result)
     return result
 
 
-def _join(input_list: List, separator: str) -> str:
-    result = str()
-    for idx, el in enumerate(input_list):
-        if (
-            idx == 0
-            or (el in SEPARATORS)
-            or (idx > 1 and input_list[idx - 1] in SEPARATORS)
+def merge_strings(
+    before: str, after: str, engine: str = DIFF_ENGINE_PATIENCE
+) -> str:
+    """
+    merge_strings merges the texts window by window,
+    only the windows that differ are merged so that the merge cost
+    depends on the size of the change and not on the size of the texts,
+    the merges of the texts and of their windows are memoized,
+    when after only grew since the latest merge of before the windows
+    left unchanged by the growth are not merged again
+    """
+    if before == after:
+        return after
+
+    key = _get_memo_key(before=before, after=after, engine=engine)
+    result = merge_memo.get(key=key)
+    if result is not None:
+        return result
+
+    result = "".join(
+        (
+            after_window
+            if before_window == after_window
+            else _merge_memoized_window(
+                before=before_window, after=after_window, engine=engine
+            )
+        )
+        for before_window, after_window in get_merge_windows(
+            before=before, after=after
+        )
+    )
+    merge_memo.put(key=key, result=result)
+    return result
+
+
+def _get_base_matches(base_length: int, matching_blocks: List) -> List[int]:
+    """
+    _get_base_matches returns the position each base token is matched to, -1 if none
+    """
+    base_matches = [-1] * base_length
+    for base_start, start, size in matching_blocks:
+        base_matches[base_start : base_start + size] = range(start, start + size)
+    return base_matches
+
+
+def _merge_three_way_chunk(
+    base_chunk: array,
+    local_chunk: array,
+    remote_chunk: array,
+    tokens: List[str],
+    engine: str,
+) -> str:
+    """
+    _merge_three_way_chunk takes the side that changed the chunk,
+    the chunk changed differently on both sides is merged from both of them
+    the same way as merge_strings merges two versions
+    """
+    if local_chunk == base_chunk or local_chunk == remote_chunk:
+        return "".join([tokens[token_id] for token_id in remote_chunk])
+    if remote_chunk == base_chunk:
+        return "".join([tokens[token_id] for token_id in local_chunk])
+    return merge_strings(
+        before="".join([tokens[token_id] for token_id in remote_chunk]),
+        after="".join([tokens[token_id] for token_id in local_chunk]),
+        engine=engine,
+    )
+
+
+def _get_three_way_chunks(
+    base: array, local: array, remote: array, engine: str
+) -> Iterator[Tuple[bool, int, int, int, int, int, int]]:
+    """
+    _get_three_way_chunks splits the tokens into the stable chunks matched
+    in all the versions and the chunks in between, changed on at least one side,
+    and yields them as (is stable, base start, base end, local start, local end,
+    remote start, remote end)
+    """
+    local_matches = _get_base_matches(
+        base_length=len(base),
+        matching_blocks=_get_matching_blocks(left=base, right=local, engine=engine),
+    )
+    remote_matches = _get_base_matches(
+        base_length=len(base),
+        matching_blocks=_get_matching_blocks(left=base, right=remote, engine=engine),
+    )
+
+    i = j = k = 0
+    while True:
+        next_i = i
+        while next_i < len(base) and (
+            local_matches[next_i] == -1 or remote_matches[next_i] == -1
         ):
-            result += el
+            next_i += 1
+        if next_i < len(base):
+            next_j, next_k = local_matches[next_i], remote_matches[next_i]
         else:
-            result += f"{separator}{el}"
-    return result
+            next_j, next_k = len(local), len(remote)
 
+        if (next_i, next_j, next_k) != (i, j, k):
+            yield False, i, next_i, j, next_j, k, next_k
+        if next_i == len(base):
+            break
+
+        i, j, k = next_i, next_j, next_k
+        while (
+            next_i < len(base)
+            and local_matches[next_i] == next_j
+            and remote_matches[next_i] == next_k
+        ):
+            next_i += 1
+            next_j += 1
+            next_k += 1
+        yield True, i, next_i, j, next_j, k, next_k
+        i, j, k = next_i, next_j, next_k
 
-def merge_strings(before: str, after: str) -> str:
+
+def _merge_three_way_tokens(
+    base: array, local: array, remote: array, tokens: List[str], engine: str
+) -> str:
+    result = []
+    for is_stable, i1, i2, j1, j2, k1, k2 in _get_three_way_chunks(
+        base=base, local=local, remote=remote, engine=engine
+    ):
+        if is_stable:
+            result.append("".join([tokens[token_id] for token_id in base[i1:i2]]))
+        else:
+            result.append(
+                _merge_three_way_chunk(
+                    base_chunk=base[i1:i2],
+                    local_chunk=local[j1:j2],
+                    remote_chunk=remote[k1:k2],
+                    tokens=tokens,
+                    engine=engine,
+                )
+            )
+    return "".join(result)
+
+
+def merge_three_way_strings(
+    base: str, local: str, remote: str, engine: str = DIFF_ENGINE_PATIENCE
+) -> str:
     """
-    merge_strings
+    merge_three_way_strings merges the local and the remote versions
+    changed independently from their common base version,
+    the changes of both sides are kept, deletions included,
+    only the middle part of the versions that differs from the base is diffed
     """
-    default_separator = " "
-    merged = _merge(
-        _split(
-            _replace_line_endings(
-                input_text=before,
-                line_ending=TEXT_FILE_LINE_BREAK_CHAR,
-                line_ending_replacement=TEXT_FILE_LINE_BREAK_CHAR_TEMP_REPLACEMENT,
+    if local == base or local == remote:
+        return remote
+    if remote == base:
+        return local
+
+    # the prefix and the suffix unchanged in all the versions are not diffed,
+    # they end and start at a token boundary so that no word is diffed in parts
+    prefix_length, suffix_length = _get_versions_common_boundary_lengths(
+        versions=[base, local, remote]
+    )
+
+    token_ids = _get_token_ids()
+    base_tokens, local_tokens, remote_tokens = (
+        _intern(
+            input_list=_split(version[prefix_length : len(version) - suffix_length]),
+            token_ids=token_ids,
+        )
+        for version in (base, local, remote)
+    )
+
+    return "".join(
+        (
+            base[:prefix_length],
+            _merge_three_way_tokens(
+                base=base_tokens,
+                local=local_tokens,
+                remote=remote_tokens,
+                tokens=list(token_ids),
+                engine=engine,
+            ),
+            base[len(base) - suffix_length :],
+        )
+    )
+
+
+def _merge_section(
+    section_versions: Tuple[Optional[str], str, str], engine: str
+) -> str:
+    base, local, remote = section_versions
+    if base is None:
+        return merge_strings(before=remote, after=local, engine=engine)
+    return merge_three_way_strings(base=base, local=local, remote=remote, engine=engine)
+
+
+class MergeProcessPool:
+    """
+    MergeProcessPool keeps the process pool merge_sections merges in
+    for the next reloads, as starting the processes costs more than the merges,
+    the pool is created again when the process count changes or the pool broke
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._processes = 0
+        self._lock = threading.Lock()
+
+    def get_executor(self, processes: int) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._processes != processes:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ProcessPoolExecutor(max_workers=processes)
+                self._processes = processes
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+                self._processes = 0
+
+
+merge_process_pool = MergeProcessPool()
+
+
+def merge_sections(
+    section_versions: Dict[str, Tuple[Optional[str], str, str]],
+    engine: str = DIFF_ENGINE_PATIENCE,
+    processes: int = 1,
+) -> Dict[str, str]:
+    """
+    merge_sections merges the (base, local, remote) versions of independent sections,
+    a section without a base is merged from its local and remote versions only,
+    with more than one process the sections are merged in parallel in a process pool
+    as the merges are CPU bound and threads would hold the GIL in turns
+    """
+    merge_section = partial(_merge_section, engine=engine)
+
+    if processes > 1 and len(section_versions) > 1:
+        try:
+            executor = merge_process_pool.get_executor(processes=processes)
+            return dict(
+                zip(
+                    section_versions,
+                    executor.map(merge_section, section_versions.values()),
+                )
             )
-        ),
-        _split(
-            _replace_line_endings(
-                input_text=after,
-                line_ending=TEXT_FILE_LINE_BREAK_CHAR,
-                line_ending_replacement=TEXT_FILE_LINE_BREAK_CHAR_TEMP_REPLACEMENT,
+        # multiprocessing is not available on some platforms, Android included
+        except (ImportError, NotImplementedError, OSError):
+            pass
+        # the broken pool is created again by the next merge
+        except BrokenExecutor:
+            merge_process_pool.shutdown()
+
+    return {
+        section_separator: merge_section(versions)
+        for section_separator, versions in section_versions.items()
+    }
+
+
+CONFLICT_MARKER_LOCAL = "<<<<<<< local"
+CONFLICT_MARKER_SEPARATOR = "======="
+CONFLICT_MARKER_EXTERNAL = ">>>>>>> external"
+
+
+def _get_conflict_block(text: str, marker: str) -> str:
+    # the conflicting lines at the end of the text may not end with a line break
+    line_break = (
+        ""
+        if not text or text.endswith(TEXT_FILE_LINE_BREAK_CHAR)
+        else TEXT_FILE_LINE_BREAK_CHAR
+    )
+    return f"{marker}{TEXT_FILE_LINE_BREAK_CHAR}{text}{line_break}"
+
+
+MERGE_MODE_UNION = "union"
+MERGE_MODE_CONFLICT_MARKERS = "conflict markers"
+
+MERGE_HUNK_CLEAN = "clean"
+MERGE_HUNK_CONFLICT = "conflict"
+
+MERGE_RESOLUTION_LOCAL = "local"
+MERGE_RESOLUTION_EXTERNAL = "external"
+MERGE_RESOLUTION_BOTH = "both"
+
+
+class MergeHunk(NamedTuple):
+    """
+    MergeHunk is the part of the merged text between the start and the end offsets,
+    a clean hunk has the same local and external text,
+    a conflict hunk shows both versions between the conflict markers
+    """
+
+    kind: str
+    local: str
+    external: str
+    start: int
+    end: int
+
+    @property
+    def text(self) -> str:
+        if self.kind == MERGE_HUNK_CLEAN:
+            return self.local
+        return "".join(
+            (
+                _get_conflict_block(text=self.local, marker=CONFLICT_MARKER_LOCAL),
+                _get_conflict_block(
+                    text=self.external, marker=CONFLICT_MARKER_SEPARATOR
+                ),
+                CONFLICT_MARKER_EXTERNAL,
+                TEXT_FILE_LINE_BREAK_CHAR,
             )
-        ),
+        )
+
+
+def _get_merge_hunks(chunks: Iterable[Tuple[str, str]]) -> List[MergeHunk]:
+    """
+    _get_merge_hunks turns the (local, external) text chunks into the merge hunks,
+    the chunks with the same text on both sides are joined into clean hunks
+    """
+    hunks = []
+    clean_chunks = []
+    position = 0
+
+    def add_clean_hunk():
+        text = "".join(clean_chunks)
+        if text:
+            hunks.append(
+                MergeHunk(
+                    kind=MERGE_HUNK_CLEAN,
+                    local=text,
+                    external=text,
+                    start=position,
+                    end=position + len(text),
+                )
+            )
+        clean_chunks.clear()
+        return position + len(text)
+
+    for local, external in chunks:
+        if local == external:
+            clean_chunks.append(local)
+            continue
+
+        position = add_clean_hunk()
+        hunk = MergeHunk(
+            kind=MERGE_HUNK_CONFLICT,
+            local=local,
+            external=external,
+            start=position,
+            end=position,
+        )
+        hunk = hunk._replace(end=position + len(hunk.text))
+        hunks.append(hunk)
+        position = hunk.end
+
+    add_clean_hunk()
+    return hunks
+
+
+def _get_common_line_lengths(versions: List[str]) -> Tuple[int, int]:
+    """
+    _get_common_line_lengths returns the lengths of the prefix and the suffix
+    common to all the versions shortened to whole lines
+    """
+    first_version = versions[0]
+    prefix_length, suffix_length = _get_versions_common_boundary_lengths(
+        versions=versions
+    )
+
+    prefix_length = first_version.rfind(TEXT_FILE_LINE_BREAK_CHAR, 0, prefix_length) + 1
+    if not all(
+        version[len(version) - suffix_length - 1 : len(version) - suffix_length]
+        in ("", TEXT_FILE_LINE_BREAK_CHAR)
+        for version in versions
+    ):
+        line_break_position = first_version.find(
+            TEXT_FILE_LINE_BREAK_CHAR, len(first_version) - suffix_length
+        )
+        suffix_length = (
+            len(first_version) - line_break_position - 1
+            if line_break_position >= 0
+            else 0
+        )
+    return prefix_length, suffix_length
+
+
+def get_conflict_marker_hunks(before: str, after: str) -> List[MergeHunk]:
+    """
+    get_conflict_marker_hunks keeps both versions of the lines that differ
+    in a single conflict hunk, the after (local) lines first,
+    nothing is diffed so it takes linear time and serves as the fallback
+    of a merge that does not finish in time
+    """
+    if before == after:
+        return _get_merge_hunks(chunks=[(after, after)])
+
+    prefix_length, suffix_length = _get_common_line_lengths(versions=[before, after])
+    return _get_merge_hunks(
+        chunks=[
+            (after[:prefix_length], after[:prefix_length]),
+            (
+                after[prefix_length : len(after) - suffix_length],
+                before[prefix_length : len(before) - suffix_length],
+            ),
+            (after[len(after) - suffix_length :], after[len(after) - suffix_length :]),
+        ]
+    )
+
+
+def get_merge_hunks(
+    before: str,
+    after: str,
+    base: Optional[str] = None,
+    engine: str = DIFF_ENGINE_PATIENCE,
+) -> List[MergeHunk]:
+    """
+    get_merge_hunks merges the before (external) and the after (local) versions
+    line by line into the clean hunks and the conflict hunks of the lines
+    changed differently on both sides, with the base version known only the lines
+    changed on both sides are in conflict, otherwise the replaced lines are,
+    the lines inserted or deleted on one side only are kept like merge_strings does
+    """
+    if before == after:
+        return _get_merge_hunks(chunks=[(after, after)])
+
+    versions = [after, before] if base is None else [base, after, before]
+    prefix_length, suffix_length = _get_common_line_lengths(versions=versions)
+
+    line_ids: Dict[str, int] = dict()
+    versions_lines = [
+        _split_lines(version[prefix_length : len(version) - suffix_length])
+        for version in versions
+    ]
+    versions_line_ids = [
+        array("i", [line_ids.setdefault(line, len(line_ids)) for line in lines])
+        for lines in versions_lines
+    ]
+
+    chunks = [(after[:prefix_length], after[:prefix_length])]
+    if base is None:
+        after_lines, before_lines = versions_lines
+        after_line_ids, before_line_ids = versions_line_ids
+        for tag, i1, i2, j1, j2 in _get_opcodes(
+            left=before_line_ids, right=after_line_ids, engine=engine
+        ):
+            before_text = "".join(before_lines[i1:i2])
+            after_text = "".join(after_lines[j1:j2])
+            if tag == "replace":
+                chunks.append((after_text, before_text))
+            else:
+                chunks.append((after_text or before_text, after_text or before_text))
+    else:
+        _, after_lines, before_lines = versions_lines
+        base_line_ids, after_line_ids, before_line_ids = versions_line_ids
+        for is_stable, i1, i2, j1, j2, k1, k2 in _get_three_way_chunks(
+            base=base_line_ids,
+            local=after_line_ids,
+            remote=before_line_ids,
+            engine=engine,
+        ):
+            before_text = "".join(before_lines[k1:k2])
+            after_text = "".join(after_lines[j1:j2])
+            if is_stable or after_line_ids[j1:j2] in (
+                base_line_ids[i1:i2],
+                before_line_ids[k1:k2],
+            ):
+                chunks.append((before_text, before_text))
+            elif before_line_ids[k1:k2] == base_line_ids[i1:i2]:
+                chunks.append((after_text, after_text))
+            else:
+                chunks.append((after_text, before_text))
+    chunks.append(
+        (after[len(after) - suffix_length :], after[len(after) - suffix_length :])
+    )
+
+    return _get_merge_hunks(chunks=chunks)
+
+
+def get_merge_hunks_text(hunks: List[MergeHunk]) -> str:
+    return "".join([hunk.text for hunk in hunks])
+
+
+def get_next_conflict_hunk_index(
+    hunks: List[MergeHunk], position: int, include_current: bool = False
+) -> Optional[int]:
+    """
+    get_next_conflict_hunk_index returns the index of the first conflict hunk
+    starting at or after the position, or containing it with include_current,
+    wrapping around to the first conflict hunk
+    """
+    conflict_hunk_indexes = [
+        index for index, hunk in enumerate(hunks) if hunk.kind == MERGE_HUNK_CONFLICT
+    ]
+    for index in conflict_hunk_indexes:
+        if hunks[index].start >= position or (
+            include_current and hunks[index].end > position
+        ):
+            return index
+    return conflict_hunk_indexes[0] if conflict_hunk_indexes else None
+
+
+def resolve_merge_hunk(
+    hunks: List[MergeHunk], hunk_index: int, resolution: str
+) -> Tuple[List[MergeHunk], Tuple[int, int, str]]:
+    """
+    resolve_merge_hunk replaces the conflict hunk with a clean hunk of the local,
+    the external or both versions, returns the hunks with the offsets of the later
+    hunks shifted and the edit of the merged text as the position,
+    the count of deleted characters and the inserted text,
+    so that the other conflicts stay resolvable without diffing the text again
+    """
+    hunk = hunks[hunk_index]
+    if hunk.kind != MERGE_HUNK_CONFLICT:
+        raise ValueError("merge hunk is not a conflict")
+
+    if resolution == MERGE_RESOLUTION_LOCAL:
+        text = hunk.local
+    elif resolution == MERGE_RESOLUTION_EXTERNAL:
+        text = hunk.external
+    elif resolution == MERGE_RESOLUTION_BOTH:
+        line_break = (
+            TEXT_FILE_LINE_BREAK_CHAR
+            if hunk.local
+            and hunk.external
+            and not hunk.local.endswith(TEXT_FILE_LINE_BREAK_CHAR)
+            else ""
+        )
+        text = f"{hunk.local}{line_break}{hunk.external}"
+    else:
+        raise ValueError(f"unknown merge resolution {resolution}")
+
+    resolved_hunk = MergeHunk(
+        kind=MERGE_HUNK_CLEAN,
+        local=text,
+        external=text,
+        start=hunk.start,
+        end=hunk.start + len(text),
+    )
+    shift = resolved_hunk.end - hunk.end
+    return (
+        hunks[:hunk_index]
+        + [resolved_hunk]
+        + [
+            later_hunk._replace(
+                start=later_hunk.start + shift, end=later_hunk.end + shift
+            )
+            for later_hunk in hunks[hunk_index + 1 :]
+        ],
+        (hunk.start, hunk.end - hunk.start, text),
+    )
+
+
+def merge_strings_with_conflict_markers(before: str, after: str) -> str:
+    """
+    merge_strings_with_conflict_markers returns the text of get_conflict_marker_hunks
+    """
+    return get_merge_hunks_text(
+        hunks=get_conflict_marker_hunks(before=before, after=after)
+    )
+
+
+def _get_common_prefix_length(before: str, after: str, max_length: int) -> int:
+    """
+    _get_common_prefix_length compares the texts chunk by chunk,
+    only the first differing chunk is compared char by char
+    """
+    position = 0
+    while position < max_length:
+        chunk_end = min(position + TEXT_DELTA_CHUNK_SIZE, max_length)
+        if before[position:chunk_end] != after[position:chunk_end]:
+            while before[position] == after[position]:
+                position += 1
+            return position
+        position = chunk_end
+    return max_length
+
+
+def _get_common_suffix_length(before: str, after: str, max_length: int) -> int:
+    """
+    _get_common_suffix_length compares the texts chunk by chunk from their ends,
+    only the first differing chunk is compared char by char
+    """
+    before_length = len(before)
+    after_length = len(after)
+    length = 0
+    while length < max_length:
+        chunk_length = min(length + TEXT_DELTA_CHUNK_SIZE, max_length)
+        if (
+            before[before_length - chunk_length : before_length - length]
+            != after[after_length - chunk_length : after_length - length]
+        ):
+            while (
+                before[before_length - length - 1] == after[after_length - length - 1]
+            ):
+                length += 1
+            return length
+        length = chunk_length
+    return max_length
+
+
+def get_text_delta(before: str, after: str) -> Tuple[int, int, str]:
+    """
+    get_text_delta returns the single edit turning before into after
+    as the position, the count of deleted characters and the inserted text
+    """
+    if before == after:
+        return len(before), 0, ""
+
+    max_length = min(len(before), len(after))
+    prefix_length = _get_common_prefix_length(
+        before=before, after=after, max_length=max_length
     )
+    suffix_length = _get_common_suffix_length(
+        before=before, after=after, max_length=max_length - prefix_length
+    )
+    return (
+        prefix_length,
+        len(before) - prefix_length - suffix_length,
+        after[prefix_length : len(after) - suffix_length],
+    )
+
 
-    merged_result_list = [el for sublist in merged for el in sublist]
+def get_text_patch(before: str, after: str) -> List[Tuple[int, int, str]]:
+    """
+    get_text_patch returns the edits turning before into after as the hunks
+    of the position in before, the count of deleted characters and the inserted text,
+    the part of the texts that differs is diffed line by line so that the edits
+    far apart in the text make separate hunks and the patch stays small
+    """
+    position, deleted_length, inserted_text = get_text_delta(before=before, after=after)
+    if not deleted_length and not inserted_text:
+        return []
+    if not deleted_length or not inserted_text:
+        return [(position, deleted_length, inserted_text)]
 
-    return _replace_line_endings(
-        input_text=_join(input_list=merged_result_list, separator=default_separator),
-        line_ending=TEXT_FILE_LINE_BREAK_CHAR_TEMP_REPLACEMENT,
-        line_ending_replacement=TEXT_FILE_LINE_BREAK_CHAR,
+    before_lines = _split_lines(before[position : position + deleted_length])
+    after_lines = _split_lines(inserted_text)
+    line_ids: Dict[str, int] = dict()
+    before_line_ids, after_line_ids = (
+        array("i", [line_ids.setdefault(line, len(line_ids)) for line in lines])
+        for lines in (before_lines, after_lines)
     )
+
+    before_line_positions = [position]
+    for line in before_lines:
+        before_line_positions.append(before_line_positions[-1] + len(line))
+
+    patch = []
+    for tag, i1, i2, j1, j2 in _get_opcodes(
+        left=before_line_ids, right=after_line_ids, engine=DIFF_ENGINE_PATIENCE
+    ):
+        if tag == "equal":
+            continue
+
+        # the changed lines are trimmed to the changed characters
+        hunk_position, hunk_deleted_length, hunk_inserted_text = get_text_delta(
+            before="".join(before_lines[i1:i2]), after="".join(after_lines[j1:j2])
+        )
+        patch.append(
+            (
+                before_line_positions[i1] + hunk_position,
+                hunk_deleted_length,
+                hunk_inserted_text,
+            )
+        )
+    return patch
+
+
+def apply_text_patch(input_text: str, patch: List[Tuple[int, int, str]]) -> str:
+    """
+    apply_text_patch applies the hunks of get_text_patch to the text
+    """
+    result = []
+    position = 0
+    for hunk_position, hunk_deleted_length, hunk_inserted_text in patch:
+        result.append(input_text[position:hunk_position])
+        result.append(hunk_inserted_text)
+        position = hunk_position + hunk_deleted_length
+    result.append(input_text[position:])
+    return "".join(result)
@@ -1,5 +1,34 @@
-import re
-from typing import List, Dict, Optional
+import bisect
+import mmap
+import os
+from collections import OrderedDict
+from itertools import islice
+from typing import List, Dict, Optional, Set, Tuple, Iterator, MutableMapping, Union
+
+from notes_app.case_fold import CaseFoldedText
+from notes_app.compression import get_file_compression, open_text_reader
+from notes_app.diff import get_text_patch, merge_sections
+from notes_app.journal import (
+    JOURNAL_RECORD_OPERATION_DELETE,
+    JOURNAL_RECORD_OPERATION_PATCH,
+    apply_journal_records,
+    get_journal_content_hash,
+    get_journal_size,
+    get_delete_section_record,
+    get_patch_section_record,
+    get_set_section_record,
+)
+from notes_app.search_index import SearchIndex
+from notes_app.section_index import (
+    get_content_hash,
+    get_section_content_hash,
+    read_section_index,
+    write_section_index,
+)
+from notes_app.section_separator import (
+    SectionSeparatorGrammar,
+    get_section_separator_grammar,
+)
 
 SECTION_FILE_NEW_SECTION_PLACEHOLDER = ""
 SECTION_FILE_NAME_MINIMAL_CHAR_COUNT = 2
@@ -16,14 +45,311 @@ def get_validated_file_path(file_path: str) -> Optional[str]:
 
 def transform_section_separator_to_section_name(
     defaults, section_separator: str
-) -> str:
-    return re.search(
-        defaults.DEFAULT_SECTION_FILE_SEPARATOR_GROUP_SUBSTR_REGEX, section_separator,
-    ).group(1)
+) -> Optional[str]:
+    return get_section_separator_grammar(defaults=defaults).extract_name(
+        section_separator=section_separator
+    )
 
 
 def transform_section_name_to_section_separator(defaults, section_name: str) -> str:
-    return defaults.DEFAULT_SECTION_FILE_SEPARATOR.format(name=section_name)
+    return get_section_separator_grammar(defaults=defaults).format(
+        section_name=section_name
+    )
+
+
+def _decode_text(data: bytes, encoding: str) -> str:
+    """
+    decode bytes read from the file the same way a file opened in text mode would,
+    translating universal line endings to \n
+    """
+    text = data.decode(encoding)
+    if "\r" in text:
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _get_encoded_length(text: str, encoding: str) -> int:
+    # the length of a pure ASCII str is its length in bytes for any ASCII compatible encoding
+    if text.isascii():
+        return len(text)
+    return len(text.encode(encoding))
+
+
+def _get_section_index_entries(
+    section_byte_offsets: Dict[str, Tuple[int, int]],
+    file_size: int,
+    section_hashes: Dict[str, str],
+) -> List[List]:
+    """
+    returns the [separator, separator start, content start, content end, content hash]
+    section index entries of the sections ordered as in the file
+    """
+    section_byte_offsets_list = list(section_byte_offsets.items())
+    return [
+        [
+            section_separator,
+            separator_start,
+            content_start,
+            section_byte_offsets_list[idx + 1][1][0]
+            if idx + 1 < len(section_byte_offsets_list)
+            else file_size,
+            section_hashes[section_separator],
+        ]
+        for idx, (section_separator, (separator_start, content_start)) in enumerate(
+            section_byte_offsets_list
+        )
+    ]
+
+
+class MemoryMappedSections(MutableMapping):
+    """
+    MemoryMappedSections is a mapping of section separators to section contents
+    backed by a read-only memory map of the storage file. Only the byte offsets
+    of each section are kept, section content is decoded when accessed and the
+    decoded contents are kept in a bounded LRU cache.
+    Sections set or renamed in memory are kept as plain strings until saved.
+    The file changed on disk since it was mapped is mapped and parsed again
+    before a section is decoded, slicing a map of a truncated file would crash
+    the process with SIGBUS, sections no longer in the file decode as empty.
+    """
+
+    def __init__(
+        self,
+        file_path,
+        section_separator_grammar: SectionSeparatorGrammar,
+        encoding,
+        cache_size,
+        section_index=None,
+    ):
+        self._file_path = file_path
+        self._section_separator_grammar = section_separator_grammar
+        self._encoding = encoding
+        self._cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._mmap = None
+        self._mapped_file_stat: Optional[Tuple[int, int]] = None
+
+        self.open()
+        self.size = len(self._mmap)
+
+        # a valid section index spares scanning and hashing the whole file
+        if section_index:
+            self._sections: Dict[str, Union[Tuple[int, int], str]] = {
+                section_separator: (content_start, content_end)
+                for section_separator, _, content_start, content_end, _ in section_index[
+                    "sections"
+                ]
+            }
+            self.section_byte_offsets: Optional[Dict[str, Tuple[int, int]]] = {
+                section_separator: (separator_start, content_start)
+                for section_separator, separator_start, content_start, _, _ in section_index[
+                    "sections"
+                ]
+            }
+            self.section_hashes: Dict[str, str] = {
+                section_separator: section_hash
+                for section_separator, _, _, _, section_hash in section_index["sections"]
+            }
+            return
+
+        try:
+            section_offsets = section_separator_grammar.parse_binary(
+                raw_data=self._mmap, encoding=encoding
+            )
+        except ValueError:
+            self.close()
+            raise
+
+        self._sections = {
+            section_separator.decode(encoding): (start, end)
+            for section_separator, start, end in section_offsets
+        }
+
+        self.section_byte_offsets = {
+            section_separator.decode(encoding): (
+                start - len(section_separator),
+                start,
+            )
+            for section_separator, start, _ in section_offsets
+        }
+        # duplicate section separators cannot be addressed by offsets and
+        # offsets within translated line endings do not match the decoded content
+        if (
+            len(self.section_byte_offsets) != len(section_offsets)
+            or self._mmap.find(b"\r") != -1
+        ):
+            self.section_byte_offsets = None
+
+        self.section_hashes = {
+            section_separator: get_content_hash(content=self._mmap[start:end])
+            for section_separator, (start, end) in self._sections.items()
+        }
+
+    def __getitem__(self, section_separator: str) -> str:
+        section = self._sections[section_separator]
+        if isinstance(section, str):
+            return section
+
+        if section_separator in self._cache:
+            self._cache.move_to_end(section_separator)
+            return self._cache[section_separator]
+
+        if not self._is_mapped_file_unchanged():
+            self._remap()
+            section = self._sections[section_separator]
+
+        start, end = section
+        section_content = _decode_text(data=self._mmap[start:end], encoding=self._encoding)
+
+        self._cache[section_separator] = section_content
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return section_content
+
+    def __setitem__(self, section_separator: str, section_content: str) -> None:
+        self._cache.pop(section_separator, None)
+        self._sections[section_separator] = section_content
+
+    def __delitem__(self, section_separator: str) -> None:
+        self._cache.pop(section_separator, None)
+        del self._sections[section_separator]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def open(self) -> None:
+        """
+        map the file, the section offsets stay valid as long as the file is unchanged
+        """
+        with open(file=self._file_path, mode="rb") as f:
+            file_stat = os.fstat(f.fileno())
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # empty files cannot be memory mapped
+            except ValueError:
+                raise ValueError("No section in file found")
+        self._mapped_file_stat = (file_stat.st_size, file_stat.st_mtime_ns)
+
+    def close(self) -> None:
+        self._cache.clear()
+        self._mmap.close()
+
+    def _is_mapped_file_unchanged(self) -> bool:
+        try:
+            file_stat = os.stat(self._file_path)
+        # the map of a removed file stays valid
+        except OSError:
+            return True
+        return (file_stat.st_size, file_stat.st_mtime_ns) == self._mapped_file_stat
+
+    def _remap(self) -> None:
+        """
+        map the changed file again and point the sections still backed by the file
+        to their offsets in it, only the values are replaced so that the mapping
+        can be remapped while it is iterated
+        """
+        self._mmap.close()
+        try:
+            self.open()
+            section_offsets = {
+                section_separator.decode(self._encoding): (start, end)
+                for section_separator, start, end in (
+                    self._section_separator_grammar.parse_binary(
+                        raw_data=self._mmap, encoding=self._encoding
+                    )
+                )
+            }
+        except (OSError, ValueError):
+            # an anonymous map stands in for the file that cannot be mapped
+            if self._mmap.closed:
+                self._mmap = mmap.mmap(-1, 1)
+                self._mapped_file_stat = None
+            section_offsets = dict()
+
+        for section_separator, section in self._sections.items():
+            if not isinstance(section, str):
+                self._sections[section_separator] = section_offsets.get(
+                    section_separator, (0, 0)
+                )
+
+    def get_loaded_items(self) -> Dict[str, str]:
+        """
+        returns the section contents held in memory, set or cached, without decoding
+        """
+        loaded_items = dict(self._cache)
+        loaded_items.update(
+            (section_separator, section)
+            for section_separator, section in self._sections.items()
+            if isinstance(section, str)
+        )
+        return loaded_items
+
+
+class SectionRegistry:
+    """
+    SectionRegistry keeps the section separators in sorted order together with
+    the section names extracted from them, it is updated incrementally as the sections
+    are added, renamed and removed instead of sorting and matching all separators again
+    """
+
+    def __init__(
+        self, section_separator_grammar: SectionSeparatorGrammar, section_separators=()
+    ):
+        self._section_separator_grammar = section_separator_grammar
+
+        self._section_separators_sorted: List[str] = []
+        self._section_name_by_separator: Dict[str, Optional[str]] = dict()
+        self._section_separator_by_name: Dict[str, str] = dict()
+
+        for section_separator in section_separators:
+            self._register_names(section_separator=section_separator)
+        self._section_separators_sorted = sorted(self._section_name_by_separator)
+
+    def _register_names(self, section_separator: str) -> None:
+        section_name = self._section_separator_grammar.extract_name(
+            section_separator=section_separator
+        )
+
+        self._section_name_by_separator[section_separator] = section_name
+        if section_name is not None:
+            self._section_separator_by_name[section_name] = section_separator
+
+    def __contains__(self, section_separator: str) -> bool:
+        return section_separator in self._section_name_by_separator
+
+    def __len__(self) -> int:
+        return len(self._section_separators_sorted)
+
+    @property
+    def section_separators_sorted(self) -> List[str]:
+        return list(self._section_separators_sorted)
+
+    def add(self, section_separator: str) -> None:
+        if section_separator in self._section_name_by_separator:
+            return
+
+        bisect.insort(self._section_separators_sorted, section_separator)
+        self._register_names(section_separator=section_separator)
+
+    def remove(self, section_separator: str) -> None:
+        if section_separator not in self._section_name_by_separator:
+            return
+
+        idx = bisect.bisect_left(self._section_separators_sorted, section_separator)
+        del self._section_separators_sorted[idx]
+
+        section_name = self._section_name_by_separator.pop(section_separator)
+        if self._section_separator_by_name.get(section_name) == section_separator:
+            del self._section_separator_by_name[section_name]
+
+    def get_section_name(self, section_separator: str) -> Optional[str]:
+        return self._section_name_by_separator.get(section_separator)
+
+    def get_section_separator(self, section_name: str) -> Optional[str]:
+        return self._section_separator_by_name.get(section_name)
 
 
 class File:
@@ -33,94 +359,1046 @@ class File:
 
         self.defaults = defaults
 
-        self._raw_data_content: str = self._get_validated_raw_data(
-            raw_data=self.get_raw_data_content()
+        self.section_separator_grammar = get_section_separator_grammar(
+            defaults=self.defaults
+        )
+
+        self._raw_data_content: Optional[str] = None
+        self._section_offsets: List[Tuple[str, int, int]] = []
+        self._data_by_sections: MutableMapping[str, str] = dict()
+        self._section_registry = self._get_section_registry()
+
+        # byte offsets of the (separator start, content start) of the sections as stored
+        # in the file since the last load or save, None when the file layout is unknown
+        self._synced_section_byte_offsets: Optional[Dict[str, Tuple[int, int]]] = None
+        self._synced_section_separators: List[str] = []
+        self._synced_file_size: int = 0
+        self._synced_file_mtime_ns: int = 0
+        # section separator -> count of leading characters unchanged since the last sync
+        self._dirty_sections: Dict[str, int] = dict()
+        # section separator -> hash of the section content since the last sync
+        self._section_hashes: Dict[str, str] = dict()
+        # section separator -> content of the section as of the last save or load
+        # kept for the sections edited or changed in the file by a reload
+        # until the next save
+        self._section_bases: Dict[str, str] = dict()
+        # separator of the section renamed in memory -> hash of its content as of
+        # the last save or load under its separator in the file, until the next save
+        self._renamed_section_hashes: Dict[str, str] = dict()
+        # size of the file journal replayed into the sections
+        self._journal_offset: int = 0
+        # section separator -> count of the patch records appended to the file journal
+        # since the last set record of the section
+        self._journal_patch_counts: Dict[str, int] = dict()
+        # compression of the file, None for a plain text file
+        self._compression: Optional[str] = None
+        # inverted index of the section words and trigrams, None when disabled
+        self._search_index: Optional[SearchIndex] = (
+            SearchIndex() if self.defaults.DEFAULT_FILE_SEARCH_INDEX_ENABLED else None
         )
+        # section separator -> case folded copy of the section searched case
+        # insensitively, built by the first such search after the section changed
+        self._section_case_folded_texts: Dict[str, CaseFoldedText] = dict()
 
-        self._data_by_sections: Dict[
-            str, str
-        ] = self._transform_raw_data_content_to_data_by_sections()
+        self._load_data_by_sections()
 
-    def _get_validated_raw_data(self, raw_data) -> str:
-        matches = re.findall(
-            self.defaults.DEFAULT_SECTION_FILE_SEPARATOR_REGEX, raw_data
+    def _get_section_registry(self) -> SectionRegistry:
+        return SectionRegistry(
+            section_separator_grammar=self.section_separator_grammar,
+            section_separators=self._data_by_sections,
         )
-        if not matches:
-            raise ValueError("No section in file found")
-        return raw_data
 
-    def reload(self):
+    def _get_section_offsets(self, raw_data: str) -> List[Tuple[str, int, int]]:
+        return self.section_separator_grammar.parse(raw_data=raw_data)
+
+    def _load_data_by_sections(self) -> None:
         """
-        reload data from file to variables
+        load the sections either eagerly from the raw data returned by the controller
+        or lazily from a memory map of the file when DEFAULT_FILE_MEMORY_MAPPED is set,
+        a valid section index spares parsing the file
         """
-        self._raw_data_content = self._get_validated_raw_data(
-            raw_data=self.get_raw_data_content()
+        if isinstance(self._data_by_sections, MemoryMappedSections):
+            self._data_by_sections.close()
+
+        # the journal size is taken before reading, records appended meanwhile
+        # get replayed again by the next reload which is harmless
+        self._journal_offset = get_journal_size(file_path=self._file_path)
+
+        self._compression = get_file_compression(file_path=self._file_path)
+        if self._compression:
+            self._load_compressed_data_by_sections()
+            return
+
+        section_index = (
+            read_section_index(file_path=self._file_path)
+            if self.defaults.DEFAULT_FILE_SECTION_INDEX_ENABLED
+            else None
         )
 
+        if self.defaults.DEFAULT_FILE_MEMORY_MAPPED:
+            self._data_by_sections = MemoryMappedSections(
+                file_path=self._file_path,
+                section_separator_grammar=self.section_separator_grammar,
+                encoding=self.defaults.DEFAULT_NOTES_FILE_ENCODING,
+                cache_size=self.defaults.DEFAULT_FILE_SECTION_CACHE_SIZE,
+                section_index=section_index,
+            )
+            self._section_registry = self._get_section_registry()
+            self._section_hashes = self._data_by_sections.section_hashes
+            if self.defaults.DEFAULT_FILE_JOURNAL_ENABLED:
+                records, _ = self._controller.read_file_journal_records(
+                    file_path=self._file_path
+                )
+                self._apply_journal_records(records=records)
+            self._set_synced_state(
+                section_byte_offsets=self._data_by_sections.section_byte_offsets,
+                file_size=self._data_by_sections.size,
+                section_hashes=self._section_hashes,
+                is_section_index_outdated=not section_index,
+            )
+            return
+
+        self._raw_data_content = self.get_raw_data_content()
+
+        if (
+            section_index
+            and self._raw_data_content.isascii()
+            and len(self._raw_data_content) == section_index["file_size"]
+        ):
+            # byte offsets are character offsets in ASCII data
+            self._section_offsets = [
+                (section_separator, content_start, content_end)
+                for section_separator, _, content_start, content_end, _ in section_index[
+                    "sections"
+                ]
+            ]
+            section_hashes = {
+                section_separator: section_hash
+                for section_separator, _, _, _, section_hash in section_index["sections"]
+            }
+        else:
+            self._section_offsets = self._get_section_offsets(
+                raw_data=self._raw_data_content
+            )
+            section_hashes = None
+
         self._data_by_sections = self._transform_raw_data_content_to_data_by_sections()
+        self._section_registry = self._get_section_registry()
+
+        if section_hashes is None:
+            section_hashes = {
+                section_separator: get_section_content_hash(
+                    section_content=section_content,
+                    encoding=self.defaults.DEFAULT_NOTES_FILE_ENCODING,
+                )
+                for section_separator, section_content in self._data_by_sections.items()
+            }
+
+        self._set_synced_state(
+            *self._get_section_byte_offsets(),
+            section_hashes=section_hashes,
+            is_section_index_outdated=not section_index,
+        )
+
+    def _load_compressed_data_by_sections(self) -> None:
+        """
+        parse the sections while the compressed file is decompressed,
+        byte offsets do not apply to compressed files so they are always saved whole
+        """
+        encoding = self.defaults.DEFAULT_NOTES_FILE_ENCODING
+
+        with open_text_reader(
+            file_path=self._file_path, encoding=encoding, compression=self._compression
+        ) as f:
+            self._data_by_sections = dict(
+                self.section_separator_grammar.parse_stream(
+                    stream=f, chunk_size=self.defaults.DEFAULT_FILE_STREAM_CHUNK_SIZE
+                )
+            )
+        self._raw_data_content = None
+        self._section_offsets = []
+        self._section_registry = self._get_section_registry()
+        self._section_hashes = {
+            section_separator: get_section_content_hash(
+                section_content=section_content, encoding=encoding
+            )
+            for section_separator, section_content in self._data_by_sections.items()
+        }
+
+        records, _ = self._controller.read_file_journal_records(
+            file_path=self._file_path
+        )
+        self._apply_journal_records(records=records)
+
+        self._set_synced_state(
+            section_byte_offsets=None,
+            file_size=0,
+            section_hashes=self._section_hashes,
+        )
+
+    def _apply_journal_records(self, records: List[Dict]) -> bool:
+        """
+        returns False when a patch record did not apply to its base
+        """
+        is_applied = apply_journal_records(
+            data_by_sections=self._data_by_sections, records=records
+        )
+
+        # the sections patched many times are hashed once
+        for section_separator in dict.fromkeys(
+            record["section_separator"] for record in records
+        ):
+            if section_separator in self._data_by_sections:
+                self._section_registry.add(section_separator=section_separator)
+                self._section_hashes[section_separator] = get_section_content_hash(
+                    section_content=self._data_by_sections[section_separator],
+                    encoding=self.defaults.DEFAULT_NOTES_FILE_ENCODING,
+                )
+            else:
+                self._section_registry.remove(section_separator=section_separator)
+                self._section_hashes.pop(section_separator, None)
+
+        return is_applied
+
+    def _get_section_byte_offsets(
+        self,
+    ) -> Tuple[Optional[Dict[str, Tuple[int, int]]], int]:
+        """
+        translate the character offset table of the raw data to byte offsets
+        """
+        encoding = self.defaults.DEFAULT_NOTES_FILE_ENCODING
+        raw_data_content = self._raw_data_content
+
+        section_byte_offsets = dict()
+        byte_position = char_position = 0
+        for section_separator, start, _ in self._section_offsets:
+            separator_start = start - len(section_separator)
+            byte_position += _get_encoded_length(
+                text=raw_data_content[char_position:separator_start], encoding=encoding
+            )
+            content_start = byte_position + _get_encoded_length(
+                text=section_separator, encoding=encoding
+            )
+            section_byte_offsets[section_separator] = (byte_position, content_start)
+            byte_position, char_position = content_start, start
+
+        byte_position += _get_encoded_length(
+            text=raw_data_content[char_position:], encoding=encoding
+        )
+
+        # duplicate section separators cannot be addressed by offsets
+        if len(section_byte_offsets) != len(self._section_offsets):
+            return None, byte_position
+        return section_byte_offsets, byte_position
+
+    def _set_synced_state(
+        self,
+        section_byte_offsets: Optional[Dict[str, Tuple[int, int]]],
+        file_size: int,
+        section_hashes: Dict[str, str],
+        is_section_index_outdated: bool = True,
+    ) -> None:
+        """
+        remember the file layout, offsets are only trusted when the file size matches
+        what was parsed, line ending translation for example makes them differ,
+        offsets never apply to compressed files
+        """
+        file_stat = os.stat(self._file_path)
+        self._synced_file_size = file_stat.st_size
+        self._synced_file_mtime_ns = file_stat.st_mtime_ns
+        self._synced_section_byte_offsets = (
+            section_byte_offsets
+            if file_stat.st_size == file_size and not self._compression
+            else None
+        )
+        self._synced_section_separators = list(self._data_by_sections)
+        self._section_hashes = section_hashes
+        self._dirty_sections = dict()
+
+        if (
+            is_section_index_outdated
+            and self.defaults.DEFAULT_FILE_SECTION_INDEX_ENABLED
+            and not self.defaults.DEFAULT_FILE_JOURNAL_ENABLED
+            and self._synced_section_byte_offsets is not None
+        ):
+            write_section_index(
+                file_path=self._file_path,
+                sections=_get_section_index_entries(
+                    section_byte_offsets=self._synced_section_byte_offsets,
+                    file_size=self._synced_file_size,
+                    section_hashes=self._section_hashes,
+                ),
+            )
+
+    def _is_file_unchanged(self) -> bool:
+        try:
+            file_stat = os.stat(self._file_path)
+        except OSError:
+            return False
+        return (
+            file_stat.st_size == self._synced_file_size
+            and file_stat.st_mtime_ns == self._synced_file_mtime_ns
+        )
+
+    def _is_synced_state_valid(self) -> bool:
+        return self._synced_section_byte_offsets is not None and self._is_file_unchanged()
+
+    def _is_unsaved_change(self) -> bool:
+        return bool(self._dirty_sections) or (
+            len(self._data_by_sections) != len(self._synced_section_separators)
+            or any(
+                section_separator != synced_section_separator
+                for section_separator, synced_section_separator in zip(
+                    self._data_by_sections, self._synced_section_separators
+                )
+            )
+        )
+
+    def _get_changed_section_separators(
+        self, previous_section_hashes: Dict[str, str]
+    ) -> Set[str]:
+        section_hashes = self._section_hashes
+        section_separators = previous_section_hashes.keys() | section_hashes.keys()
+        return {
+            section_separator
+            for section_separator in section_separators
+            if previous_section_hashes.get(section_separator)
+            != section_hashes.get(section_separator)
+        }
+
+    def _get_synced_section_contents(self) -> Dict[str, str]:
+        """
+        returns the section contents held in memory unchanged since the last sync
+        """
+        section_contents = (
+            self._data_by_sections.get_loaded_items()
+            if isinstance(self._data_by_sections, MemoryMappedSections)
+            else dict(self._data_by_sections)
+        )
+        # edited sections differ from the file content since the last sync
+        for section_separator in self._dirty_sections:
+            section_contents.pop(section_separator, None)
+        return section_contents
+
+    def _set_section_bases(
+        self,
+        changed_section_separators: Set[str],
+        previous_section_contents: Dict[str, str],
+        previous_section_hashes: Dict[str, str],
+    ) -> None:
+        """
+        keep the previous content of the changed sections as their base,
+        a content not matching the previous hash is not the synced content
+        """
+        for section_separator in changed_section_separators:
+            if (
+                section_separator in self._section_bases
+                or section_separator not in previous_section_contents
+            ):
+                continue
+
+            section_content = previous_section_contents[section_separator]
+            if previous_section_hashes.get(
+                section_separator
+            ) == get_section_content_hash(
+                section_content=section_content,
+                encoding=self.defaults.DEFAULT_NOTES_FILE_ENCODING,
+            ):
+                self._section_bases[section_separator] = section_content
+
+    def _reload_journal_tail(self) -> bool:
+        """
+        replay only the new file journal records when the file itself is unchanged,
+        returns False when the file has to be loaded again
+        """
+        if not (
+            self.defaults.DEFAULT_FILE_JOURNAL_ENABLED
+            and self._is_file_unchanged()
+            and not self._is_unsaved_change()
+            and get_journal_size(file_path=self._file_path) >= self._journal_offset
+        ):
+            return False
+
+        records, journal_offset = self._controller.read_file_journal_records(
+            file_path=self._file_path, offset=self._journal_offset
+        )
+        # the journal is compacted into the file before it gets truncated
+        # so an unchanged file means the records are the journal tail
+        if not self._is_file_unchanged():
+            return False
+
+        # the sections patched from other bases are loaded again from the whole journal
+        # so that all the instances replay the same patches
+        if not self._apply_journal_records(records=records):
+            return False
+
+        self._journal_offset = journal_offset
+        self._synced_section_separators = list(self._data_by_sections)
+        return True
+
+    def _get_local_section_changes(
+        self, previous_section_hashes: Dict[str, str]
+    ) -> Tuple[Dict[str, str], Set[str]]:
+        """
+        returns the contents of the sections edited or added in memory
+        since the last sync and the separators of the sections deleted in memory since
+        """
+        section_separators = list(self._data_by_sections)
+        local_section_contents = {
+            section_separator: self.get_section_content(
+                section_separator=section_separator
+            )
+            for section_separator in section_separators
+            if section_separator in self._dirty_sections
+            or section_separator not in previous_section_hashes
+        }
+        deleted_section_separators = previous_section_hashes.keys() - set(
+            section_separators
+        )
+        return local_section_contents, deleted_section_separators
+
+    def _merge_local_section_changes(
+        self,
+        changed_section_separators: Set[str],
+        previous_section_hashes: Dict[str, str],
+        local_section_contents: Dict[str, str],
+        deleted_section_separators: Set[str],
+    ) -> None:
+        """
+        apply the in memory changes of the sections on top of the reloaded file,
+        the sections changed on both sides are merged, a section deleted in the file
+        is restored with its edits, or the edits are moved to the renamed section
+        when it was renamed in the file without changing its content,
+        a section renamed in memory but changed in the file under its previous
+        separator, matched by the hash of its content as of the last sync,
+        is merged into the renamed section and added to the changed sections,
+        a section deleted in memory but changed in the file is kept
+        """
+        # content hash -> separator of the sections deleted or renamed in memory
+        # but changed in the file
+        changed_deleted_section_separators_by_hash = {
+            previous_section_hashes[section_separator]: section_separator
+            for section_separator in deleted_section_separators
+            if section_separator in changed_section_separators
+            and section_separator in self._data_by_sections
+        }
+        # content hash -> separator of the sections added in the file
+        added_section_separators_by_hash = {
+            self._section_hashes[section_separator]: section_separator
+            for section_separator in changed_section_separators
+            if section_separator not in previous_section_hashes
+            and section_separator in self._section_hashes
+            and section_separator not in local_section_contents
+        }
+        section_versions = dict()
+
+        for section_separator, local_section_content in local_section_contents.items():
+            previous_section_separator = changed_deleted_section_separators_by_hash.pop(
+                self._renamed_section_hashes.get(section_separator), None
+            )
+            if (
+                previous_section_separator is not None
+                and section_separator not in self._data_by_sections
+            ):
+                section_base = self._section_bases.get(section_separator)
+                self.rename_section(
+                    old_section_separator=previous_section_separator,
+                    new_section_separator=section_separator,
+                )
+                changed_section_separators.add(section_separator)
+                section_versions[section_separator] = (
+                    section_base,
+                    local_section_content,
+                    self._data_by_sections[section_separator],
+                )
+                continue
+
+            if section_separator not in changed_section_separators:
+                self.set_section_content(
+                    section_separator=section_separator,
+                    section_content=local_section_content,
+                )
+                continue
+
+            if section_separator in self._data_by_sections:
+                section_versions[section_separator] = (
+                    self._section_bases.get(section_separator),
+                    local_section_content,
+                    self._data_by_sections[section_separator],
+                )
+                continue
+
+            renamed_section_separator = added_section_separators_by_hash.pop(
+                previous_section_hashes.get(section_separator), None
+            )
+            self._section_bases.pop(section_separator, None)
+            if renamed_section_separator is None:
+                self.set_section_content(
+                    section_separator=section_separator,
+                    section_content=local_section_content,
+                )
+                continue
+
+            self._section_bases[renamed_section_separator] = self._data_by_sections[
+                renamed_section_separator
+            ]
+            self.set_section_content(
+                section_separator=renamed_section_separator,
+                section_content=local_section_content,
+            )
+
+        for section_separator in deleted_section_separators:
+            if (
+                section_separator not in changed_section_separators
+                and section_separator in self._data_by_sections
+            ):
+                self.delete_section_content(section_separator=section_separator)
+
+        merged_section_contents = merge_sections(
+            section_versions=section_versions,
+            engine=self.defaults.DEFAULT_DIFF_ENGINE,
+            processes=self.defaults.DEFAULT_FILE_MERGE_PROCESSES,
+        )
+        for section_separator, section_content in merged_section_contents.items():
+            # the file content is the base of the merged section from now on
+            self._section_bases[section_separator] = self._data_by_sections[
+                section_separator
+            ]
+            self.set_section_content(
+                section_separator=section_separator, section_content=section_content
+            )
+            # a section added on both sides has no common base to merge against
+            if section_versions[section_separator][0] is None:
+                self._section_bases.pop(section_separator)
+
+    def reload(self) -> Set[str]:
+        """
+        reload data from file to variables, returns the separators of the sections
+        added, removed or changed in the file since the last sync by their content hash,
+        when only the file journal grew only its new records are replayed,
+        the previous content of the changed sections is kept as their base,
+        the sections edited, added or deleted in memory are merged
+        into the reloaded ones
+        """
+        previous_section_hashes = dict(self._section_hashes)
+        previous_section_contents = self._get_synced_section_contents()
+        local_section_contents, deleted_section_separators = (
+            self._get_local_section_changes(
+                previous_section_hashes=previous_section_hashes
+            )
+        )
+
+        if not self._reload_journal_tail():
+            self._load_data_by_sections()
+
+        changed_section_separators = self._get_changed_section_separators(
+            previous_section_hashes=previous_section_hashes
+        )
+        self._set_section_bases(
+            changed_section_separators=changed_section_separators,
+            previous_section_contents=previous_section_contents,
+            previous_section_hashes=previous_section_hashes,
+        )
+        for section_separator in changed_section_separators:
+            if section_separator in self._data_by_sections:
+                self._invalidate_section_search(section_separator=section_separator)
+            else:
+                self._remove_section_search(section_separator=section_separator)
+        self._merge_local_section_changes(
+            changed_section_separators=changed_section_separators,
+            previous_section_hashes=previous_section_hashes,
+            local_section_contents=local_section_contents,
+            deleted_section_separators=deleted_section_separators,
+        )
+        return changed_section_separators
 
     def get_raw_data_content(self) -> str:
         return self._controller.read_file_data(file_path=self._file_path)
 
     @property
     def default_section_separator(self) -> str:
-        return [k for k in self._data_by_sections.keys()][0]
+        return next(iter(self._data_by_sections))
 
     @property
     def section_separators_sorted(self) -> List[str]:
-        return sorted([k for k in self._data_by_sections.keys()])
+        return self._section_registry.section_separators_sorted
+
+    def get_section_name(self, section_separator: str) -> Optional[str]:
+        return self._section_registry.get_section_name(
+            section_separator=section_separator
+        )
+
+    def get_section_separator(self, section_name: str) -> Optional[str]:
+        return self._section_registry.get_section_separator(section_name=section_name)
+
+    def is_section_name_used(self, section_name: str) -> bool:
+        return self.get_section_separator(section_name=section_name) is not None
+
+    def _set_edited_section_base(
+        self, section_separator: str, section_content: str
+    ) -> None:
+        # the edits of a section are made to its synced content
+        # when it is edited for the first time since the last sync
+        if (
+            section_separator in self._section_hashes
+            and section_separator not in self._dirty_sections
+        ):
+            self._section_bases[section_separator] = section_content
+
+    def _invalidate_section_search(self, section_separator: str) -> None:
+        self._section_case_folded_texts.pop(section_separator, None)
+        if self._search_index is not None:
+            self._search_index.invalidate_section(section_separator=section_separator)
+
+    def _remove_section_search(self, section_separator: str) -> None:
+        self._section_case_folded_texts.pop(section_separator, None)
+        if self._search_index is not None:
+            self._search_index.remove_section(section_separator=section_separator)
+
+    def _rename_section_search(
+        self, old_section_separator: str, new_section_separator: str
+    ) -> None:
+        self._section_case_folded_texts.pop(new_section_separator, None)
+        if old_section_separator in self._section_case_folded_texts:
+            self._section_case_folded_texts[
+                new_section_separator
+            ] = self._section_case_folded_texts.pop(old_section_separator)
+        if self._search_index is not None:
+            self._search_index.rename_section(
+                old_section_separator=old_section_separator,
+                new_section_separator=new_section_separator,
+            )
+
+    def _clear_section_search(self) -> None:
+        self._section_case_folded_texts = dict()
+        if self._search_index is not None:
+            self._search_index.clear()
 
     def set_section_content(self, section_separator: str, section_content: str) -> None:
+        previous_section_content = self._data_by_sections.get(section_separator)
+        if previous_section_content is not None:
+            self._set_edited_section_base(
+                section_separator=section_separator,
+                section_content=previous_section_content,
+            )
+        unchanged_char_count = (
+            len(previous_section_content)
+            if previous_section_content is not None
+            and section_content.startswith(previous_section_content)
+            else 0
+        )
+        self._dirty_sections[section_separator] = min(
+            self._dirty_sections.get(section_separator, unchanged_char_count),
+            unchanged_char_count,
+        )
+
         self._data_by_sections[section_separator] = section_content
+        self._section_registry.add(section_separator=section_separator)
+        self._invalidate_section_search(section_separator=section_separator)
+
+    def edit_section_content(
+        self,
+        section_separator: str,
+        position: int,
+        deleted_length: int,
+        inserted_text: str,
+    ) -> None:
+        """
+        apply an edit of the section content given as a delta, the section is
+        encoded for the file from the edit position instead of from the first
+        character which differs from its previous content,
+        the section string is spliced so an edit copies the whole section once,
+        the view passes its edits when saving where the content is hashed whole anyway
+        """
+        if not deleted_length and not inserted_text:
+            return
+
+        section_content = self._data_by_sections[section_separator]
+        if (
+            position < 0
+            or deleted_length < 0
+            or position + deleted_length > len(section_content)
+        ):
+            raise IndexError("Section edit position out of range")
+
+        self._set_edited_section_base(
+            section_separator=section_separator, section_content=section_content
+        )
+        self._data_by_sections[section_separator] = "".join(
+            (
+                section_content[:position],
+                inserted_text,
+                section_content[position + deleted_length :],
+            )
+        )
+
+        self._dirty_sections[section_separator] = min(
+            self._dirty_sections.get(section_separator, position), position
+        )
+        self._invalidate_section_search(section_separator=section_separator)
 
     def get_section_content(self, section_separator: str) -> str:
         return self._data_by_sections[section_separator]
 
+    def get_section_case_folded_text(self, section_separator: str) -> CaseFoldedText:
+        """
+        returns the case folded copy of the section content, it is built once
+        and reused by the case insensitive searches until the section changes
+        """
+        case_folded_text = self._section_case_folded_texts.get(section_separator)
+        if case_folded_text is None:
+            case_folded_text = CaseFoldedText(
+                self.get_section_content(section_separator=section_separator)
+            )
+            self._section_case_folded_texts[section_separator] = case_folded_text
+        return case_folded_text
+
+    def get_section_base(self, section_separator: str) -> Optional[str]:
+        """
+        returns the content the section had as of the last save or load
+        when it was edited or changed in the file by a reload since, None otherwise
+        """
+        return self._section_bases.get(section_separator)
+
     def delete_all_sections_content(self) -> None:
         self._data_by_sections = dict()
+        self._section_bases = dict()
+        self._renamed_section_hashes = dict()
+        self._section_registry = self._get_section_registry()
+        self._clear_section_search()
 
     def delete_section_content(self, section_separator: str) -> None:
         self._data_by_sections.pop(section_separator)
+        self._section_bases.pop(section_separator, None)
+        self._renamed_section_hashes.pop(section_separator, None)
+        self._section_registry.remove(section_separator=section_separator)
+        self._remove_section_search(section_separator=section_separator)
 
     def rename_section(
         self, old_section_separator: str, new_section_separator: str
     ) -> None:
-        self._data_by_sections[new_section_separator] = self._data_by_sections[
-            old_section_separator
-        ]
+        section_content = self._data_by_sections[old_section_separator]
+        self._data_by_sections[new_section_separator] = section_content
         del self._data_by_sections[old_section_separator]
+        if old_section_separator in self._section_bases:
+            self._section_bases[new_section_separator] = self._section_bases.pop(
+                old_section_separator
+            )
+        # the synced content is the base of the renamed section
+        # for merging the edits made in the file under its previous separator
+        elif (
+            old_section_separator in self._section_hashes
+            and old_section_separator not in self._dirty_sections
+        ):
+            self._section_bases[new_section_separator] = section_content
+        renamed_section_hash = self._renamed_section_hashes.pop(
+            old_section_separator, self._section_hashes.get(old_section_separator)
+        )
+        if renamed_section_hash is not None:
+            self._renamed_section_hashes[new_section_separator] = renamed_section_hash
 
-    def _transform_raw_data_content_to_data_by_sections(self) -> Dict[str, str]:
-        result = dict()
-        positions = []
-
-        matches = re.finditer(
-            self.defaults.DEFAULT_SECTION_FILE_SEPARATOR_REGEX, self._raw_data_content
-        )
-        matches_list = list(matches)
-        for idx, match in enumerate(matches_list):
-            _match_span = match.span()
-            if idx > 0:
-                positions.append((positions[len(positions) - 1][1], _match_span[0]))
-            positions.append(_match_span)
-            if idx + 1 == len(list(matches_list)):
-                positions.append((_match_span[1], len(self._raw_data_content)))
-
-        last_set_key = None
-        for idx, pos in enumerate(positions):
-            if idx % 2 == 0:
-                section_separator = self._raw_data_content[pos[0] : pos[1]]
-                result[section_separator] = last_set_key
-                last_set_key = section_separator
-            else:
-                result[last_set_key] = self._raw_data_content[pos[0] : pos[1]]
+        self._section_registry.remove(section_separator=old_section_separator)
+        self._section_registry.add(section_separator=new_section_separator)
+        self._rename_section_search(
+            old_section_separator=old_section_separator,
+            new_section_separator=new_section_separator,
+        )
 
-        return result
+    def get_search_candidate_section_separators(
+        self, pattern: str, full_words: bool, regex: bool = False
+    ) -> Optional[List[str]]:
+        """
+        returns the sorted separators of the sections which may contain the pattern
+        according to the search index, the outdated sections are indexed first,
+        None when the search index is disabled or can not narrow the search down
+        """
+        if self._search_index is None:
+            return None
+
+        section_separators = self.section_separators_sorted
+        self._search_index.update(
+            section_separators=section_separators,
+            get_section_content=lambda section_separator: self.get_section_content(
+                section_separator=section_separator
+            ),
+        )
+        candidate_section_separators = (
+            self._search_index.get_candidate_section_separators(
+                pattern=pattern, full_words=full_words, regex=regex
+            )
+        )
+        if candidate_section_separators is None:
+            return None
+        return [
+            section_separator
+            for section_separator in section_separators
+            if section_separator in candidate_section_separators
+        ]
+
+    def _transform_raw_data_content_to_data_by_sections(self) -> Dict[str, str]:
+        raw_data_content = self._raw_data_content
+        return {
+            section_separator: raw_data_content[start:end]
+            for section_separator, start, end in self._section_offsets
+        }
 
     def transform_data_by_sections_to_raw_data_content(self) -> str:
-        text_data = str()
-        for k, v in self._data_by_sections.items():
-            text_data += k
-            text_data += v
+        return "".join(
+            f"{section_separator}{section_content}"
+            for section_separator, section_content in self._data_by_sections.items()
+        )
+
+    def _get_first_changed_section(self) -> Tuple[int, int, int]:
+        """
+        compare the current sections with the file layout since the last sync,
+        returns the index of the first changed section, the count of its leading
+        characters that are unchanged and the byte offset the file is changed from
+        """
+        # the file journal records are folded into the file by rewriting it whole
+        if not self._is_synced_state_valid() or get_journal_size(
+            file_path=self._file_path
+        ):
+            return 0, 0, 0
+
+        synced_section_byte_offsets = self._synced_section_byte_offsets
+        synced_section_separators = self._synced_section_separators
+
+        for idx, section_separator in enumerate(self._data_by_sections):
+            if idx == len(synced_section_separators):
+                return idx, 0, self._synced_file_size
+
+            if section_separator != synced_section_separators[idx]:
+                return idx, 0, synced_section_byte_offsets[synced_section_separators[idx]][0]
+
+            if section_separator in self._dirty_sections:
+                separator_start, content_start = synced_section_byte_offsets[
+                    section_separator
+                ]
+                unchanged_char_count = self._dirty_sections[section_separator]
+                if not unchanged_char_count:
+                    return idx, 0, separator_start
+
+                unchanged_byte_count = _get_encoded_length(
+                    text=self._data_by_sections[section_separator][
+                        :unchanged_char_count
+                    ],
+                    encoding=self.defaults.DEFAULT_NOTES_FILE_ENCODING,
+                )
+                return idx, unchanged_char_count, content_start + unchanged_byte_count
+
+        # sections were removed from the end of the file
+        if len(self._data_by_sections) < len(synced_section_separators):
+            return (
+                len(self._data_by_sections),
+                0,
+                synced_section_byte_offsets[
+                    synced_section_separators[len(self._data_by_sections)]
+                ][0],
+            )
+
+        # nothing changed
+        return len(self._data_by_sections), 0, self._synced_file_size
+
+    def save(self) -> None:
+        """
+        save the sections to the file, only the sections starting from
+        the first changed one get joined and encoded, the bytes of the file before
+        are copied as they are into the temporary file replacing the file atomically,
+        so a save still costs a copy of the whole file on disk,
+        with the file journal enabled only the changed sections are written,
+        a memory mapped file gets re-mapped after saving
+        """
+
+        if self.defaults.DEFAULT_FILE_JOURNAL_ENABLED:
+            self._save_to_journal()
+            self._section_bases = dict()
+            self._renamed_section_hashes = dict()
+            return
+
+        encoding = self.defaults.DEFAULT_NOTES_FILE_ENCODING
+
+        first_changed_idx, unchanged_char_count, offset = self._get_first_changed_section()
+
+        changed_sections = [
+            (section_separator, self._data_by_sections[section_separator])
+            for section_separator in islice(
+                self._data_by_sections, first_changed_idx, None
+            )
+        ]
+        text_data = "".join(
+            section_content[unchanged_char_count:]
+            if not idx and unchanged_char_count
+            else f"{section_separator}{section_content}"
+            for idx, (section_separator, section_content) in enumerate(
+                changed_sections
+            )
+        )
+
+        is_memory_mapped = isinstance(self._data_by_sections, MemoryMappedSections)
+        if is_memory_mapped:
+            # the mapping has to be released before the file gets rewritten
+            self._data_by_sections.close()
+            try:
+                self._controller.save_file_data(data=text_data, offset=offset)
+            except Exception:
+                # a failed save leaves the file intact
+                self._data_by_sections.open()
+                raise
+        else:
+            self._controller.save_file_data(data=text_data, offset=offset)
+
+        section_byte_offsets = dict(
+            islice(
+                (self._synced_section_byte_offsets or dict()).items(),
+                first_changed_idx,
+            )
+        )
+        section_hashes = {
+            section_separator: self._section_hashes[section_separator]
+            for section_separator in section_byte_offsets
+        }
+        byte_position = offset
+        for idx, (section_separator, section_content) in enumerate(changed_sections):
+            section_hashes[section_separator] = get_section_content_hash(
+                section_content=section_content, encoding=encoding
+            )
+
+            if not idx and unchanged_char_count:
+                section_byte_offsets[
+                    section_separator
+                ] = self._synced_section_byte_offsets[section_separator]
+                byte_position += _get_encoded_length(
+                    text=section_content[unchanged_char_count:], encoding=encoding
+                )
+                continue
+
+            content_start = byte_position + _get_encoded_length(
+                text=section_separator, encoding=encoding
+            )
+            section_byte_offsets[section_separator] = (byte_position, content_start)
+            byte_position = content_start + _get_encoded_length(
+                text=section_content, encoding=encoding
+            )
+
+        if is_memory_mapped:
+            if os.path.getsize(self._file_path) != byte_position:
+                self._load_data_by_sections()
+                self._section_bases = dict()
+                self._renamed_section_hashes = dict()
+                self._clear_section_search()
+                return
+
+            # the written sections are known so the file does not need to be scanned again
+            self._data_by_sections = MemoryMappedSections(
+                file_path=self._file_path,
+                section_separator_grammar=self.section_separator_grammar,
+                encoding=encoding,
+                cache_size=self.defaults.DEFAULT_FILE_SECTION_CACHE_SIZE,
+                section_index={
+                    "sections": _get_section_index_entries(
+                        section_byte_offsets=section_byte_offsets,
+                        file_size=byte_position,
+                        section_hashes=section_hashes,
+                    )
+                },
+            )
+
+        self._set_synced_state(
+            section_byte_offsets=section_byte_offsets,
+            file_size=byte_position,
+            section_hashes=section_hashes,
+        )
+        # the saved sections are the base of the next merge
+        self._section_bases = dict()
+        self._renamed_section_hashes = dict()
+
+    def _get_section_journal_record(self, section_separator: str) -> Dict:
+        """
+        returns the patch record of a section edited since the last sync
+        from its synced content, a section added, without a known synced content,
+        patched DEFAULT_FILE_JOURNAL_SNAPSHOT_PATCH_COUNT times since its last
+        set record or with a patch about its size gets a set record as a snapshot
+        """
+        section_content = self._data_by_sections[section_separator]
+        section_base = self._section_bases.get(section_separator)
+        if (
+            section_base is None
+            or self._journal_patch_counts.get(section_separator, 0)
+            >= self.defaults.DEFAULT_FILE_JOURNAL_SNAPSHOT_PATCH_COUNT
+            or self._section_hashes.get(section_separator)
+            != get_section_content_hash(
+                section_content=section_base,
+                encoding=self.defaults.DEFAULT_NOTES_FILE_ENCODING,
+            )
+        ):
+            return get_set_section_record(
+                section_separator=section_separator, section_content=section_content
+            )
+
+        patch = get_text_patch(before=section_base, after=section_content)
+        if sum(len(inserted_text) for _, _, inserted_text in patch) * 2 > len(
+            section_content
+        ):
+            return get_set_section_record(
+                section_separator=section_separator, section_content=section_content
+            )
+
+        return get_patch_section_record(
+            section_separator=section_separator,
+            patch=patch,
+            base_hash=get_journal_content_hash(section_content=section_base),
+            section_hash=get_journal_content_hash(section_content=section_content),
+        )
+
+    def _save_to_journal(self) -> None:
+        """
+        append the sections changed since the last sync to the file journal,
+        the edited sections as patches of their synced content,
+        the records appended by another instance since the last replay
+        are replayed first with the local changes merged into them
+        so that the patches are made from the latest replayed section contents
+        """
+        if get_journal_size(file_path=self._file_path) != self._journal_offset:
+            self.reload()
+
+        records = [
+            get_delete_section_record(section_separator=section_separator)
+            for section_separator in set(self._synced_section_separators).difference(
+                self._data_by_sections
+            )
+        ]
+        synced_section_separators = set(self._synced_section_separators)
+        records.extend(
+            self._get_section_journal_record(section_separator=section_separator)
+            for section_separator in self._data_by_sections
+            if section_separator in self._dirty_sections
+            or section_separator not in synced_section_separators
+        )
+
+        journal_start, journal_end = self._controller.append_file_journal_records(
+            records=records
+        )
+        # the records appended by another instance right before these
+        # are replayed by the next reload
+        if journal_start == self._journal_offset:
+            self._journal_offset = journal_end
+
+        for record in records:
+            section_separator = record["section_separator"]
+            if record["operation"] == JOURNAL_RECORD_OPERATION_DELETE:
+                self._section_hashes.pop(section_separator, None)
+                self._journal_patch_counts.pop(section_separator, None)
+                continue
+
+            self._section_hashes[section_separator] = get_section_content_hash(
+                section_content=self._data_by_sections[section_separator],
+                encoding=self.defaults.DEFAULT_NOTES_FILE_ENCODING,
+            )
+            self._journal_patch_counts[section_separator] = (
+                self._journal_patch_counts.get(section_separator, 0) + 1
+                if record["operation"] == JOURNAL_RECORD_OPERATION_PATCH
+                else 0
+            )
 
-        return text_data
+        self._synced_section_separators = list(self._data_by_sections)
+        self._dirty_sections = dict()
@@ -0,0 +1,210 @@
+import json
+import os
+from typing import List, Dict, MutableMapping, Tuple
+
+from notes_app.diff import apply_text_patch, merge_three_way_strings
+from notes_app.section_index import get_section_content_hash
+
+JOURNAL_FILE_SUFFIX = ".journal"
+# the journal is written as utf-8 json lines whatever the encoding of the notes file
+JOURNAL_FILE_ENCODING = "utf-8"
+
+JOURNAL_RECORD_OPERATION_SET = "set"
+JOURNAL_RECORD_OPERATION_DELETE = "delete"
+JOURNAL_RECORD_OPERATION_PATCH = "patch"
+
+
+def get_journal_file_path(file_path: str) -> str:
+    return f"{file_path}{JOURNAL_FILE_SUFFIX}"
+
+
+def get_journal_size(file_path: str) -> int:
+    try:
+        return os.path.getsize(get_journal_file_path(file_path=file_path))
+    except OSError:
+        return 0
+
+
+def get_set_section_record(section_separator: str, section_content: str) -> Dict:
+    return {
+        "operation": JOURNAL_RECORD_OPERATION_SET,
+        "section_separator": section_separator,
+        "section_content": section_content,
+    }
+
+
+def get_delete_section_record(section_separator: str) -> Dict:
+    return {
+        "operation": JOURNAL_RECORD_OPERATION_DELETE,
+        "section_separator": section_separator,
+    }
+
+
+def get_journal_content_hash(section_content: str) -> str:
+    return get_section_content_hash(
+        section_content=section_content, encoding=JOURNAL_FILE_ENCODING
+    )
+
+
+def get_patch_section_record(
+    section_separator: str,
+    patch: List[Tuple[int, int, str]],
+    base_hash: str,
+    section_hash: str,
+) -> Dict:
+    """
+    the patch (diff.get_text_patch) applies to the section content with the base hash
+    and results in the section content with the section hash
+    """
+    return {
+        "operation": JOURNAL_RECORD_OPERATION_PATCH,
+        "section_separator": section_separator,
+        "patch": patch,
+        "base_hash": base_hash,
+        "section_hash": section_hash,
+    }
+
+
+def append_journal_records(file_path: str, records: List[Dict]) -> Tuple[int, int]:
+    """
+    append the records as json lines to the journal file next to the notes file,
+    returns the journal offsets the appended records start and end at
+    """
+    journal_data = "".join(f"{json.dumps(record)}\n" for record in records)
+
+    with open(get_journal_file_path(file_path=file_path), "ab") as f:
+        journal_start = f.seek(0, os.SEEK_END)
+        f.write(journal_data.encode(JOURNAL_FILE_ENCODING))
+        f.flush()
+        os.fsync(f.fileno())
+        return journal_start, f.tell()
+
+
+def read_journal_records(file_path: str, offset: int = 0) -> Tuple[List[Dict], int]:
+    """
+    read the records appended to the journal file after the offset,
+    returns the records and the offset after the last complete record,
+    an incomplete record at the end of the journal is left for the next read
+    """
+    try:
+        with open(get_journal_file_path(file_path=file_path), "rb") as f:
+            f.seek(offset)
+            journal_data = f.read()
+    except FileNotFoundError:
+        return [], 0
+
+    complete_journal_data_end = journal_data.rfind(b"\n") + 1
+    records = [
+        json.loads(line)
+        for line in journal_data[:complete_journal_data_end]
+        .decode(JOURNAL_FILE_ENCODING)
+        .splitlines()
+    ]
+    return records, offset + complete_journal_data_end
+
+
+def _get_replayed_records(records: List[Dict]) -> List[Dict]:
+    """
+    leave out the patch records of a section preceding its last set or delete record
+    which replaces the section whole, the set records written every few patches
+    as snapshots of the section keep the count of the replayed patches bounded,
+    the set and delete records are all kept as they determine the order of the sections
+    """
+    snapshot_idx_by_section = {
+        record["section_separator"]: idx
+        for idx, record in enumerate(records)
+        if record["operation"] != JOURNAL_RECORD_OPERATION_PATCH
+    }
+    return [
+        record
+        for idx, record in enumerate(records)
+        if record["operation"] != JOURNAL_RECORD_OPERATION_PATCH
+        or idx > snapshot_idx_by_section.get(record["section_separator"], -1)
+    ]
+
+
+def _apply_patch_record(
+    data_by_sections: MutableMapping[str, str],
+    record: Dict,
+    section_hashes: Dict[str, str],
+    section_versions: Dict[str, Dict[str, str]],
+) -> bool:
+    """
+    apply the patch record to the section content with the base hash of the record,
+    a section changed meanwhile, by a concurrent writer for example, gets the patch
+    merged in when its base content was replayed before, otherwise the patch
+    is left out, returns False when the patch did not apply to its base
+    """
+    section_separator = record["section_separator"]
+    section_content = data_by_sections.get(section_separator)
+    if section_content is None:
+        return False
+
+    section_hash = section_hashes.get(section_separator) or get_journal_content_hash(
+        section_content=section_content
+    )
+    versions = section_versions.setdefault(section_separator, dict())
+    versions[section_hash] = section_content
+    section_hashes[section_separator] = section_hash
+
+    # the patch was replayed before, over a compacted file for example
+    if section_hash == record["section_hash"]:
+        return True
+
+    base_content = versions.get(record["base_hash"])
+    if base_content is None:
+        return False
+
+    patched_section_content = apply_text_patch(
+        input_text=base_content, patch=record["patch"]
+    )
+    if section_hash == record["base_hash"]:
+        data_by_sections[section_separator] = patched_section_content
+        section_hashes[section_separator] = record["section_hash"]
+        return True
+
+    data_by_sections[section_separator] = merge_three_way_strings(
+        base=base_content, local=section_content, remote=patched_section_content
+    )
+    section_hashes.pop(section_separator)
+    return False
+
+
+def apply_journal_records(
+    data_by_sections: MutableMapping[str, str], records: List[Dict]
+) -> bool:
+    """
+    replay the records onto the sections, replaying a record more than once
+    results in the same sections so a journal can be replayed after a compaction,
+    returns False when a patch record did not apply to its base
+    so the sections depend on what was replayed before the records
+    """
+    is_applied = True
+    # section separator -> hash of the replayed section content
+    section_hashes: Dict[str, str] = dict()
+    # section separator -> hash -> the section contents replayed since its last snapshot
+    section_versions: Dict[str, Dict[str, str]] = dict()
+
+    for record in _get_replayed_records(records=records):
+        section_separator = record["section_separator"]
+
+        if record["operation"] == JOURNAL_RECORD_OPERATION_PATCH:
+            is_applied = (
+                _apply_patch_record(
+                    data_by_sections=data_by_sections,
+                    record=record,
+                    section_hashes=section_hashes,
+                    section_versions=section_versions,
+                )
+                and is_applied
+            )
+            continue
+
+        section_hashes.pop(section_separator, None)
+        section_versions.pop(section_separator, None)
+        if record["operation"] == JOURNAL_RECORD_OPERATION_SET:
+            data_by_sections[section_separator] = record["section_content"]
+        elif record["operation"] == JOURNAL_RECORD_OPERATION_DELETE:
+            data_by_sections.pop(section_separator, None)
+
+    return is_applied
@@ -1,5 +1,6 @@
 import os
 import sys
+from multiprocessing import freeze_support
 
 from kivy import Config
 from kivy.resources import resource_add_path
@@ -33,6 +34,8 @@ class NotesApp(MDApp):
         )
 
     def _on_request_close(self, *source, **args):
+        # the merge still running is not waited for, its fallback result is saved
+        self.controller.view.merge_worker.flush()
         if self.controller.view.is_unsaved_change:
             self.controller.view.save_current_section_to_file()
 
@@ -48,6 +51,10 @@ class NotesApp(MDApp):
 
 
 if __name__ == "__main__":
+    # the merge and search processes of the PyInstaller build start
+    # from this entry point,
+    # freeze_support runs their work instead of the app
+    freeze_support()
     if hasattr(sys, "_MEIPASS"):
         resource_add_path(os.path.join(sys._MEIPASS))
     NotesApp().run()
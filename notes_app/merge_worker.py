@@ -0,0 +1,166 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Optional, Tuple
+
+
+class MergeWorker:
+    """
+    MergeWorker runs merges in a background thread so that a slow merge
+    does not block the UI thread, a merge finished within the inline wait
+    is returned right away, otherwise its result is delivered through the schedule
+    callable (Clock.schedule_once) on the UI thread, a merge not finished
+    within the time budget is replaced by the result of its fallback
+    and the next merges run on a fresh worker thread instead of waiting for it,
+    only one merge is pending at a time
+    """
+
+    def __init__(
+        self,
+        schedule: Callable[[Callable, float], object],
+        time_budget: float,
+        inline_wait: float,
+    ):
+        self._schedule = schedule
+        self._time_budget = time_budget
+        self._inline_wait = inline_wait
+
+        self._executor = self._get_executor()
+        self._pending_merge: Optional[object] = None
+        # (future, fallback, on_result) of the pending merge
+        self._pending_delivery: Optional[Tuple[Future, Callable, Callable]] = None
+
+    @property
+    def is_pending(self) -> bool:
+        return self._pending_merge is not None
+
+    @staticmethod
+    def _get_executor() -> ThreadPoolExecutor:
+        # a single thread as the merges are pure python,
+        # more threads would not run them faster
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="merge_worker")
+
+    def _abandon(self, future: Future) -> None:
+        # a running merge can not be stopped, it finishes in the background
+        # on the current worker thread while the next merges run on a fresh one
+        if not future.cancel() and not future.done():
+            self._executor.shutdown(wait=False)
+            self._executor = self._get_executor()
+
+    def submit(
+        self,
+        merge: Callable[[], Any],
+        fallback: Callable[[], Any],
+        on_result: Callable[[Any], None],
+    ) -> None:
+        """
+        run the merge and call on_result with its result, the merged text or hunks,
+        or with the result of the fallback if the merge failed or ran out of time
+        """
+        future = self._executor.submit(merge)
+        try:
+            result = future.result(timeout=self._inline_wait)
+        except FutureTimeoutError:
+            pass
+        except Exception:
+            on_result(fallback())
+            return
+        else:
+            on_result(result)
+            return
+
+        pending_merge = object()
+        self._pending_merge = pending_merge
+        self._pending_delivery = (future, fallback, on_result)
+
+        # the done callback runs in the worker thread, the result is applied in the UI thread
+        future.add_done_callback(
+            lambda done_future: self._schedule(
+                lambda dt: self._deliver_result(
+                    pending_merge=pending_merge,
+                    future=done_future,
+                    fallback=fallback,
+                    on_result=on_result,
+                ),
+                0,
+            )
+        )
+        self._schedule(
+            lambda dt: self._deliver_fallback(
+                pending_merge=pending_merge,
+                future=future,
+                fallback=fallback,
+                on_result=on_result,
+            ),
+            max(self._time_budget - self._inline_wait, 0),
+        )
+
+    def cancel(self) -> None:
+        """
+        drop the pending merge, its result is not delivered
+        """
+        pending_delivery = self._pending_delivery
+        self._pending_merge = None
+        self._pending_delivery = None
+        if pending_delivery is not None:
+            self._abandon(future=pending_delivery[0])
+
+    def flush(self) -> None:
+        """
+        deliver the pending merge right away, its result when the merge is done,
+        otherwise the result of its fallback, for example when the app is closed
+        """
+        pending_merge = self._pending_merge
+        if pending_merge is None or self._pending_delivery is None:
+            return
+
+        future, fallback, on_result = self._pending_delivery
+        if future.done():
+            self._deliver_result(
+                pending_merge=pending_merge,
+                future=future,
+                fallback=fallback,
+                on_result=on_result,
+            )
+            return
+
+        self._deliver_fallback(
+            pending_merge=pending_merge,
+            future=future,
+            fallback=fallback,
+            on_result=on_result,
+        )
+
+    def _deliver_result(
+        self,
+        pending_merge: object,
+        future: Future,
+        fallback: Callable[[], Any],
+        on_result: Callable[[Any], None],
+    ) -> None:
+        # the merge ran out of time or was cancelled
+        if pending_merge is not self._pending_merge:
+            return
+
+        self._pending_merge = None
+        self._pending_delivery = None
+        if future.exception() is not None:
+            on_result(fallback())
+            return
+
+        on_result(future.result())
+
+    def _deliver_fallback(
+        self,
+        pending_merge: object,
+        future: Future,
+        fallback: Callable[[], Any],
+        on_result: Callable[[Any], None],
+    ) -> None:
+        # the merge result was already delivered or cancelled
+        if pending_merge is not self._pending_merge:
+            return
+
+        self._pending_merge = None
+        self._pending_delivery = None
+        self._abandon(future=future)
+        on_result(fallback())
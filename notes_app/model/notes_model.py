@@ -9,6 +9,8 @@ import json
 import time
 from os import linesep, path
 
+from notes_app.journal import get_journal_file_path
+
 GENERAL_DATE_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
@@ -28,8 +30,11 @@ def get_current_epoch() -> int:
 
 def get_file_updated_timestamp_as_epoch(file_path: str) -> int:
     """
-    get file updated timestamp as epoch
+    get file updated timestamp as epoch, appending to the file journal counts as a file update
     """
+    journal_file_path = get_journal_file_path(file_path=file_path)
+    if path.exists(journal_file_path):
+        return int(max(path.getmtime(file_path), path.getmtime(journal_file_path)))
     return int(path.getmtime(file_path))
 
 
@@ -126,14 +131,15 @@ class NotesModel:
         for o in self.observers:
             o.notify_model_is_changed()
 
-    def update(self) -> None:
+    def update(self, notify=True) -> None:
         """
         update file-path related file attributes and notify observers
         """
         self._file_size = path.getsize(self.file_path)
         self._last_updated_on = get_current_epoch()
 
-        self.notify_observers()
+        if notify:
+            self.notify_observers()
 
     def dump(self) -> None:
         """
@@ -1,6 +1,15 @@
 import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+from notes_app.case_fold import CaseFoldedText
+from notes_app.search_index import is_literal_pattern
 
 SEARCH_MINIMAL_CHAR_COUNT = 2
+# the sections searched in parallel are split into more batches than processes
+# so that the batches of unequal search times spread over the processes evenly
+SEARCH_BATCHES_PER_PROCESS = 4
+SEARCH_REGEX_ESCAPE_SEQUENCE_REGEX = re.compile(r"\\.|[^\\]+", re.DOTALL)
 
 SEARCH_LIST_ITEM_MATCHED_EXTRA_CHAR_COUNT = 30
 SEARCH_LIST_ITEM_SECTION_DISPLAY_VALUE = "section "
@@ -10,49 +19,263 @@ SEARCH_LIST_ITEM_MATCHED_HIGHLIGHT_COLOR = "ff0000"
 SEARCH_LIST_ITEM_MATCHED_HIGHLIGHT_STYLE = "b"
 
 
-def validate_search_input(input_string):
+def validate_search_input(input_string, regex_search=False):
     if (
         not input_string
         or len(input_string) < SEARCH_MINIMAL_CHAR_COUNT
         or input_string.isspace()
     ):
         return False
+    if regex_search:
+        try:
+            re.compile(input_string)
+        except re.error:
+            return False
     return True
 
 
-def _basic_search_function(pattern, text, case_sensitive_search):
-    if case_sensitive_search:
-        pass
-    else:
-        pattern = pattern.lower()
-        text = text.lower()
-    return [m.start() for m in re.finditer(pattern, text)]
+def _get_case_folded_search_function(case_folded_search_function):
+    """
+    the case insensitive search runs on the case folded text,
+    a section passed as CaseFoldedText reuses its cached case folded copy
+    instead of allocating a new one per query,
+    the found positions are mapped back to the positions in the text
+    """
+
+    def case_insensitive_search_function(text):
+        if not isinstance(text, CaseFoldedText):
+            text = CaseFoldedText(text)
+        return text.get_positions(case_folded_search_function(text.text))
+
+    return case_insensitive_search_function
+
+
+def _get_literal_search_function(pattern, case_sensitive_search):
+    """
+    the literal search finds the non-overlapping occurrences with str.find,
+    the same positions re.finditer returns for the escaped pattern
+    """
+    if not case_sensitive_search:
+        pattern = pattern.casefold()
+
+    def literal_search_function(text):
+        positions = []
+        position = text.find(pattern)
+        while position >= 0:
+            positions.append(position)
+            position = text.find(pattern, position + (len(pattern) or 1))
+        return positions
+
+    if not case_sensitive_search:
+        return _get_case_folded_search_function(literal_search_function)
+    return literal_search_function
+
+
+def _get_case_folded_regex_pattern(pattern):
+    # the escape sequences such as \W or \S change their meaning when case folded
+    return SEARCH_REGEX_ESCAPE_SEQUENCE_REGEX.sub(
+        lambda m: m.group() if m.group().startswith("\\") else m.group().casefold(),
+        pattern,
+    )
+
 
+def _get_regex_search_function(pattern, case_sensitive_search):
+    """
+    the regex is compiled once, a case insensitive regex is run on the case folded
+    text as re.IGNORECASE matching is several times slower
+    """
+    if not case_sensitive_search:
+        pattern = _get_case_folded_regex_pattern(pattern=pattern)
+    regex = re.compile(pattern)
 
-def _full_words_search_function(pattern, text, case_sensitive_search):
-    pattern = r"\b" + pattern + r"\b"
-    if case_sensitive_search:
-        regex = re.compile(pattern)
-    else:
-        regex = re.compile(pattern, re.IGNORECASE)
-    return [m.start() for m in regex.finditer(text)]
+    def regex_search_function(text):
+        return [m.start() for m in regex.finditer(text)]
 
+    if not case_sensitive_search:
+        return _get_case_folded_search_function(regex_search_function)
+    return regex_search_function
 
-def search_function(pattern, text, case_sensitive_search, full_words_search):
+
+def _get_full_words_search_function(pattern, case_sensitive_search, regex_search):
+    return _get_regex_search_function(
+        pattern=r"\b" + (pattern if regex_search else re.escape(pattern)) + r"\b",
+        case_sensitive_search=case_sensitive_search,
+    )
+
+
+def get_search_function(
+    pattern, case_sensitive_search, full_words_search, regex_search=False
+):
+    """
+    returns the function finding the pattern positions in a section text
+    or in its CaseFoldedText when the search is case insensitive,
+    the pattern is prepared once per query and reused for all the searched sections,
+    it is searched for as a literal string unless regex_search is set
+    """
     if full_words_search:
-        return _full_words_search_function(
-            pattern=pattern, text=text, case_sensitive_search=case_sensitive_search
+        return _get_full_words_search_function(
+            pattern=pattern,
+            case_sensitive_search=case_sensitive_search,
+            regex_search=regex_search,
         )
-    return _basic_search_function(
-        pattern=pattern, text=text, case_sensitive_search=case_sensitive_search
+    # a regex without special characters is found faster as a literal string
+    if regex_search and not is_literal_pattern(pattern=pattern):
+        return _get_regex_search_function(
+            pattern=pattern, case_sensitive_search=case_sensitive_search
+        )
+    return _get_literal_search_function(
+        pattern=pattern, case_sensitive_search=case_sensitive_search
+    )
+
+
+def _basic_search_function(pattern, text, case_sensitive_search, regex_search=False):
+    return get_search_function(
+        pattern=pattern,
+        case_sensitive_search=case_sensitive_search,
+        full_words_search=False,
+        regex_search=regex_search,
+    )(text)
+
+
+def _full_words_search_function(
+    pattern, text, case_sensitive_search, regex_search=False
+):
+    return get_search_function(
+        pattern=pattern,
+        case_sensitive_search=case_sensitive_search,
+        full_words_search=True,
+        regex_search=regex_search,
+    )(text)
+
+
+def search_function(
+    pattern, text, case_sensitive_search, full_words_search, regex_search=False
+):
+    return get_search_function(
+        pattern=pattern,
+        case_sensitive_search=case_sensitive_search,
+        full_words_search=full_words_search,
+        regex_search=regex_search,
+    )(text)
+
+
+def search_sections(
+    section_texts: List[Tuple[str, Union[str, CaseFoldedText]]],
+    pattern: str,
+    case_sensitive_search: bool,
+    full_words_search: bool,
+    regex_search: bool = False,
+) -> List[Tuple[str, List[int]]]:
+    """
+    returns the (section separator, pattern positions) of the sections with a match
+    in the order of the section texts, a module level function so that
+    a process pool can run it on a batch of the sections
+    """
+    section_search_function = get_search_function(
+        pattern=pattern,
+        case_sensitive_search=case_sensitive_search,
+        full_words_search=full_words_search,
+        regex_search=regex_search,
     )
 
+    found_occurrences = []
+    for section_separator, text in section_texts:
+        search_result = section_search_function(text)
+        if search_result:
+            found_occurrences.append((section_separator, search_result))
+    return found_occurrences
+
+
+def get_text_size(text: Union[str, CaseFoldedText]) -> int:
+    """
+    returns the size in bytes of the text sent to a search process,
+    a pure ASCII str is as long in bytes as in characters
+    """
+    if isinstance(text, CaseFoldedText):
+        text = text.text
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-8"))
+
+
+def get_section_text_batches(
+    section_texts: List[Tuple[str, Union[str, CaseFoldedText]]],
+    section_text_sizes: List[int],
+    batch_count: int,
+) -> List[List[Tuple[str, Union[str, CaseFoldedText]]]]:
+    """
+    splits the section texts in their order into at most batch_count batches
+    of about equal size in bytes, a section is never split between batches
+    """
+    total_size = sum(section_text_sizes)
+    batch_size = max(-(-total_size // max(batch_count, 1)), 1)
+
+    batches = []
+    batch: List[Tuple[str, Union[str, CaseFoldedText]]] = []
+    size = 0
+    for section_text, section_text_size in zip(section_texts, section_text_sizes):
+        batch.append(section_text)
+        size += section_text_size
+        if size >= batch_size:
+            batches.append(batch)
+            batch = []
+            size = 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _get_text_hash(text: Union[str, CaseFoldedText]) -> int:
+    # the hash of a str is computed once and cached by the str itself,
+    # a case folded text is hashed by the text it was folded from
+    return hash(text) if isinstance(text, str) else text.text_hash
+
+
+def _is_self_overlapping(pattern: str) -> bool:
+    """
+    returns True when a proper prefix of the pattern is also its suffix,
+    the occurrences of such a pattern may overlap so the non-overlapping positions
+    found by the search are not all the positions the pattern occurs at
+    """
+    return any(pattern[:i] == pattern[-i:] for i in range(1, len(pattern)))
+
+
+def _get_narrowed_positions(
+    pattern: str, text: Union[str, CaseFoldedText], previous_positions: List[int]
+) -> Optional[List[int]]:
+    """
+    returns the non-overlapping positions of the pattern among the positions
+    of the previous pattern it extends, None when the positions of a case folded
+    text do not map one to one and the text has to be searched again
+    """
+    if isinstance(text, CaseFoldedText):
+        if text.has_expanded_chars:
+            return None
+        pattern = pattern.casefold()
+        text = text.text
+
+    positions = []
+    end = 0
+    for position in previous_positions:
+        if position >= end and text.startswith(pattern, position):
+            positions.append(position)
+            end = position + len(pattern)
+    return positions
+
 
 class Search:
     def __init__(self, defaults):
         self._search_case_sensitive = defaults.DEFAULT_VALUE_SEARCH_CASE_SENSITIVE
         self._search_all_sections = defaults.DEFAULT_VALUE_SEARCH_ALL_SECTIONS
         self._search_full_words = defaults.DEFAULT_VALUE_SEARCH_FULL_WORDS
+        self._search_regex = defaults.DEFAULT_VALUE_SEARCH_REGEX
+
+        # (pattern, search options, section hashes) -> found occurrences
+        # of the recent queries, the least recently used query is dropped first
+        self._recent_query_count = defaults.DEFAULT_SEARCH_RECENT_QUERY_COUNT
+        self._recent_occurrences: OrderedDict = OrderedDict()
+        # (pattern, search options, section hashes, found occurrences) of the last query
+        self._last_search: Optional[Tuple] = None
 
     @property
     def search_case_sensitive(self):
@@ -78,27 +301,188 @@ class Search:
     def search_full_words(self, value):
         self._search_full_words = value
 
-    def search_for_occurrences(self, pattern, file, current_section_identifier):
-        found_occurrences = dict()
-
+    @property
+    def search_regex(self):
+        return self._search_regex
+
+    @search_regex.setter
+    def search_regex(self, value):
+        self._search_regex = value
+
+    def get_section_texts(
+        self, pattern, file, current_section_identifier
+    ) -> List[Tuple[str, Union[str, CaseFoldedText]]]:
+        """
+        returns the (section separator, text) of the sections to search in,
+        the text is the cached CaseFoldedText when the search is case insensitive
+        """
         if self.search_all_sections:
-            sections_separators_to_search_in = file.section_separators_sorted
+            # the search index narrows the search down to the candidate sections
+            sections_separators_to_search_in = (
+                file.get_search_candidate_section_separators(
+                    pattern=pattern,
+                    full_words=self.search_full_words,
+                    regex=self.search_regex,
+                )
+            )
+            if sections_separators_to_search_in is None:
+                sections_separators_to_search_in = file.section_separators_sorted
         else:
             sections_separators_to_search_in = [current_section_identifier]
 
-        for section_separator in sections_separators_to_search_in:
-            text = file.get_section_content(section_separator=section_separator)
+        if self.search_case_sensitive:
+            return [
+                (
+                    section_separator,
+                    file.get_section_content(section_separator=section_separator),
+                )
+                for section_separator in sections_separators_to_search_in
+            ]
+        return [
+            (
+                section_separator,
+                file.get_section_case_folded_text(section_separator=section_separator),
+            )
+            for section_separator in sections_separators_to_search_in
+        ]
+
+    def search_section_texts(self, pattern, section_texts):
+        return search_sections(
+            section_texts=section_texts,
+            pattern=pattern,
+            case_sensitive_search=self.search_case_sensitive,
+            full_words_search=self.search_full_words,
+            regex_search=self.search_regex,
+        )
+
+    def _get_search_options(self) -> Tuple[bool, bool, bool, bool]:
+        return (
+            self.search_case_sensitive,
+            self.search_all_sections,
+            self.search_full_words,
+            self.search_regex,
+        )
+
+    def _get_previous_pattern_extended(
+        self, pattern, search_options
+    ) -> Optional[Tuple[str, Dict[str, int], Dict[str, List[int]]]]:
+        """
+        returns the (pattern, section hashes, found occurrences) of the last query
+        when the pattern extends its literal pattern, None otherwise
+        """
+        if self._last_search is None or self.search_full_words or self.search_regex:
+            return None
+
+        previous_pattern, previous_search_options, section_hashes, found_occurrences = (
+            self._last_search
+        )
+        if previous_search_options != search_options:
+            return None
+        if not self.search_case_sensitive:
+            pattern = pattern.casefold()
+            previous_pattern = previous_pattern.casefold()
+        if len(pattern) <= len(previous_pattern) or not pattern.startswith(
+            previous_pattern
+        ):
+            return None
+        return previous_pattern, section_hashes, found_occurrences
+
+    def _search_section_texts_narrowed(
+        self, pattern, section_texts, section_hashes, search_options
+    ) -> Dict[str, List[int]]:
+        """
+        when the pattern extends the previous pattern, the sections unchanged since
+        without a match of the previous pattern are skipped and only the previous
+        positions are checked again in the others, the sections changed since
+        are searched again
+        """
+        previous_search = self._get_previous_pattern_extended(
+            pattern=pattern, search_options=search_options
+        )
+        if previous_search is None:
+            return dict(
+                self.search_section_texts(pattern=pattern, section_texts=section_texts)
+            )
+
+        previous_pattern, previous_section_hashes, previous_found_occurrences = (
+            previous_search
+        )
+        is_narrowed_by_positions = not _is_self_overlapping(pattern=previous_pattern)
 
-            search_result = search_function(
+        found_occurrences = dict()
+        section_texts_to_search_in = []
+        for section_separator, text in section_texts:
+            if (
+                previous_section_hashes.get(section_separator)
+                != section_hashes[section_separator]
+            ):
+                section_texts_to_search_in.append((section_separator, text))
+                continue
+
+            previous_positions = previous_found_occurrences.get(section_separator)
+            if not previous_positions:
+                continue
+
+            positions = (
+                _get_narrowed_positions(
+                    pattern=pattern,
+                    text=text,
+                    previous_positions=previous_positions,
+                )
+                if is_narrowed_by_positions
+                else None
+            )
+            if positions is None:
+                section_texts_to_search_in.append((section_separator, text))
+            elif positions:
+                found_occurrences[section_separator] = positions
+
+        found_occurrences.update(
+            self.search_section_texts(
+                pattern=pattern, section_texts=section_texts_to_search_in
+            )
+        )
+        # the found occurrences keep the order of the sections
+        return {
+            section_separator: found_occurrences[section_separator]
+            for section_separator, _ in section_texts
+            if section_separator in found_occurrences
+        }
+
+    def search_for_occurrences(self, pattern, file, current_section_identifier):
+        """
+        the found occurrences of the recent queries are reused while the searched
+        sections are unchanged, a query extending the previous one is narrowed down
+        to the previous matches so that searching as the user types stays interactive
+        """
+        section_texts = self.get_section_texts(
+            pattern=pattern,
+            file=file,
+            current_section_identifier=current_section_identifier,
+        )
+        search_options = self._get_search_options()
+        section_hashes = {
+            section_separator: _get_text_hash(text=text)
+            for section_separator, text in section_texts
+        }
+
+        query = (pattern, search_options, tuple(section_hashes.items()))
+        found_occurrences = self._recent_occurrences.get(query)
+        if found_occurrences is None:
+            found_occurrences = self._search_section_texts_narrowed(
                 pattern=pattern,
-                text=text,
-                case_sensitive_search=self.search_case_sensitive,
-                full_words_search=self.search_full_words,
+                section_texts=section_texts,
+                section_hashes=section_hashes,
+                search_options=search_options,
             )
-            if search_result:
-                found_occurrences[section_separator] = search_result
+            self._recent_occurrences[query] = found_occurrences
+            if len(self._recent_occurrences) > self._recent_query_count:
+                self._recent_occurrences.popitem(last=False)
+        else:
+            self._recent_occurrences.move_to_end(query)
 
-        return found_occurrences
+        self._last_search = (pattern, search_options, section_hashes, found_occurrences)
+        return dict(found_occurrences)
 
 
 def transform_position_text_placeholder_to_position(
@@ -0,0 +1,165 @@
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+SEARCH_INDEX_TRIGRAM_LENGTH = 3
+SEARCH_INDEX_WORD_REGEX = re.compile(r"\w+")
+# the patterns with these characters are regular expressions the index can not filter
+SEARCH_INDEX_REGEX_SPECIAL_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+
+def is_literal_pattern(pattern: str) -> bool:
+    return not SEARCH_INDEX_REGEX_SPECIAL_CHARS.intersection(pattern)
+
+
+def get_trigrams(text: str) -> Set[str]:
+    return {
+        text[i : i + SEARCH_INDEX_TRIGRAM_LENGTH]
+        for i in range(len(text) - SEARCH_INDEX_TRIGRAM_LENGTH + 1)
+    }
+
+
+def get_words(text: str) -> Set[str]:
+    return set(SEARCH_INDEX_WORD_REGEX.findall(text))
+
+
+class SearchIndex:
+    """
+    SearchIndex is an inverted index of the case folded words and trigrams
+    of the sections, it narrows a search down to the candidate sections
+    which contain all the words or trigrams of the pattern,
+    the changed sections are only marked as outdated and indexed again
+    by the next query so that typing into a section does not index it on each edit
+    """
+
+    def __init__(self):
+        # section separator -> indexed trigrams and words of the section
+        self._section_trigrams: Dict[str, Set[str]] = dict()
+        self._section_words: Dict[str, Set[str]] = dict()
+        # trigram or word -> separators of the sections containing it
+        self._trigram_section_separators: Dict[str, Set[str]] = dict()
+        self._word_section_separators: Dict[str, Set[str]] = dict()
+        self._outdated_section_separators: Set[str] = set()
+
+    @property
+    def outdated_section_separators(self) -> Set[str]:
+        return self._outdated_section_separators
+
+    def _remove_postings(self, section_separator: str) -> None:
+        for section_keys, key_section_separators in (
+            (self._section_trigrams, self._trigram_section_separators),
+            (self._section_words, self._word_section_separators),
+        ):
+            for key in section_keys.pop(section_separator, ()):
+                section_separators = key_section_separators[key]
+                section_separators.discard(section_separator)
+                if not section_separators:
+                    del key_section_separators[key]
+
+    def _add_postings(self, section_separator: str, section_content: str) -> None:
+        section_content = section_content.casefold()
+        for section_keys, key_section_separators, keys in (
+            (
+                self._section_trigrams,
+                self._trigram_section_separators,
+                get_trigrams(text=section_content),
+            ),
+            (
+                self._section_words,
+                self._word_section_separators,
+                get_words(text=section_content),
+            ),
+        ):
+            section_keys[section_separator] = keys
+            for key in keys:
+                key_section_separators.setdefault(key, set()).add(section_separator)
+
+    def invalidate_section(self, section_separator: str) -> None:
+        self._outdated_section_separators.add(section_separator)
+
+    def remove_section(self, section_separator: str) -> None:
+        self._outdated_section_separators.discard(section_separator)
+        self._remove_postings(section_separator=section_separator)
+
+    def rename_section(
+        self, old_section_separator: str, new_section_separator: str
+    ) -> None:
+        """
+        the postings of the renamed section are moved without indexing its content
+        """
+        self.remove_section(section_separator=new_section_separator)
+        if old_section_separator in self._outdated_section_separators:
+            self._outdated_section_separators.remove(old_section_separator)
+            self._outdated_section_separators.add(new_section_separator)
+
+        for section_keys, key_section_separators in (
+            (self._section_trigrams, self._trigram_section_separators),
+            (self._section_words, self._word_section_separators),
+        ):
+            keys = section_keys.pop(old_section_separator, None)
+            if keys is None:
+                continue
+            section_keys[new_section_separator] = keys
+            for key in keys:
+                section_separators = key_section_separators[key]
+                section_separators.discard(old_section_separator)
+                section_separators.add(new_section_separator)
+
+    def clear(self) -> None:
+        self._section_trigrams = dict()
+        self._section_words = dict()
+        self._trigram_section_separators = dict()
+        self._word_section_separators = dict()
+        self._outdated_section_separators = set()
+
+    def update(
+        self,
+        section_separators: Iterable[str],
+        get_section_content: Callable[[str], str],
+    ) -> None:
+        """
+        index the sections not indexed yet and the outdated ones
+        """
+        for section_separator in section_separators:
+            if (
+                section_separator in self._section_trigrams
+                and section_separator not in self._outdated_section_separators
+            ):
+                continue
+            self._remove_postings(section_separator=section_separator)
+            self._add_postings(
+                section_separator=section_separator,
+                section_content=get_section_content(section_separator),
+            )
+            self._outdated_section_separators.discard(section_separator)
+
+    def get_candidate_section_separators(
+        self, pattern: str, full_words: bool, regex: bool = False
+    ) -> Optional[Set[str]]:
+        """
+        returns the separators of the indexed sections which may contain the pattern,
+        None when the regex pattern is not a literal string
+        or when the pattern is too short to be looked up,
+        the candidates are a superset of the sections with a match,
+        the search verifies them against the section text
+        """
+        if regex and not is_literal_pattern(pattern=pattern):
+            return None
+
+        pattern = pattern.casefold()
+        if full_words:
+            keys: List[str] = list(get_words(text=pattern))
+            key_section_separators = self._word_section_separators
+        else:
+            keys = list(get_trigrams(text=pattern))
+            key_section_separators = self._trigram_section_separators
+        if not keys:
+            return None
+
+        # the rarest keys are intersected first
+        keys.sort(key=lambda key: len(key_section_separators.get(key, ())))
+        candidate_section_separators = set(key_section_separators.get(keys[0], ()))
+        for key in keys[1:]:
+            if not candidate_section_separators:
+                break
+            candidate_section_separators &= key_section_separators.get(key, set())
+        return candidate_section_separators
@@ -0,0 +1,241 @@
+import os
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from notes_app.search import (
+    SEARCH_BATCHES_PER_PROCESS,
+    get_search_function,
+    get_section_text_batches,
+    get_text_size,
+    search_sections,
+)
+
+
+class SearchWorker:
+    """
+    SearchWorker runs the all sections search in the background
+    so that searching a file with many sections does not block the UI thread,
+    the sections of at least parallel_min_size bytes in total are split into batches
+    of about equal size searched in parallel in a pool of processes, one per CPU
+    by default, as the search is CPU bound and threads would hold the GIL in turns,
+    smaller ones are not worth sending to the processes and are searched in place
+    in a background thread which gives the UI thread the GIL between the sections,
+    the found occurrences are delivered in the order of the sections
+    through the schedule callable (Clock.schedule_once) on the UI thread,
+    only one search is pending at a time, a new search cancels the pending one
+    """
+
+    def __init__(
+        self,
+        schedule: Callable[[Callable, float], object],
+        parallel_min_size: int,
+        processes: Optional[int] = None,
+    ):
+        self._schedule = schedule
+        self._parallel_min_size = parallel_min_size
+        self._processes = processes or os.cpu_count() or 1
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._process_executor: Optional[Executor] = None
+        self._pending_search: Optional[object] = None
+        self._pending_futures: List[Future] = []
+
+    @property
+    def is_pending(self) -> bool:
+        return self._pending_search is not None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="search_worker"
+            )
+        return self._executor
+
+    def _get_process_executor(self) -> Optional[Executor]:
+        if self._process_executor is None:
+            try:
+                self._process_executor = ProcessPoolExecutor(
+                    max_workers=self._processes
+                )
+            # multiprocessing is not available on some platforms, Android included,
+            # the thread still keeps the search off the UI thread
+            except (ImportError, NotImplementedError, OSError):
+                self._processes = 1
+        return self._process_executor
+
+    def submit(
+        self,
+        search,
+        pattern: str,
+        file,
+        current_section_identifier: str,
+        on_result: Callable[[Dict[str, List[int]]], None],
+    ) -> None:
+        """
+        search for the pattern and call on_result with the found occurrences,
+        the section texts and the search options are collected on the calling thread
+        as File is not thread safe, the search falls back to the calling thread
+        when it failed in the background
+        """
+        self.cancel()
+
+        section_texts = search.get_section_texts(
+            pattern=pattern,
+            file=file,
+            current_section_identifier=current_section_identifier,
+        )
+        pending_search = object()
+        self._pending_search = pending_search
+
+        futures = None
+        if self._processes > 1:
+            futures = self._submit_parallel(
+                search=search, pattern=pattern, section_texts=section_texts
+            )
+        if futures is None:
+            futures = [
+                self._submit_in_place(
+                    search=search,
+                    pattern=pattern,
+                    section_texts=section_texts,
+                    pending_search=pending_search,
+                )
+            ]
+        self._pending_futures = futures
+
+        def on_done(done_future: Future) -> None:
+            # the done callbacks run in the worker threads, the results are merged
+            # in the UI thread once all the batches are done
+            if all(future.done() for future in futures):
+                self._schedule(
+                    lambda dt: self._deliver_results(
+                        pending_search=pending_search,
+                        futures=futures,
+                        fallback=lambda: dict(
+                            search.search_section_texts(
+                                pattern=pattern, section_texts=section_texts
+                            )
+                        ),
+                        on_result=on_result,
+                    ),
+                    0,
+                )
+
+        for future in futures:
+            future.add_done_callback(on_done)
+
+    def _submit_parallel(
+        self, search, pattern, section_texts
+    ) -> Optional[List[Future]]:
+        """
+        returns the futures of the batches searched in the process pool,
+        None when the sections are too small to be worth it or the pool is unavailable
+        """
+        section_text_sizes = [get_text_size(text=text) for _, text in section_texts]
+        if sum(section_text_sizes) < self._parallel_min_size:
+            return None
+
+        batches = get_section_text_batches(
+            section_texts=section_texts,
+            section_text_sizes=section_text_sizes,
+            batch_count=self._processes * SEARCH_BATCHES_PER_PROCESS,
+        )
+        executor = self._get_process_executor()
+        if len(batches) < 2 or executor is None:
+            return None
+
+        search_batch = partial(
+            search_sections,
+            pattern=pattern,
+            case_sensitive_search=search.search_case_sensitive,
+            full_words_search=search.search_full_words,
+            regex_search=search.search_regex,
+        )
+        try:
+            return [
+                executor.submit(search_batch, section_texts=batch) for batch in batches
+            ]
+        # the broken pool is created again by the next search
+        except BrokenProcessPool:
+            self._shutdown_process_executor()
+            return None
+
+    def _submit_in_place(
+        self, search, pattern, section_texts, pending_search: object
+    ) -> Future:
+        section_search_function = get_search_function(
+            pattern=pattern,
+            case_sensitive_search=search.search_case_sensitive,
+            full_words_search=search.search_full_words,
+            regex_search=search.search_regex,
+        )
+
+        def search_sections_in_place() -> Optional[Dict[str, List[int]]]:
+            found_occurrences = dict()
+            for section_separator, text in section_texts:
+                # the cancelled search stops at the next section
+                if pending_search is not self._pending_search:
+                    return None
+                search_result = section_search_function(text)
+                if search_result:
+                    found_occurrences[section_separator] = search_result
+            return found_occurrences
+
+        return self._get_executor().submit(search_sections_in_place)
+
+    def cancel(self) -> None:
+        """
+        drop the pending search, the batches not started yet are not run,
+        the search in place stops at its next section
+        and the results of the running ones are not delivered
+        """
+        self._pending_search = None
+        for future in self._pending_futures:
+            future.cancel()
+        self._pending_futures = []
+
+    def _shutdown_process_executor(self) -> None:
+        if self._process_executor is not None:
+            self._process_executor.shutdown(wait=False)
+            self._process_executor = None
+
+    def shutdown(self) -> None:
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._shutdown_process_executor()
+
+    def _deliver_results(
+        self,
+        pending_search: object,
+        futures: List[Future],
+        fallback: Callable[[], Dict[str, List[int]]],
+        on_result: Callable[[Dict[str, List[int]]], None],
+    ) -> None:
+        # the search was cancelled or its results were already delivered
+        if pending_search is not self._pending_search:
+            return
+
+        self._pending_search = None
+        self._pending_futures = []
+        if any(future.exception() is not None for future in futures):
+            # a broken process pool is created again by the next search
+            if any(
+                isinstance(future.exception(), BrokenProcessPool) for future in futures
+            ):
+                self._shutdown_process_executor()
+            on_result(fallback())
+            return
+
+        found_occurrences = dict()
+        for future in futures:
+            found_occurrences.update(future.result())
+        on_result(found_occurrences)
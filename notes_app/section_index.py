@@ -0,0 +1,60 @@
+import hashlib
+import json
+import os
+from typing import List, Dict, Optional
+
+SECTION_INDEX_FILE_SUFFIX = ".index"
+SECTION_HASH_DIGEST_SIZE = 16
+
+
+def get_section_index_file_path(file_path: str) -> str:
+    return f"{file_path}{SECTION_INDEX_FILE_SUFFIX}"
+
+
+def get_content_hash(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=SECTION_HASH_DIGEST_SIZE).hexdigest()
+
+
+def get_section_content_hash(section_content: str, encoding: str) -> str:
+    return get_content_hash(content=section_content.encode(encoding))
+
+
+def _get_file_stat_key(file_path: str) -> Dict:
+    file_stat = os.stat(file_path)
+    return {
+        "file_size": file_stat.st_size,
+        "file_mtime_ns": file_stat.st_mtime_ns,
+        "file_inode": file_stat.st_ino,
+    }
+
+
+def read_section_index(file_path: str) -> Optional[Dict]:
+    """
+    read the section index stored next to the notes file,
+    returns None when there is no index or when it does not match the file size,
+    modification time and inode anymore
+    """
+    try:
+        with open(get_section_index_file_path(file_path=file_path), "r") as f:
+            section_index = json.load(f)
+        file_stat_key = _get_file_stat_key(file_path=file_path)
+    except (OSError, ValueError):
+        return None
+
+    if any(section_index.get(k) != v for k, v in file_stat_key.items()):
+        return None
+    return section_index
+
+
+def write_section_index(file_path: str, sections: List[List]) -> None:
+    """
+    write the section index next to the notes file, sections are the
+    [separator, separator start, content start, content end, content hash]
+    entries with the byte offsets of the sections in the file
+    """
+    section_index_file_path = get_section_index_file_path(file_path=file_path)
+    temp_section_index_file_path = f"{section_index_file_path}.tmp"
+
+    with open(temp_section_index_file_path, "w") as f:
+        json.dump({**_get_file_stat_key(file_path=file_path), "sections": sections}, f)
+    os.replace(temp_section_index_file_path, section_index_file_path)
@@ -0,0 +1,142 @@
+import re
+from functools import lru_cache
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+# the text kept back when a stream is parsed chunk by chunk in case a separator
+# is split between two chunks, section separators are expected to be shorter
+STREAM_SECTION_SEPARATOR_OVERLAP = 1024
+
+
+def parse_section_offsets(section_separator_regex, raw_data) -> List[Tuple]:
+    """
+    validate and split the raw data (str or bytes-like) in a single regex pass,
+    returns the (separator, content start, content end) offset table
+    """
+    section_offsets = []
+    previous_match = None
+
+    for match in section_separator_regex.finditer(raw_data):
+        if previous_match:
+            section_offsets.append(
+                (previous_match.group(), previous_match.end(), match.start())
+            )
+        previous_match = match
+
+    if not previous_match:
+        raise ValueError("No section in file found")
+
+    section_offsets.append((previous_match.group(), previous_match.end(), len(raw_data)))
+    return section_offsets
+
+
+class SectionSeparatorGrammar:
+    """
+    SectionSeparatorGrammar holds the section separator format and its regexes compiled
+    once, it parses the raw data into sections, formats section names to separators
+    and extracts section names from separators
+    """
+
+    def __init__(
+        self,
+        section_separator_format: str,
+        section_separator_regex: str,
+        section_separator_group_substr_regex: str,
+    ):
+        self._section_separator_format = section_separator_format
+
+        self.section_separator_regex = re.compile(section_separator_regex)
+        self.section_separator_group_substr_regex = re.compile(
+            section_separator_group_substr_regex
+        )
+
+    @lru_cache(maxsize=None)
+    def get_binary_section_separator_regex(self, encoding: str):
+        return re.compile(self.section_separator_regex.pattern.encode(encoding))
+
+    def search(self, raw_data) -> bool:
+        return self.section_separator_regex.search(raw_data) is not None
+
+    def parse(self, raw_data: str) -> List[Tuple[str, int, int]]:
+        return parse_section_offsets(
+            section_separator_regex=self.section_separator_regex, raw_data=raw_data
+        )
+
+    def parse_binary(self, raw_data, encoding: str) -> List[Tuple[bytes, int, int]]:
+        return parse_section_offsets(
+            section_separator_regex=self.get_binary_section_separator_regex(
+                encoding=encoding
+            ),
+            raw_data=raw_data,
+        )
+
+    def parse_stream(
+        self, stream: TextIO, chunk_size: int
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        parse the sections of a text stream read chunk by chunk,
+        yields the (separator, content) of the sections, only the content
+        of the section being read is kept in memory
+        """
+        section_separator = None
+        section_content_parts: List[str] = []
+        pending = ""
+
+        while True:
+            chunk = stream.read(chunk_size)
+            data = pending + chunk
+            position = 0
+
+            for match in self.section_separator_regex.finditer(data):
+                section_content_parts.append(data[position : match.start()])
+                # text before the first separator does not belong to any section
+                if section_separator is not None:
+                    yield section_separator, "".join(section_content_parts)
+                section_separator = match.group()
+                section_content_parts = []
+                position = match.end()
+
+            if not chunk:
+                section_content_parts.append(data[position:])
+                break
+
+            pending_start = max(position, len(data) - STREAM_SECTION_SEPARATOR_OVERLAP)
+            section_content_parts.append(data[position:pending_start])
+            pending = data[pending_start:]
+
+        if section_separator is None:
+            raise ValueError("No section in file found")
+
+        yield section_separator, "".join(section_content_parts)
+
+    def format(self, section_name: str) -> str:
+        return self._section_separator_format.format(name=section_name)
+
+    def extract_name(self, section_separator: str) -> Optional[str]:
+        match = self.section_separator_group_substr_regex.search(section_separator)
+        # separators set directly may not follow the separator format
+        return match.group(1) if match else None
+
+
+@lru_cache(maxsize=None)
+def _get_section_separator_grammar(
+    section_separator_format: str,
+    section_separator_regex: str,
+    section_separator_group_substr_regex: str,
+) -> SectionSeparatorGrammar:
+    return SectionSeparatorGrammar(
+        section_separator_format=section_separator_format,
+        section_separator_regex=section_separator_regex,
+        section_separator_group_substr_regex=section_separator_group_substr_regex,
+    )
+
+
+def get_section_separator_grammar(defaults) -> SectionSeparatorGrammar:
+    """
+    returns the grammar built from the Defaults separator settings,
+    one grammar is built for each distinct setting
+    """
+    return _get_section_separator_grammar(
+        section_separator_format=defaults.DEFAULT_SECTION_FILE_SEPARATOR,
+        section_separator_regex=defaults.DEFAULT_SECTION_FILE_SEPARATOR_REGEX,
+        section_separator_group_substr_regex=defaults.DEFAULT_SECTION_FILE_SEPARATOR_GROUP_SUBSTR_REGEX,
+    )
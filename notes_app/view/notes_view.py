@@ -2,6 +2,7 @@ import os
 import re
 import webbrowser
 from enum import Enum
+from functools import partial
 from os import path, linesep
 from os.path import exists
 
@@ -26,10 +27,26 @@ from kivymd.uix.screen import MDScreen
 from kivymd.uix.snackbar import BaseSnackbar
 
 from kivy.base import EventLoop
+from kivy.clock import Clock
 from kivy.uix.textinput import FL_IS_LINEBREAK
 
 from notes_app import __version__
-from notes_app.diff import merge_strings
+from notes_app.diff import (
+    MERGE_MODE_CONFLICT_MARKERS,
+    MERGE_RESOLUTION_BOTH,
+    MERGE_RESOLUTION_EXTERNAL,
+    MERGE_RESOLUTION_LOCAL,
+    get_conflict_marker_hunks,
+    get_merge_hunks,
+    get_merge_hunks_text,
+    get_next_conflict_hunk_index,
+    get_text_delta,
+    merge_strings,
+    merge_strings_with_conflict_markers,
+    merge_three_way_strings,
+    resolve_merge_hunk,
+)
+from notes_app.merge_worker import MergeWorker
 from notes_app.observer.notes_observer import Observer
 
 from notes_app.color import (
@@ -41,7 +58,6 @@ from notes_app.color import (
 from notes_app.file import (
     get_validated_file_path,
     File,
-    transform_section_separator_to_section_name,
     transform_section_name_to_section_separator,
     SECTION_FILE_NEW_SECTION_PLACEHOLDER,
     SECTION_FILE_NAME_MINIMAL_CHAR_COUNT,
@@ -59,6 +75,7 @@ from notes_app.search import (
     transform_position_text_placeholder_to_position,
     transform_position_to_position_text_placeholder,
 )
+from notes_app.search_worker import SearchWorker
 
 APP_TITLE = "Notes"
 APP_METADATA_ROWS = [
@@ -211,6 +228,7 @@ class SearchDialogContent(MDBoxLayout):
     search_string_placeholder = StringProperty(None)
     search_results_message = StringProperty(None)
     execute_search = ObjectProperty(None)
+    search_as_you_type = ObjectProperty(None)
     cancel = ObjectProperty(None)
 
 
@@ -231,6 +249,10 @@ class MenuStorageItems(Enum):
     ChooseFile = "Choose storage file"
     ShowFileInfo = "Show storage file info"
     Save = "Save storage file"
+    GotoNextConflict = "Go to next merge conflict"
+    KeepLocalConflictVersion = "Keep local version of merge conflict"
+    KeepExternalConflictVersion = "Keep external version of merge conflict"
+    KeepBothConflictVersions = "Keep both versions of merge conflict"
 
 
 class MenuSettingsItems(Enum):
@@ -271,6 +293,26 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
         self.auto_save_text_input_change_counter = 0
 
         self.search = Search(defaults=self.defaults)
+        self.merge_worker = MergeWorker(
+            schedule=Clock.schedule_once,
+            time_budget=self.defaults.DEFAULT_MERGE_TIME_BUDGET,
+            inline_wait=self.defaults.DEFAULT_MERGE_INLINE_WAIT,
+        )
+        # searches all sections of a file with many sections in the background,
+        # in parallel processes when the sections are large
+        self.search_worker = SearchWorker(
+            schedule=Clock.schedule_once,
+            parallel_min_size=self.defaults.DEFAULT_SEARCH_PARALLEL_MIN_SIZE,
+        )
+        # the search as you type runs once the typing paused for the delay
+        self.search_as_you_type_string = str()
+        self.search_as_you_type_trigger = Clock.create_trigger(
+            lambda dt: self.execute_search(self.search_as_you_type_string),
+            self.defaults.DEFAULT_SEARCH_AS_YOU_TYPE_DELAY,
+        )
+        # section separator -> (merged section text, merge hunks) of the sections
+        # merged in the conflict markers merge mode, valid until the text changes
+        self.merge_hunks = dict()
         self.set_properties_from_settings()
 
         self.file = File(
@@ -313,9 +355,7 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
         # the search result is selected even after the related section is deleted
         self.text_section_view.select_text(0, 0)
 
-        section_name = transform_section_separator_to_section_name(
-            defaults=self.defaults, section_separator=section_separator
-        )
+        section_name = self.file.get_section_name(section_separator=section_separator)
 
         self.ids.toolbar.title = f"{APP_TITLE} section: {section_name}"
 
@@ -326,8 +366,8 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
             self.ids.md_list.add_widget(
                 ItemDrawer(
                     id=section_separator,
-                    text=transform_section_separator_to_section_name(
-                        defaults=self.defaults, section_separator=section_separator
+                    text=self.file.get_section_name(
+                        section_separator=section_separator
                     ),
                     on_release=lambda x=f"{section_separator}": self.press_drawer_item_callback(
                         x
@@ -385,6 +425,16 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
             self.press_menu_item_show_file_metadata()
         elif text_item == MenuStorageItems.Save.value:
             self.press_menu_item_save_file()
+        elif text_item == MenuStorageItems.GotoNextConflict.value:
+            self.press_menu_item_goto_next_conflict()
+        elif text_item == MenuStorageItems.KeepLocalConflictVersion.value:
+            self.press_menu_item_resolve_conflict(resolution=MERGE_RESOLUTION_LOCAL)
+        elif text_item == MenuStorageItems.KeepExternalConflictVersion.value:
+            self.press_menu_item_resolve_conflict(
+                resolution=MERGE_RESOLUTION_EXTERNAL
+            )
+        elif text_item == MenuStorageItems.KeepBothConflictVersions.value:
+            self.press_menu_item_resolve_conflict(resolution=MERGE_RESOLUTION_BOTH)
 
         self.menu_storage.dismiss()
 
@@ -473,6 +523,10 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
             return
 
         self.controller.set_file_path(validated_file_path)
+        # the result of a pending merge belongs to the previous file
+        self.merge_worker.cancel()
+        self.merge_hunks.clear()
+        self.search_worker.cancel()
 
         try:
             self.file = File(
@@ -520,6 +574,8 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
             return self.search.search_all_sections
         elif switch_id == "search_full_words_switch":
             return self.search.search_full_words
+        elif switch_id == "search_regex_switch":
+            return self.search.search_regex
 
     def search_switch_callback(self, switch_id, state, *args):
         if switch_id == "search_case_sensitive_switch":
@@ -528,15 +584,37 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
             self.search.search_all_sections = state
         elif switch_id == "search_full_words_switch":
             self.search.search_full_words = state
+        elif switch_id == "search_regex_switch":
+            self.search.search_regex = state
 
     def execute_search(self, *args):
-        if not validate_search_input(input_string=args[0]):
+        if not validate_search_input(
+            input_string=args[0], regex_search=self.search.search_regex
+        ):
             self.dialog.content_cls.search_results_message = "Invalid search"
             return
 
         self.last_searched_string = args[0]
 
-        self.dialog.content_cls.results_list.clear_widgets()
+        # a new search cancels the one pending in the search worker
+        self.search_worker.cancel()
+        # searching a file with few sections is not worth the round trip
+        # to the search worker
+        if (
+            self.search.search_all_sections
+            and len(self.file.section_separators_sorted)
+            >= self.defaults.DEFAULT_SEARCH_WORKER_MIN_SECTION_COUNT
+        ):
+            self.dialog.content_cls.results_list.clear_widgets()
+            self.dialog.content_cls.search_results_message = "Searching..."
+            self.search_worker.submit(
+                search=self.search,
+                pattern=self.last_searched_string,
+                file=self.file,
+                current_section_identifier=self.current_section,
+                on_result=self.show_search_results,
+            )
+            return
 
         # TODO rename current_section_identifier param to current_section
         found_occurrences = self.search.search_for_occurrences(
@@ -544,6 +622,24 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
             file=self.file,
             current_section_identifier=self.current_section,
         )
+        self.show_search_results(found_occurrences=found_occurrences)
+
+    def search_as_you_type(self, input_string):
+        """
+        each typed character restarts the delay of the search trigger,
+        a too short or invalid search string is not searched for while typing
+        """
+        self.search_as_you_type_trigger.cancel()
+        if not validate_search_input(
+            input_string=input_string, regex_search=self.search.search_regex
+        ):
+            return
+
+        self.search_as_you_type_string = input_string
+        self.search_as_you_type_trigger()
+
+    def show_search_results(self, found_occurrences):
+        self.dialog.content_cls.results_list.clear_widgets()
 
         if not found_occurrences:
             self.dialog.content_cls.search_results_message = "No match found"
@@ -573,8 +669,8 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
                     + SEARCH_LIST_ITEM_MATCHED_EXTRA_CHAR_COUNT
                 ]
 
-                section_name = transform_section_separator_to_section_name(
-                    defaults=self.defaults, section_separator=section_file_separator
+                section_name = self.file.get_section_name(
+                    section_separator=section_file_separator
                 )
 
                 self.dialog.content_cls.results_list.add_widget(
@@ -603,13 +699,7 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
             not section_name
             or len(section_name) < SECTION_FILE_NAME_MINIMAL_CHAR_COUNT
             or section_name.isspace()
-            or section_name
-            in [
-                transform_section_separator_to_section_name(
-                    defaults=self.defaults, section_separator=section_separator
-                )
-                for section_separator in self.file.section_separators_sorted
-            ]
+            or self.file.is_section_name_used(section_name=section_name)
         ):
             self.dialog.content_cls.add_section_result_message = "Invalid name"
             return
@@ -636,13 +726,7 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
             not new_section_name
             or len(new_section_name) < SECTION_FILE_NAME_MINIMAL_CHAR_COUNT
             or new_section_name.isspace()
-            or new_section_name
-            in [
-                transform_section_separator_to_section_name(
-                    defaults=self.defaults, section_separator=section_separator
-                )
-                for section_separator in self.file.section_separators_sorted
-            ]
+            or self.file.is_section_name_used(section_name=new_section_name)
             or old_section_name == new_section_name
         ):
             self.dialog.content_cls.edit_section_result_message = "Invalid name"
@@ -673,20 +757,31 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
         return webbrowser.open(EXTERNAL_REPOSITORY_URL)
 
     def cancel_dialog(self, *args):
+        # the pending search results are not delivered to the closed search dialog
+        self.search_as_you_type_trigger.cancel()
+        self.search_worker.cancel()
         self.dialog.dismiss()
         self.dialog = MDDialog()
 
     def save_current_section_to_file(self):
-        merged_current_section_text_data = None
+        # the pending merge saves the current section once its result is applied
+        if self.merge_worker.is_pending:
+            return
 
         if self.model.external_update:
-            self.file.reload()
+            changed_section_separators = self.file.reload()
+            # the current section as of the last save which the text input was edited from
+            current_section_text_base = self.file.get_section_base(
+                section_separator=self.text_section_view.section_file_separator
+            )
             try:
                 current_section_text_before = self.file.get_section_content(
                     section_separator=self.text_section_view.section_file_separator
                 )
             # KeyError raised if the current section was removed or renamed by a external update
             except KeyError:
+                # the removed current section is restored from the text input
+                current_section_text_base = None
                 # merge_strings prioritizes current_section_text_after over current_section_text_before
                 # so empty string placeholder is set to current_section_text_before
                 current_section_text_before = ""
@@ -699,13 +794,6 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
                     section_content=SECTION_FILE_NEW_SECTION_PLACEHOLDER,
                 )
 
-            current_section_text_after = self.text_section_view.text
-
-            merged_current_section_text_data = merge_strings(
-                before=current_section_text_before, after=current_section_text_after
-            )
-
-            self.text_section_view.text = merged_current_section_text_data
             # un-focus the TextInput so that the cursor is not offset by the external update
             self.text_section_view.focus = False
 
@@ -713,15 +801,229 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
                 section_separators=self.file.section_separators_sorted
             )
 
-        self.file.set_section_content(
+            # the merge is only needed when the current section changed in the file
+            if (
+                self.text_section_view.section_file_separator
+                in changed_section_separators
+            ):
+                self.submit_current_section_merge(
+                    current_section_text_base=current_section_text_base,
+                    current_section_text_before=current_section_text_before,
+                )
+                return
+
+        self.save_section_text_to_file(
+            section_separator=self.text_section_view.section_file_separator,
+            section_text=self.text_section_view.text,
+        )
+
+    def submit_current_section_merge(
+        self, current_section_text_base, current_section_text_before
+    ):
+        """
+        the merge runs in the merge worker thread, a merge not finished within
+        the time budget falls back to keeping both versions between conflict markers
+        """
+        current_section_text_after = self.text_section_view.text
+
+        if self.defaults.DEFAULT_MERGE_MODE == MERGE_MODE_CONFLICT_MARKERS:
+            self.merge_worker.submit(
+                merge=partial(
+                    get_merge_hunks,
+                    before=current_section_text_before,
+                    after=current_section_text_after,
+                    base=current_section_text_base,
+                    engine=self.defaults.DEFAULT_DIFF_ENGINE,
+                ),
+                fallback=partial(
+                    get_conflict_marker_hunks,
+                    before=current_section_text_before,
+                    after=current_section_text_after,
+                ),
+                on_result=partial(
+                    self.apply_merge_hunks_current_section,
+                    section_separator=self.text_section_view.section_file_separator,
+                    current_section_text_after=current_section_text_after,
+                ),
+            )
+            return
+
+        if current_section_text_base is None:
+            merge = partial(
+                merge_strings,
+                before=current_section_text_before,
+                after=current_section_text_after,
+                engine=self.defaults.DEFAULT_DIFF_ENGINE,
+            )
+        else:
+            # changes made on both sides are kept, deletions included
+            merge = partial(
+                merge_three_way_strings,
+                base=current_section_text_base,
+                local=current_section_text_after,
+                remote=current_section_text_before,
+                engine=self.defaults.DEFAULT_DIFF_ENGINE,
+            )
+
+        self.merge_worker.submit(
+            merge=merge,
+            fallback=partial(
+                merge_strings_with_conflict_markers,
+                before=current_section_text_before,
+                after=current_section_text_after,
+            ),
+            on_result=partial(
+                self.apply_merged_current_section,
+                section_separator=self.text_section_view.section_file_separator,
+                current_section_text_after=current_section_text_after,
+            ),
+        )
+
+    def apply_merge_hunks_current_section(
+        self, merge_hunks, section_separator, current_section_text_after
+    ):
+        merged_current_section_text_data = get_merge_hunks_text(hunks=merge_hunks)
+        self.apply_merged_current_section(
+            merged_current_section_text_data,
+            section_separator=section_separator,
+            current_section_text_after=current_section_text_after,
+        )
+
+        # the hunk offsets do not match the section merged with the text
+        # typed while the merge was running
+        if section_separator in self.file.section_separators_sorted and (
+            self.file.get_section_content(section_separator=section_separator)
+            == merged_current_section_text_data
+        ):
+            self.merge_hunks[section_separator] = (
+                merged_current_section_text_data,
+                merge_hunks,
+            )
+
+    def get_section_merge_hunks(self, section_separator, section_text):
+        """
+        the cached merge hunks are dropped once the section text changes
+        """
+        merged_section_text, merge_hunks = self.merge_hunks.get(
+            section_separator, (None, None)
+        )
+        if merged_section_text != section_text:
+            self.merge_hunks.pop(section_separator, None)
+            return None
+        return merge_hunks
+
+    def press_menu_item_goto_next_conflict(self):
+        merge_hunks = self.get_section_merge_hunks(
             section_separator=self.text_section_view.section_file_separator,
-            section_content=merged_current_section_text_data
-            or self.text_section_view.text,
+            section_text=self.text_section_view.text,
+        )
+        hunk_index = (
+            get_next_conflict_hunk_index(
+                hunks=merge_hunks, position=self.text_section_view.cursor_index() + 1
+            )
+            if merge_hunks
+            else None
+        )
+        if hunk_index is None:
+            self.show_error_bar(error_message="No merge conflict in this section")
+            return
+
+        hunk = merge_hunks[hunk_index]
+        self.text_section_view.select_text(hunk.start, hunk.end)
+        self.text_section_view.cursor = self.text_section_view.get_cursor_from_index(
+            hunk.start
+        )
+
+    def press_menu_item_resolve_conflict(self, resolution):
+        """
+        resolves the conflict at the cursor, or the next one,
+        only the conflict text is replaced and the other conflicts stay cached
+        """
+        section_separator = self.text_section_view.section_file_separator
+        merge_hunks = self.get_section_merge_hunks(
+            section_separator=section_separator,
+            section_text=self.text_section_view.text,
+        )
+        hunk_index = (
+            get_next_conflict_hunk_index(
+                hunks=merge_hunks,
+                position=self.text_section_view.cursor_index(),
+                include_current=True,
+            )
+            if merge_hunks
+            else None
+        )
+        if hunk_index is None:
+            self.show_error_bar(error_message="No merge conflict in this section")
+            return
+
+        merge_hunks, (position, deleted_length, inserted_text) = resolve_merge_hunk(
+            hunks=merge_hunks, hunk_index=hunk_index, resolution=resolution
+        )
+        section_text = self.text_section_view.text
+        section_text = "".join(
+            (
+                section_text[:position],
+                inserted_text,
+                section_text[position + deleted_length :],
+            )
+        )
+        self.merge_hunks[section_separator] = (section_text, merge_hunks)
+
+        self.text_section_view.text = section_text
+        self.text_section_view.cursor = self.text_section_view.get_cursor_from_index(
+            position
         )
 
-        text_data = self.file.transform_data_by_sections_to_raw_data_content()
+    def apply_merged_current_section(
+        self,
+        merged_current_section_text_data,
+        section_separator,
+        current_section_text_after,
+    ):
+        # the section was deleted while the merge was running
+        if section_separator not in self.file.section_separators_sorted:
+            return
 
-        self.controller.save_file_data(data=text_data)
+        if self.text_section_view.section_file_separator == section_separator:
+            # the text typed while the merge was running is kept
+            merged_current_section_text_data = merge_three_way_strings(
+                base=current_section_text_after,
+                local=self.text_section_view.text,
+                remote=merged_current_section_text_data,
+                engine=self.defaults.DEFAULT_DIFF_ENGINE,
+            )
+            self.text_section_view.text = merged_current_section_text_data
+
+        self.save_section_text_to_file(
+            section_separator=section_separator,
+            section_text=merged_current_section_text_data,
+        )
+
+    def save_section_text_to_file(self, section_separator, section_text):
+        try:
+            section_content = self.file.get_section_content(
+                section_separator=section_separator
+            )
+        # KeyError raised if the section is not in the file yet
+        except KeyError:
+            self.file.set_section_content(
+                section_separator=section_separator, section_content=section_text
+            )
+        else:
+            # only the part of the section changed in the text input is passed
+            # to the file so that the section is encoded from the edit
+            position, deleted_length, inserted_text = get_text_delta(
+                before=section_content, after=section_text
+            )
+            self.file.edit_section_content(
+                section_separator=section_separator,
+                position=position,
+                deleted_length=deleted_length,
+                inserted_text=inserted_text,
+            )
+
+        self.file.save()
 
     def press_menu_item_save_file(self, *args):
         self.save_current_section_to_file()
@@ -755,6 +1057,7 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
             search_string_placeholder=self.last_searched_string,
             search_results_message="",
             execute_search=self.execute_search,
+            search_as_you_type=self.search_as_you_type,
             cancel=self.cancel_dialog,
         )
 
@@ -772,9 +1075,7 @@ class NotesView(MDBoxLayout, MDScreen, Observer):
         self.dialog.open()
 
     def press_edit_section(self, section_item):
-        section_name = transform_section_separator_to_section_name(
-            defaults=self.defaults, section_separator=section_item.id
-        )
+        section_name = self.file.get_section_name(section_separator=section_item.id)
 
         content = EditSectionDialogContent(
             old_section_name=section_name,
@@ -10,6 +10,8 @@ from notes_app.defaults import Defaults
 from notes_app.controller.notes_controller import NotesController
 from notes_app.model.notes_model import NotesModel
 from notes_app.file import File
+from notes_app.journal import get_journal_file_path
+from notes_app.section_index import get_section_index_file_path
 from notes_app.settings import Settings
 
 TEST_OVERRIDE_DEFAULT_NOTES_FILE_NAME = "my_first_file.txt"
@@ -79,6 +81,12 @@ def create_default_notes_file():
 def delete_default_notes_file():
     if os.path.exists(defaults.DEFAULT_NOTES_FILE_NAME):
         os.remove(defaults.DEFAULT_NOTES_FILE_NAME)
+    for sidecar_file_path in (
+        get_journal_file_path(file_path=defaults.DEFAULT_NOTES_FILE_NAME),
+        get_section_index_file_path(file_path=defaults.DEFAULT_NOTES_FILE_NAME),
+    ):
+        if os.path.exists(sidecar_file_path):
+            os.remove(sidecar_file_path)
 
 
 def create_default_notes_empty_file():
@@ -0,0 +1,39 @@
+import pytest
+
+from notes_app.case_fold import CASE_FOLD_CHUNK_SIZE, CaseFoldedText
+
+
+class TestCaseFoldedText:
+    def test_case_folded_text(self):
+        case_folded_text = CaseFoldedText("Some TEXT")
+
+        assert case_folded_text.text == "some text"
+        assert case_folded_text.text_hash == hash("Some TEXT")
+        assert case_folded_text.get_position(folded_position=5) == 5
+        assert case_folded_text.get_positions([0, 5]) == [0, 5]
+
+    @pytest.mark.parametrize(
+        "text, folded_positions, positions",
+        [
+            # ß is folded into ss, ﬁ into fi and İ into i and a combining dot
+            ("aßb", [0, 1, 2, 3], [0, 1, 1, 2]),
+            ("ﬁ İx", [0, 1, 2, 3, 4, 5], [0, 0, 1, 2, 2, 3]),
+            ("ßß", [0, 1, 2, 3], [0, 0, 1, 1]),
+        ],
+    )
+    def test_get_positions(self, text, folded_positions, positions):
+        case_folded_text = CaseFoldedText(text)
+
+        assert case_folded_text.get_positions(folded_positions) == positions
+
+    def test_get_positions_chunks(self):
+        text = "a" * CASE_FOLD_CHUNK_SIZE + "ß" + "A" * CASE_FOLD_CHUNK_SIZE + "ß"
+        case_folded_text = CaseFoldedText(text)
+
+        assert case_folded_text.text == text.casefold()
+        assert case_folded_text.get_position(
+            folded_position=CASE_FOLD_CHUNK_SIZE + 2
+        ) == CASE_FOLD_CHUNK_SIZE + 1
+        assert case_folded_text.get_position(
+            folded_position=len(case_folded_text.text) - 1
+        ) == len(text) - 1
@@ -0,0 +1,62 @@
+import gzip
+import lzma
+
+import pytest
+
+from notes_app.compression import (
+    FILE_COMPRESSION_GZIP,
+    FILE_COMPRESSION_XZ,
+    TEXT_DATA_CHUNK_SIZE,
+    get_file_compression,
+    open_text_reader,
+    write_text_data,
+)
+
+
+@pytest.mark.parametrize(
+    "file_name, file_content, result",
+    [
+        ("notes.txt", None, None),
+        ("notes.gz", None, FILE_COMPRESSION_GZIP),
+        ("notes.XZ", None, FILE_COMPRESSION_XZ),
+        ("notes.gz", b"", FILE_COMPRESSION_GZIP),
+        ("notes.gz", b"<section=first> ", None),
+        ("notes.txt", gzip.compress(b"<section=first> "), FILE_COMPRESSION_GZIP),
+        ("notes.txt", lzma.compress(b"<section=first> "), FILE_COMPRESSION_XZ),
+    ],
+)
+def test_get_file_compression(tmp_path, file_name, file_content, result):
+    file_path = tmp_path / file_name
+    if file_content is not None:
+        file_path.write_bytes(file_content)
+
+    assert get_file_compression(file_path=str(file_path)) == result
+
+
+@pytest.mark.parametrize(
+    "compression", [None, FILE_COMPRESSION_GZIP, FILE_COMPRESSION_XZ],
+)
+def test_write_text_data_open_text_reader(tmp_path, compression):
+    file_path = tmp_path / "notes"
+    data = "<section=first> Quod equidem non reprehendo\r\n<section=second> čaj" * (
+        TEXT_DATA_CHUNK_SIZE // 50
+    )
+
+    with open(file_path, "wb") as f:
+        assert (
+            write_text_data(
+                binary_file=f, data=data, encoding="utf-8", compression=compression
+            )
+            is None
+        )
+        assert not f.closed
+
+    assert get_file_compression(file_path=str(file_path)) == compression
+    if compression:
+        assert file_path.stat().st_size < len(data)
+
+    # line endings are translated when read the same way as for plain text files
+    with open_text_reader(
+        file_path=str(file_path), encoding="utf-8", compression=compression
+    ) as f:
+        assert f.read() == data.replace("\r\n", "\n")
@@ -1,9 +1,13 @@
+import gzip
 from time import sleep
 from datetime import datetime
-from os import path, remove
+from os import listdir, path, remove
 from os.path import exists
 
+import pytest
+
 from notes_app.defaults import Defaults
+from notes_app.journal import get_journal_file_path, get_set_section_record
 from notes_app.model.notes_model import NotesModel
 from notes_app.view.notes_view import NotesView
 
@@ -70,6 +74,71 @@ class TestController:
         assert controller.model.file_size > 0
         assert datetime.fromtimestamp(controller.model.last_updated_on) >= _epoch_before
 
+    def test_save_file_data_from_offset(self, get_app):
+        controller = get_app.controller
+
+        assert controller.save_file_data(data="Quis istum", offset=61) is None
+        assert (
+            controller.read_file_data()
+            == """<section=first> Quod equidem non reprehendo
+<section=second> Quis istum"""
+        )
+
+    def test_save_file_data_from_offset_interrupted(self, get_app):
+        controller = get_app.controller
+        file_names = sorted(listdir(path.dirname(controller.model.file_path)))
+
+        # the data fails to encode after the unchanged part of the file was copied
+        with pytest.raises(UnicodeEncodeError):
+            controller.save_file_data(data="Quis \ud800", offset=61)
+
+        # the file is left unchanged and the temporary file is removed
+        assert (
+            controller.read_file_data()
+            == """<section=first> Quod equidem non reprehendo
+<section=second> Quis istum dolorem timet"""
+        )
+        assert sorted(listdir(path.dirname(controller.model.file_path))) == file_names
+
+    def test_read_save_compressed_file_data(self, get_app):
+        controller = get_app.controller
+
+        with open(controller.model.file_path, "rb") as f:
+            data = f.read()
+        with open(controller.model.file_path, "wb") as f:
+            f.write(gzip.compress(data))
+
+        assert controller.read_file_data() == data.decode("utf-8")
+
+        assert (
+            controller.save_file_data(data="<section=first> Quod equidem non reprehendo")
+            is None
+        )
+        with open(controller.model.file_path, "rb") as f:
+            assert (
+                gzip.decompress(f.read())
+                == b"<section=first> Quod equidem non reprehendo"
+            )
+        assert controller.read_file_data() == "<section=first> Quod equidem non reprehendo"
+
+    def test_compact_file_journal(self, get_app):
+        controller = get_app.controller
+
+        controller.append_file_journal_records(
+            records=[
+                get_set_section_record(
+                    section_separator="<section=a> ", section_content="some content"
+                )
+            ]
+        )
+        expected_file_data = """<section=first> Quod equidem non reprehendo
+<section=second> Quis istum dolorem timet<section=a> some content"""
+        assert controller.read_file_data() == expected_file_data
+
+        assert controller.compact_file_journal() is None
+        assert not exists(get_journal_file_path(file_path=controller.model.file_path))
+        assert controller.read_file_data() == expected_file_data
+
     def test_get_screen(self, get_app):
         controller = get_app.controller
         assert isinstance(controller.get_screen(), NotesView)
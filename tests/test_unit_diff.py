@@ -1,11 +1,47 @@
+import random
+
 import pytest
 
 from notes_app.diff import (
+    DIFF_ENGINE_DIFFLIB,
+    DIFF_ENGINE_MYERS,
+    DIFF_ENGINE_PATIENCE,
+    MERGE_HUNK_CLEAN,
+    MERGE_HUNK_CONFLICT,
+    MERGE_RESOLUTION_BOTH,
+    MERGE_RESOLUTION_EXTERNAL,
+    MERGE_RESOLUTION_LOCAL,
+    MergeHunk,
+    MergeMemo,
+    TEXT_DELTA_CHUNK_SIZE,
+    _get_common_boundary_lengths,
+    _get_digest,
+    _get_longest_increasing_anchors,
+    _get_matching_blocks,
+    _get_opcodes,
+    _get_common_prefix_length,
+    _get_common_suffix_length,
     _merge,
-    _replace_line_endings,
+    _get_token_ids,
+    _intern,
     _split,
+    _split_lines,
     _join,
+    apply_text_patch,
+    get_conflict_marker_hunks,
+    get_merge_hunks,
+    get_merge_hunks_text,
+    get_merge_windows,
+    get_next_conflict_hunk_index,
+    get_text_delta,
+    get_text_patch,
+    merge_memo,
+    merge_process_pool,
+    merge_sections,
     merge_strings,
+    merge_strings_with_conflict_markers,
+    merge_three_way_strings,
+    resolve_merge_hunk,
 )
 
 
@@ -41,22 +77,120 @@ class TestDiff:
             ),
         ],
     )
-    def test__merge(self, left, right, result):
-        assert [x for x in _merge(left.split(), right.split())] == result
+    @pytest.mark.parametrize(
+        "engine", [DIFF_ENGINE_PATIENCE, DIFF_ENGINE_MYERS, DIFF_ENGINE_DIFFLIB]
+    )
+    def test__merge(self, left, right, result, engine):
+        assert [x for x in _merge(left.split(), right.split(), engine=engine)] == result
 
-    def test__replace_line_endings(self):
+    @pytest.mark.parametrize("engine", [DIFF_ENGINE_PATIENCE, DIFF_ENGINE_MYERS])
+    @pytest.mark.parametrize(
+        "left, right, result",
+        [
+            ("", "", []),
+            ("abc", "abc", [(0, 0, 3)]),
+            ("abc", "", []),
+            ("", "abc", []),
+            ("abc", "xyz", []),
+            ("abcabba", "cbabac", [(1, 1, 1), (3, 2, 2), (6, 4, 1)]),
+            ("axbyc", "abc", [(0, 0, 1), (2, 1, 1), (4, 2, 1)]),
+        ],
+    )
+    def test__get_matching_blocks(self, left, right, result, engine):
+        assert _get_matching_blocks(left=left, right=right, engine=engine) == result
+
+    def test__get_matching_blocks_patience_prefers_unique_tokens(self):
+        left = ["some", " ", "\n", " ", "section"]
+        right = ["this", " ", "is", " ", "some", " ", "section"]
+
+        # the shortest edit script matches the frequent separator instead of the word
+        assert _get_matching_blocks(
+            left=left, right=right, engine=DIFF_ENGINE_MYERS
+        ) == [(1, 1, 1), (3, 5, 2)]
+        assert _get_matching_blocks(
+            left=left, right=right, engine=DIFF_ENGINE_PATIENCE
+        ) == [(0, 4, 1), (3, 5, 2)]
+
+    @pytest.mark.parametrize(
+        "unique_common_tokens, result",
+        [
+            ([], []),
+            ([(0, 0)], [(0, 0)]),
+            ([(0, 3), (1, 1), (2, 2), (3, 0)], [(1, 1), (2, 2)]),
+            ([(0, 1), (1, 0), (2, 2), (3, 4), (4, 3)], [(1, 0), (2, 2), (4, 3)]),
+        ],
+    )
+    def test__get_longest_increasing_anchors(self, unique_common_tokens, result):
         assert (
-            _replace_line_endings(
-                input_text="ad \n na", line_ending="\n", line_ending_replacement="!@#"
-            )
-            == "ad !@# na"
+            _get_longest_increasing_anchors(unique_common_tokens=unique_common_tokens)
+            == result
         )
-        assert (
-            _replace_line_endings(
-                input_text="ad na", line_ending="\n", line_ending_replacement="!@#"
+
+    @pytest.mark.parametrize("engine", [DIFF_ENGINE_PATIENCE, DIFF_ENGINE_MYERS])
+    @pytest.mark.parametrize(
+        "left, right",
+        [
+            ("", ""),
+            ("abc", "abc"),
+            ("abc", ""),
+            ("", "abc"),
+            ("abc", "xyz"),
+            ("abcabba", "cbabac"),
+            ("a b c d e f", "a c d x e f g"),
+        ],
+    )
+    def test__get_opcodes(self, left, right, engine):
+        opcodes = list(_get_opcodes(left=left, right=right, engine=engine))
+
+        # the opcodes cover both sequences and rebuild right from left
+        rebuilt = ""
+        left_position = right_position = 0
+        for o, i1, i2, j1, j2 in opcodes:
+            assert (i1, j1) == (left_position, right_position)
+            if o == "equal":
+                assert left[i1:i2] == right[j1:j2]
+            rebuilt += right[j1:j2] if o != "delete" else ""
+            left_position, right_position = i2, j2
+        assert (left_position, right_position) == (len(left), len(right))
+        assert rebuilt == right
+
+        # the shortest edit script keeps at least as many equal tokens as difflib
+        if engine == DIFF_ENGINE_MYERS:
+            assert sum(i2 - i1 for o, i1, i2, _, _ in opcodes if o == "equal") >= sum(
+                i2 - i1
+                for o, i1, i2, _, _ in _get_opcodes(
+                    left=left, right=right, engine=DIFF_ENGINE_DIFFLIB
+                )
+                if o == "equal"
             )
-            == "ad na"
+
+    def test__get_opcodes_unknown_engine(self):
+        with pytest.raises(ValueError):
+            list(_get_opcodes(left="a", right="b", engine="unknown"))
+
+    def test__intern(self):
+        token_ids = _get_token_ids()
+        separator_count = len(token_ids)
+
+        tokens = _intern(
+            input_list=["some", " ", "text", " ", "some"], token_ids=token_ids
         )
+        assert tokens.typecode == "i"
+        assert list(tokens) == [
+            separator_count,
+            token_ids[" "],
+            separator_count + 1,
+            token_ids[" "],
+            separator_count,
+        ]
+        # the dict order gives the tokens by their ids
+        assert [list(token_ids)[token_id] for token_id in tokens] == [
+            "some",
+            " ",
+            "text",
+            " ",
+            "some",
+        ]
 
     @pytest.mark.parametrize(
         "input_text, result",
@@ -66,6 +200,11 @@ class TestDiff:
                 ["this", " ", "is", " ", "some", " ", "section", ".", "yeah"],
             ),
             ("another text", ["another", " ", "text"],),
+            ("", []),
+            (
+                "line\n\nnext  line.",
+                ["line", "\n", "\n", "next", " ", " ", "line", "."],
+            ),
         ],
     )
     def test__split(self, input_text, result):
@@ -106,5 +245,538 @@ class TestDiff:
             ),
         ],
     )
-    def test_merge_strings(self, before, after, result):
-        assert merge_strings(before, after) == result
+    @pytest.mark.parametrize("engine", [DIFF_ENGINE_PATIENCE, DIFF_ENGINE_DIFFLIB])
+    def test_merge_strings(self, before, after, result, engine):
+        assert merge_strings(before, after, engine=engine) == result
+
+    @pytest.mark.parametrize(
+        "before, after, result",
+        [
+            ("", "", (0, 0)),
+            ("some text", "some text", (9, 0)),
+            # the common prefix and suffix are cut next to a separator
+            ("some text", "some test", (5, 0)),
+            ("some text", "same text", (0, 5)),
+            ("first line\nsecond", "first line\nthird", (11, 0)),
+            ("is", "this is", (0, 2)),
+            ("some", "something", (0, 0)),
+        ],
+    )
+    def test__get_common_boundary_lengths(self, before, after, result):
+        assert _get_common_boundary_lengths(before=before, after=after) == result
+
+    @pytest.mark.parametrize(
+        "input_text, result",
+        [
+            ("", []),
+            ("line", ["line"]),
+            ("line\n", ["line\n"]),
+            ("first\n\nsecond", ["first\n", "\n", "second"]),
+        ],
+    )
+    def test__split_lines(self, input_text, result):
+        assert _split_lines(input_text=input_text) == result
+
+    @pytest.mark.parametrize(
+        "before, after, result",
+        [
+            ("", "", []),
+            ("some text", "other text", [("some", "other"), (" text", " text")]),
+            (
+                "first\nsecond changed\nthird\nfourth\nlast",
+                "first\nsecond\nthird\nfourth new\nlast",
+                [
+                    ("first\nsecond", "first\nsecond"),
+                    (" changed", ""),
+                    ("\n", "\n"),
+                    ("third\n", "third\n"),
+                    ("fourth", "fourth"),
+                    ("", " new"),
+                    ("\nlast", "\nlast"),
+                ],
+            ),
+        ],
+    )
+    def test_get_merge_windows(self, before, after, result):
+        merge_windows = get_merge_windows(before=before, after=after)
+
+        assert merge_windows == result
+        assert "".join(before_window for before_window, _ in merge_windows) == before
+        assert "".join(after_window for _, after_window in merge_windows) == after
+
+    def test_merge_strings_windows(self):
+        before = "first line\n" * 1000 + "second line\n" + "third line\n" * 1000
+        after = "first line\n" * 1000 + "second line changed\n" + "third line\n" * 1000
+
+        assert merge_strings(before=before, after=after) == after
+
+    @pytest.mark.parametrize(
+        "engine", [DIFF_ENGINE_PATIENCE, DIFF_ENGINE_MYERS, DIFF_ENGINE_DIFFLIB]
+    )
+    @pytest.mark.parametrize(
+        "base, local, remote, result",
+        [
+            ("some text", "some text", "other text", "other text"),
+            ("some text", "other text", "some text", "other text"),
+            ("some text", "other text", "other text", "other text"),
+            # a deletion on either side stays deleted
+            (
+                "this is some section text",
+                "this is section text",
+                "this is some section text appended",
+                "this is section text appended",
+            ),
+            (
+                "this is some section text",
+                "this is some section text, changed",
+                "this some section text",
+                "this some section text, changed",
+            ),
+            (
+                "first line\nsecond line\nthird line",
+                "first line changed\nsecond line\nthird line",
+                "first line\nsecond line\nthird line changed",
+                "first line changed\nsecond line\nthird line changed",
+            ),
+            (
+                "Quod equidem non reprehendo\n",
+                "Quod equidem reprehendo\n",
+                "Quod equidem non reprehendo\nappended",
+                "Quod equidem reprehendo\nappended",
+            ),
+            # the unchanged prefix and suffix are not cut inside a word
+            ("l1\nl2\nl3\n", "l1\nl3\n", "l1\nl2\nl3 ext\n", "l1\nl3 ext\n"),
+            # the part changed on both sides is merged from both of them
+            ("some text", "some new text", "some old text", "some old new text"),
+            ("", "local text", "remote text", "remote local text"),
+        ],
+    )
+    def test_merge_three_way_strings(self, base, local, remote, result, engine):
+        assert (
+            merge_three_way_strings(
+                base=base, local=local, remote=remote, engine=engine
+            )
+            == result
+        )
+
+    def test_merge_strings_memo(self):
+        merge_memo.clear()
+
+        before = "first line\nremote line\nlast line"
+        result = "first line\nremote line\nlast line"
+        assert merge_strings(before=before, after="first line\nlast line") == result
+        # the merged texts and their merged window are memoized
+        assert merge_memo.size == len(result) + len("remote line\n")
+        assert merge_strings(before=before, after="first line\nlast line") == result
+        assert merge_memo.size == len(result) + len("remote line\n")
+
+        # the merged window left unchanged is reused when after grows
+        merge_memo.put(
+            key=(
+                DIFF_ENGINE_PATIENCE,
+                _get_digest(input_text="remote line\n"),
+                _get_digest(input_text=""),
+            ),
+            result="memoized window\n",
+        )
+        assert (
+            merge_strings(
+                before="first line\nremote line\nmiddle line\nlast line",
+                after="first line\nmiddle line\nlast line appended",
+            )
+            == "first line\nmemoized window\nmiddle line\nlast line appended"
+        )
+
+    @pytest.mark.parametrize(
+        "before, after, grown_after",
+        [
+            ("alpha", "", "beta"),
+            ("alpha", "alpha", "alphabeta"),
+            ("some text", "some new", "some new words"),
+            ("first\nsecond\nthird", "first\nthird", "first\nthird\nsecond"),
+        ],
+    )
+    @pytest.mark.parametrize("engine", [DIFF_ENGINE_MYERS, DIFF_ENGINE_PATIENCE])
+    def test_merge_strings_memo_grown_after(self, before, after, grown_after, engine):
+        merge_memo.clear()
+        uncached_result = merge_strings(before=before, after=grown_after, engine=engine)
+
+        merge_memo.clear()
+        merge_strings(before=before, after=after, engine=engine)
+        assert (
+            merge_strings(before=before, after=grown_after, engine=engine)
+            == uncached_result
+        )
+
+    def test_merge_strings_memo_grown_after_random(self):
+        words = ["alpha", "beta", "gamma", ".", ",", " ", "\n"]
+        rng = random.Random(0)
+        for _ in range(300):
+            before = "".join(rng.choice(words) for _ in range(rng.randint(0, 20)))
+            after = "".join(rng.choice(words) for _ in range(rng.randint(0, 20)))
+            grown_after = after + "".join(
+                rng.choice(words) for _ in range(rng.randint(1, 4))
+            )
+
+            merge_memo.clear()
+            uncached_result = merge_strings(before=before, after=grown_after)
+
+            merge_memo.clear()
+            merge_strings(before=before, after=after)
+            assert merge_strings(before=before, after=grown_after) == uncached_result
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_merge_sections(self, processes):
+        assert merge_sections(
+            section_versions={
+                "<section=a> ": (
+                    "Quod equidem non reprehendo\n",
+                    "Quod equidem reprehendo\n",
+                    "Quod equidem non reprehendo\nappended",
+                ),
+                "<section=b> ": (None, "local text", "remote text"),
+            },
+            processes=processes,
+        ) == {
+            "<section=a> ": "Quod equidem reprehendo\nappended",
+            "<section=b> ": "remote local text",
+        }
+        assert merge_sections(section_versions=dict(), processes=processes) == dict()
+
+    def test_merge_sections_process_pool(self):
+        section_versions = {
+            "<section=a> ": (None, "local a", "remote a"),
+            "<section=b> ": (None, "local b", "remote b"),
+        }
+        result = {"<section=a> ": "remote local a", "<section=b> ": "remote local b"}
+
+        assert merge_sections(section_versions=section_versions, processes=2) == result
+        executor = merge_process_pool.get_executor(processes=2)
+        # the process pool is kept for the next merges
+        assert merge_sections(section_versions=section_versions, processes=2) == result
+        assert merge_process_pool.get_executor(processes=2) is executor
+
+        assert merge_process_pool.get_executor(processes=3) is not executor
+        merge_process_pool.shutdown()
+
+    @pytest.mark.parametrize(
+        "before, after, result",
+        [
+            ("some text", "some text", "some text"),
+            (
+                "first\nsome text\nlast",
+                "first\nsome new text\nlast",
+                "first\n<<<<<<< local\nsome new text\n=======\nsome text\n"
+                ">>>>>>> external\nlast",
+            ),
+            (
+                "some text",
+                "some text\nappended",
+                "<<<<<<< local\nsome text\nappended\n=======\nsome text\n"
+                ">>>>>>> external\n",
+            ),
+            (
+                "text\nlast",
+                "new text\nlast",
+                "<<<<<<< local\nnew text\n=======\ntext\n>>>>>>> external\nlast",
+            ),
+            (
+                "first\nremoved\n",
+                "first\n",
+                "first\n<<<<<<< local\n=======\nremoved\n>>>>>>> external\n",
+            ),
+        ],
+    )
+    def test_merge_strings_with_conflict_markers(self, before, after, result):
+        assert merge_strings_with_conflict_markers(before=before, after=after) == result
+
+    @pytest.mark.parametrize(
+        "before, after, result",
+        [
+            ("", "", 0),
+            ("some text", "some", 4),
+            ("some text", "some test", 7),
+            ("some text", "other text", 0),
+        ],
+    )
+    def test__get_common_prefix_length(self, before, after, result):
+        assert (
+            _get_common_prefix_length(
+                before=before, after=after, max_length=min(len(before), len(after))
+            )
+            == result
+        )
+
+    @pytest.mark.parametrize(
+        "before, after, result",
+        [
+            ("", "", 0),
+            ("some text", "text", 4),
+            ("some text", "same text", 7),
+            ("some text", "some texts", 0),
+        ],
+    )
+    def test__get_common_suffix_length(self, before, after, result):
+        assert (
+            _get_common_suffix_length(
+                before=before, after=after, max_length=min(len(before), len(after))
+            )
+            == result
+        )
+
+    @pytest.mark.parametrize(
+        "before, after, result",
+        [
+            ("some text", "some text", (9, 0, "")),
+            ("", "some text", (0, 0, "some text")),
+            ("some text", "", (0, 9, "")),
+            ("some text", "some text appended", (9, 0, " appended")),
+            ("some text", "some new text", (5, 0, "new ")),
+            ("some new text", "some text", (5, 4, "")),
+            ("some text", "some test", (7, 1, "s")),
+            ("aaa", "aaaa", (3, 0, "a")),
+        ],
+    )
+    def test_get_text_delta(self, before, after, result):
+        assert get_text_delta(before=before, after=after) == result
+
+        position, deleted_length, inserted_text = get_text_delta(
+            before=before, after=after
+        )
+        assert (
+            before[:position] + inserted_text + before[position + deleted_length :]
+            == after
+        )
+
+    def test_get_text_delta_chunks(self):
+        before = "a" * TEXT_DELTA_CHUNK_SIZE * 3
+        after = (
+            "a" * (TEXT_DELTA_CHUNK_SIZE + 5) + "b" + "a" * TEXT_DELTA_CHUNK_SIZE * 2
+        )
+
+        assert (
+            _get_common_prefix_length(
+                before=before, after=after, max_length=len(before)
+            )
+            == TEXT_DELTA_CHUNK_SIZE + 5
+        )
+        assert (
+            _get_common_suffix_length(
+                before=before, after=after, max_length=len(before)
+            )
+            == TEXT_DELTA_CHUNK_SIZE * 2
+        )
+        assert get_text_delta(before=before, after=after) == (
+            TEXT_DELTA_CHUNK_SIZE + 5,
+            0,
+            "baaaaa",
+        )
+
+
+class TestMergeMemo:
+    def test_put_get(self):
+        memo = MergeMemo(max_size=10)
+        key = (DIFF_ENGINE_PATIENCE, b"before", b"after")
+
+        assert memo.get(key=key) is None
+
+        memo.put(key=key, result="merged")
+        assert memo.get(key=key) == "merged"
+        assert memo.get(key=(DIFF_ENGINE_MYERS, b"before", b"after")) is None
+        assert memo.size == 6
+
+        memo.put(key=key, result="merged 2")
+        assert memo.size == 8
+
+        memo.clear()
+        assert memo.get(key=key) is None
+        assert memo.size == 0
+
+    def test_put_max_size(self):
+        memo = MergeMemo(max_size=10)
+        first_key = (DIFF_ENGINE_PATIENCE, b"first", b"after")
+        second_key = (DIFF_ENGINE_PATIENCE, b"second", b"after")
+        third_key = (DIFF_ENGINE_PATIENCE, b"third", b"after")
+
+        memo.put(key=first_key, result="1234")
+        memo.put(key=second_key, result="1234")
+        # the first result is used most recently so the second one gets evicted
+        assert memo.get(key=first_key)
+        memo.put(key=third_key, result="1234")
+
+        assert memo.get(key=first_key)
+        assert memo.get(key=second_key) is None
+        assert memo.get(key=third_key)
+        assert memo.size == 8
+
+        # a result larger than the memo is not kept
+        memo.put(key=second_key, result="12345678901")
+        assert memo.get(key=second_key) is None
+        assert memo.size == 8
+
+
+class TestTextPatch:
+    @pytest.mark.parametrize(
+        "before, after, result",
+        [
+            ("some text", "some text", []),
+            ("some text", "some text appended", [(9, 0, " appended")]),
+            ("some text", "text", [(0, 5, "")]),
+            ("some text", "some test", [(7, 1, "s")]),
+            (
+                "line one\nline two\nline three\nline four\n",
+                "line 1\nline two\nline three\nline 4\n",
+                [(5, 3, "1"), (34, 4, "4")],
+            ),
+            (
+                "first\nsecond\nthird",
+                "first\ninserted\nsecond\nchanged",
+                [(6, 0, "inserted\n"), (13, 4, "change")],
+            ),
+        ],
+    )
+    def test_get_text_patch(self, before, after, result):
+        assert get_text_patch(before=before, after=after) == result
+        assert apply_text_patch(input_text=before, patch=result) == after
+
+
+CONFLICT_HUNKS = [
+    MergeHunk(
+        kind=MERGE_HUNK_CLEAN, local="first\n", external="first\n", start=0, end=6
+    ),
+    MergeHunk(
+        kind=MERGE_HUNK_CONFLICT,
+        local="local\n",
+        external="external\n",
+        start=6,
+        end=60,
+    ),
+    MergeHunk(
+        kind=MERGE_HUNK_CLEAN, local="last\n", external="last\n", start=60, end=65
+    ),
+]
+
+
+class TestMergeHunks:
+    def test_get_merge_hunks(self):
+        assert get_merge_hunks(
+            before="first\nexternal\nlast\n", after="first\nlocal\nlast\n"
+        ) == CONFLICT_HUNKS
+        assert get_merge_hunks_text(hunks=CONFLICT_HUNKS) == (
+            "first\n<<<<<<< local\nlocal\n=======\nexternal\n>>>>>>> external\nlast\n"
+        )
+        for hunk in CONFLICT_HUNKS:
+            assert get_merge_hunks_text(hunks=CONFLICT_HUNKS)[
+                hunk.start : hunk.end
+            ] == hunk.text
+
+        # the lines inserted or deleted on one side only are not in conflict
+        assert get_merge_hunks(
+            before="first\nexternal\nlast\n", after="first\nlast\nappended\n"
+        ) == [
+            MergeHunk(
+                kind=MERGE_HUNK_CLEAN,
+                local="first\nexternal\nlast\nappended\n",
+                external="first\nexternal\nlast\nappended\n",
+                start=0,
+                end=29,
+            )
+        ]
+        assert get_merge_hunks(before="same", after="same") == [
+            MergeHunk(
+                kind=MERGE_HUNK_CLEAN, local="same", external="same", start=0, end=4
+            )
+        ]
+        assert get_merge_hunks(before="", after="") == []
+
+    @pytest.mark.parametrize(
+        "engine", [DIFF_ENGINE_DIFFLIB, DIFF_ENGINE_MYERS, DIFF_ENGINE_PATIENCE]
+    )
+    def test_get_merge_hunks_three_way(self, engine):
+        # only the lines changed on both sides are in conflict
+        assert (
+            get_merge_hunks(
+                before="first\nexternal\nlast\n",
+                after="first\nlocal\nlast\n",
+                base="first\nbase\nlast\n",
+                engine=engine,
+            )
+            == CONFLICT_HUNKS
+        )
+        assert get_merge_hunks(
+            before="first\nexternal\nmiddle\nlast\n",
+            after="first\nbase\nmiddle\n",
+            base="first\nbase\nmiddle\nlast\n",
+            engine=engine,
+        ) == [
+            MergeHunk(
+                kind=MERGE_HUNK_CLEAN,
+                local="first\nexternal\nmiddle\n",
+                external="first\nexternal\nmiddle\n",
+                start=0,
+                end=22,
+            )
+        ]
+        # the hunks are made of whole lines
+        assert [
+            (hunk.kind, hunk.local, hunk.external)
+            for hunk in get_merge_hunks(
+                before="l1\nl2\nl3 ext\n",
+                after="l1\nl3\n",
+                base="l1\nl2\nl3\n",
+                engine=engine,
+            )
+        ] == [
+            (MERGE_HUNK_CLEAN, "l1\n", "l1\n"),
+            (MERGE_HUNK_CONFLICT, "l3\n", "l2\nl3 ext\n"),
+        ]
+
+    def test_get_conflict_marker_hunks(self):
+        assert (
+            get_conflict_marker_hunks(
+                before="first\nexternal\nlast\n", after="first\nlocal\nlast\n"
+            )
+            == CONFLICT_HUNKS
+        )
+        assert get_conflict_marker_hunks(before="same", after="same") == [
+            MergeHunk(
+                kind=MERGE_HUNK_CLEAN, local="same", external="same", start=0, end=4
+            )
+        ]
+
+    @pytest.mark.parametrize(
+        "position, include_current, result",
+        [(0, False, 1), (6, False, 1), (7, False, 1), (7, True, 1), (60, True, 1)],
+    )
+    def test_get_next_conflict_hunk_index(self, position, include_current, result):
+        assert (
+            get_next_conflict_hunk_index(
+                hunks=CONFLICT_HUNKS, position=position, include_current=include_current
+            )
+            == result
+        )
+        assert (
+            get_next_conflict_hunk_index(hunks=CONFLICT_HUNKS[:1], position=0) is None
+        )
+
+    @pytest.mark.parametrize(
+        "resolution, text",
+        [
+            (MERGE_RESOLUTION_LOCAL, "local\n"),
+            (MERGE_RESOLUTION_EXTERNAL, "external\n"),
+            (MERGE_RESOLUTION_BOTH, "local\nexternal\n"),
+        ],
+    )
+    def test_resolve_merge_hunk(self, resolution, text):
+        hunks, edit = resolve_merge_hunk(
+            hunks=CONFLICT_HUNKS, hunk_index=1, resolution=resolution
+        )
+
+        assert edit == (6, 54, text)
+        assert get_merge_hunks_text(hunks=hunks) == f"first\n{text}last\n"
+        for hunk in hunks:
+            assert get_merge_hunks_text(hunks=hunks)[hunk.start : hunk.end] == hunk.text
+        assert get_next_conflict_hunk_index(hunks=hunks, position=0) is None
+
+        with pytest.raises(ValueError):
+            resolve_merge_hunk(hunks=hunks, hunk_index=1, resolution=resolution)
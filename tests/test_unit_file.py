@@ -1,3 +1,5 @@
+import gzip
+import os
 import uuid
 
 import pytest
@@ -5,9 +7,20 @@ import pytest
 from notes_app.defaults import Defaults
 from notes_app.file import (
     get_validated_file_path,
+    File,
+    MemoryMappedSections,
+    SectionRegistry,
     transform_section_separator_to_section_name,
     transform_section_name_to_section_separator,
 )
+from notes_app.journal import (
+    JOURNAL_RECORD_OPERATION_PATCH,
+    JOURNAL_RECORD_OPERATION_SET,
+    get_journal_file_path,
+    read_journal_records,
+)
+from notes_app.section_index import get_section_index_file_path, read_section_index
+from notes_app.section_separator import get_section_separator_grammar
 
 defaults = Defaults()
 
@@ -38,15 +51,129 @@ def test_transform_section_name_to_section_separator(get_file):
     )
 
 
-class TestFile:
-    def test__get_validated_raw_data(self, get_file):
-        raw_data = get_file.get_raw_data_content()
+class TestMemoryMappedSections:
+    def test_memory_mapped_sections(self):
+        sections = MemoryMappedSections(
+            file_path=defaults.DEFAULT_NOTES_FILE_NAME,
+            section_separator_grammar=get_section_separator_grammar(defaults=defaults),
+            encoding=defaults.DEFAULT_NOTES_FILE_ENCODING,
+            cache_size=1,
+        )
+        assert list(sections) == ["<section=first> ", "<section=second> "]
+        assert sections == {
+            "<section=first> ": "Quod equidem non reprehendo\n",
+            "<section=second> ": "Quis istum dolorem timet",
+        }
+        assert len(sections._cache) == 1
+
+        sections["<section=a> "] = "some content"
+        del sections["<section=first> "]
+        assert sections == {
+            "<section=second> ": "Quis istum dolorem timet",
+            "<section=a> ": "some content",
+        }
+        sections.close()
+
+    @pytest.mark.parametrize(
+        "changed_data, expected_sections",
+        [
+            (
+                "<section=first> Quod\n<section=second> Quis",
+                {"<section=first> ": "Quod\n", "<section=second> ": "Quis"},
+            ),
+            (
+                "<section=second> Quis",
+                {"<section=first> ": "", "<section=second> ": "Quis"},
+            ),
+            ("", {"<section=first> ": "", "<section=second> ": ""}),
+        ],
+    )
+    def test_memory_mapped_sections_file_changed(
+        self, get_file, changed_data, expected_sections
+    ):
+        sections = MemoryMappedSections(
+            file_path=get_file._file_path,
+            section_separator_grammar=get_section_separator_grammar(defaults=defaults),
+            encoding=defaults.DEFAULT_NOTES_FILE_ENCODING,
+            cache_size=1,
+        )
+        # the file truncated on disk is mapped again instead of crashing with SIGBUS
+        with open(get_file._file_path, mode="w") as f:
+            f.write(changed_data)
+
+        assert dict(sections) == expected_sections
+        sections.close()
+
+    def test_memory_mapped_sections_empty_file(self, get_empty_file_file_path):
+        with pytest.raises(ValueError):
+            MemoryMappedSections(
+                file_path=get_empty_file_file_path,
+                section_separator_grammar=get_section_separator_grammar(
+                    defaults=defaults
+                ),
+                encoding=defaults.DEFAULT_NOTES_FILE_ENCODING,
+                cache_size=1,
+            )
+
+
+class TestSectionRegistry:
+    def test_section_registry(self):
+        section_registry = SectionRegistry(
+            section_separator_grammar=get_section_separator_grammar(defaults=defaults),
+            section_separators=["<section=b> ", "<section=a> ", "<section=test>"],
+        )
+
+        assert section_registry.section_separators_sorted == [
+            "<section=a> ",
+            "<section=b> ",
+            "<section=test>",
+        ]
         assert (
-            get_file._get_validated_raw_data(raw_data=raw_data)
-            == """<section=first> Quod equidem non reprehendo
-<section=second> Quis istum dolorem timet"""
+            section_registry.get_section_name(section_separator="<section=a> ") == "a"
+        )
+        assert (
+            section_registry.get_section_name(section_separator="<section=test>")
+            is None
+        )
+        assert (
+            section_registry.get_section_separator(section_name="b") == "<section=b> "
+        )
+        assert section_registry.get_section_separator(section_name="c") is None
+
+        assert section_registry.add(section_separator="<section=ab> ") is None
+        assert section_registry.add(section_separator="<section=ab> ") is None
+        assert section_registry.remove(section_separator="<section=b> ") is None
+        assert section_registry.remove(section_separator="<section=b> ") is None
+
+        assert section_registry.section_separators_sorted == [
+            "<section=a> ",
+            "<section=ab> ",
+            "<section=test>",
+        ]
+        assert len(section_registry) == 3
+        assert "<section=ab> " in section_registry
+        assert "<section=b> " not in section_registry
+        assert section_registry.get_section_separator(section_name="b") is None
+        assert (
+            section_registry.get_section_separator(section_name="ab") == "<section=ab> "
         )
 
+
+class TestFile:
+    def test__get_section_offsets(self, get_file):
+        assert get_file._get_section_offsets(
+            raw_data="""<section=first> Quod equidem non reprehendo
+<section=second> Quis istum dolorem timet"""
+        ) == [("<section=first> ", 16, 44), ("<section=second> ", 61, 85)]
+
+        assert get_file._get_section_offsets(raw_data="<section=a> <section=b> b") == [
+            ("<section=a> ", 12, 12),
+            ("<section=b> ", 24, 25),
+        ]
+
+        with pytest.raises(ValueError):
+            get_file._get_section_offsets(raw_data="no section separator")
+
     def test_reload(self, get_file):
         get_file.set_section_content(
             section_separator="<section=third>", section_content="test"
@@ -56,12 +183,304 @@ class TestFile:
             "<section=second> ": "Quis istum dolorem timet",
             "<section=third>": "test",
         }
-        get_file.reload()
+        # the unsaved section was never in the file and is kept
+        assert get_file.reload() == set()
         assert get_file._data_by_sections == {
             "<section=first> ": "Quod equidem non reprehendo\n",
             "<section=second> ": "Quis istum dolorem timet",
+            "<section=third>": "test",
+        }
+
+    def test_reload_changed_sections(self, get_file):
+        other_file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=get_file.defaults,
+        )
+
+        other_file.set_section_content(
+            section_separator="<section=second> ", section_content="some content"
+        )
+        other_file.set_section_content(
+            section_separator="<section=a> ", section_content="some content"
+        )
+        other_file.delete_section_content(section_separator="<section=first> ")
+        other_file.save()
+
+        assert get_file.reload() == {
+            "<section=first> ",
+            "<section=second> ",
+            "<section=a> ",
+        }
+        assert get_file.reload() == set()
+
+        # rewriting the file without changing any section content
+        other_file.delete_all_sections_content()
+        other_file.set_section_content(
+            section_separator="<section=a> ", section_content="some content"
+        )
+        other_file.set_section_content(
+            section_separator="<section=second> ", section_content="some content"
+        )
+        other_file.save()
+
+        assert get_file.reload() == set()
+        assert list(get_file._data_by_sections) == ["<section=a> ", "<section=second> "]
+
+    @pytest.mark.parametrize("memory_mapped", [False, True])
+    def test_reload_section_bases(self, get_file, memory_mapped):
+        file_defaults = Defaults()
+        file_defaults.DEFAULT_FILE_MEMORY_MAPPED = memory_mapped
+        file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=file_defaults,
+        )
+        other_file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=get_file.defaults,
+        )
+        # memory mapped sections keep the contents read before the reload
+        assert file.get_section_content(section_separator="<section=first> ")
+        assert file.get_section_content(section_separator="<section=second> ")
+
+        other_file.set_section_content(
+            section_separator="<section=first> ", section_content="first content"
+        )
+        other_file.set_section_content(
+            section_separator="<section=second> ", section_content="second content"
+        )
+        other_file.save()
+
+        assert file.get_section_base(section_separator="<section=first> ") is None
+        assert file.reload() == {"<section=first> ", "<section=second> "}
+        assert (
+            file.get_section_base(section_separator="<section=first> ")
+            == "Quod equidem non reprehendo\n"
+        )
+
+        # the base is kept until the next save
+        other_file.set_section_content(
+            section_separator="<section=first> ", section_content="other content"
+        )
+        other_file.save()
+        assert file.reload() == {"<section=first> "}
+        assert (
+            file.get_section_base(section_separator="<section=first> ")
+            == "Quod equidem non reprehendo\n"
+        )
+
+        file.rename_section(
+            old_section_separator="<section=second> ",
+            new_section_separator="<section=renamed> ",
+        )
+        assert file.get_section_base(section_separator="<section=second> ") is None
+        assert (
+            file.get_section_base(section_separator="<section=renamed> ")
+            == "Quis istum dolorem timet"
+        )
+        file.delete_section_content(section_separator="<section=renamed> ")
+        assert file.get_section_base(section_separator="<section=renamed> ") is None
+
+        file.save()
+        assert file.get_section_base(section_separator="<section=first> ") is None
+
+    def test_reload_section_bases_edited_section(self, get_file):
+        other_file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=get_file.defaults,
+        )
+        other_file.set_section_content(
+            section_separator="<section=first> ", section_content="first content"
+        )
+        other_file.save()
+
+        # the edited section content is not the content of the file
+        get_file.set_section_content(
+            section_separator="<section=first> ", section_content="edited content"
+        )
+        assert (
+            get_file.get_section_base(section_separator="<section=first> ")
+            == "Quod equidem non reprehendo\n"
+        )
+        assert get_file.reload() == {"<section=first> "}
+        # the edit is merged with the file content which becomes the section base
+        assert (
+            get_file.get_section_content(section_separator="<section=first> ")
+            == "first edited content"
+        )
+        assert (
+            get_file.get_section_base(section_separator="<section=first> ")
+            == "first content"
+        )
+
+    @pytest.mark.parametrize("memory_mapped", [False, True])
+    def test_reload_merge_local_section_changes(self, get_file, memory_mapped):
+        file_defaults = Defaults()
+        file_defaults.DEFAULT_FILE_MEMORY_MAPPED = memory_mapped
+        file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=file_defaults,
+        )
+        other_file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=get_file.defaults,
+        )
+
+        file.edit_section_content(
+            section_separator="<section=first> ",
+            position=13,
+            deleted_length=4,
+            inserted_text="",
+        )
+        file.set_section_content(
+            section_separator="<section=a> ", section_content="local text"
+        )
+        file.set_section_content(
+            section_separator="<section=b> ", section_content="local only"
+        )
+        file.delete_section_content(section_separator="<section=second> ")
+
+        other_file.set_section_content(
+            section_separator="<section=first> ",
+            section_content="Quod equidem non reprehendo\nappended",
+        )
+        other_file.set_section_content(
+            section_separator="<section=a> ", section_content="remote text"
+        )
+        other_file.save()
+
+        assert file.reload() == {"<section=first> ", "<section=a> "}
+        assert dict(file._data_by_sections.items()) == {
+            "<section=first> ": "Quod equidem reprehendo\nappended",
+            "<section=a> ": "remote local text",
+            "<section=b> ": "local only",
+        }
+        assert (
+            file.get_section_base(section_separator="<section=first> ")
+            == "Quod equidem non reprehendo\nappended"
+        )
+        # the section added on both sides has no common base
+        assert file.get_section_base(section_separator="<section=a> ") is None
+        assert file.save() is None
+        assert (
+            file.get_raw_data_content()
+            == "<section=first> Quod equidem reprehendo\nappended"
+            "<section=a> remote local text<section=b> local only"
+        )
+
+    def test_reload_merge_local_section_changes_deleted_sections(self, get_file):
+        other_file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=get_file.defaults,
+        )
+
+        get_file.set_section_content(
+            section_separator="<section=first> ", section_content="edited first"
+        )
+        get_file.set_section_content(
+            section_separator="<section=second> ", section_content="edited second"
+        )
+
+        # the first section is renamed, the second one is deleted in the file
+        other_file.rename_section(
+            old_section_separator="<section=first> ",
+            new_section_separator="<section=renamed> ",
+        )
+        other_file.delete_section_content(section_separator="<section=second> ")
+        other_file.save()
+
+        assert get_file.reload() == {
+            "<section=first> ",
+            "<section=second> ",
+            "<section=renamed> ",
+        }
+        # the edits move to the renamed section, the deleted section is restored
+        assert get_file._data_by_sections == {
+            "<section=renamed> ": "edited first",
+            "<section=second> ": "edited second",
+        }
+        assert get_file.get_section_base(section_separator="<section=first> ") is None
+        assert get_file.get_section_base(section_separator="<section=second> ") is None
+
+        get_file.save()
+        get_file.delete_section_content(section_separator="<section=second> ")
+        other_file.reload()
+        other_file.set_section_content(
+            section_separator="<section=second> ", section_content="changed second"
+        )
+        other_file.save()
+
+        # the section deleted in memory but changed in the file is kept
+        assert get_file.reload() == {"<section=second> "}
+        assert get_file._data_by_sections == {
+            "<section=renamed> ": "edited first",
+            "<section=second> ": "changed second",
+        }
+
+    def test_reload_merge_local_section_changes_renamed_section(self, get_file):
+        other_file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=get_file.defaults,
+        )
+
+        # the first section is renamed and edited in memory
+        get_file.rename_section(
+            old_section_separator="<section=first> ",
+            new_section_separator="<section=renamed> ",
+        )
+        get_file.set_section_content(
+            section_separator="<section=renamed> ",
+            section_content="Quod equidem non reprehendo\nlocal",
+        )
+
+        # while it is edited in the file under its previous separator
+        other_file.set_section_content(
+            section_separator="<section=first> ",
+            section_content="Remote quod equidem non reprehendo\n",
+        )
+        other_file.save()
+
+        assert get_file.reload() == {"<section=first> ", "<section=renamed> "}
+        # the edits of both sides end up once in the renamed section
+        assert get_file._data_by_sections == {
+            "<section=renamed> ": "Remote quod equidem non reprehendo\nlocal",
+            "<section=second> ": "Quis istum dolorem timet",
+        }
+        assert get_file.section_separators_sorted == [
+            "<section=renamed> ",
+            "<section=second> ",
+        ]
+        assert (
+            get_file.get_section_base(section_separator="<section=renamed> ")
+            == "Remote quod equidem non reprehendo\n"
+        )
+
+        # the next edit in the file is merged into the renamed section again
+        other_file.set_section_content(
+            section_separator="<section=first> ",
+            section_content="Remote quod equidem non reprehendo\nagain\n",
+        )
+        other_file.save()
+        assert get_file.reload() == {"<section=first> ", "<section=renamed> "}
+        assert get_file._data_by_sections == {
+            "<section=renamed> ": "Remote quod equidem non reprehendo\nagain\nlocal",
+            "<section=second> ": "Quis istum dolorem timet",
         }
 
+        get_file.save()
+        assert (
+            get_file.get_raw_data_content()
+            == "<section=second> Quis istum dolorem timet"
+            "<section=renamed> Remote quod equidem non reprehendo\nagain\nlocal"
+        )
+
     def test_get_raw_data_content(self, get_file):
         raw_data = get_file.get_raw_data_content()
         assert (
@@ -81,6 +500,30 @@ class TestFile:
             "<section=second> ",
         ]
 
+    def test_get_section_name(self, get_file):
+        assert (
+            get_file.get_section_name(section_separator="<section=first> ") == "first"
+        )
+        assert get_file.get_section_name(section_separator="<section=a> ") is None
+
+    def test_get_section_separator(self, get_file):
+        assert (
+            get_file.get_section_separator(section_name="first") == "<section=first> "
+        )
+        assert get_file.get_section_separator(section_name="a") is None
+
+    def test_is_section_name_used(self, get_file):
+        assert get_file.is_section_name_used(section_name="second") is True
+        assert get_file.is_section_name_used(section_name="a") is False
+
+        get_file.set_section_content(
+            section_separator="<section=a> ", section_content="some content"
+        )
+        assert get_file.is_section_name_used(section_name="a") is True
+
+        get_file.delete_section_content(section_separator="<section=a> ")
+        assert get_file.is_section_name_used(section_name="a") is False
+
     def test_set_get_section_content(self, get_file):
         assert (
             get_file.set_section_content(
@@ -93,9 +536,73 @@ class TestFile:
             == "some content"
         )
 
+    def test_edit_section_content(self, get_file):
+        assert (
+            get_file.edit_section_content(
+                section_separator="<section=second> ",
+                position=10,
+                deleted_length=0,
+                inserted_text=" new",
+            )
+            is None
+        )
+        get_file.edit_section_content(
+            section_separator="<section=second> ",
+            position=0,
+            deleted_length=4,
+            inserted_text="Sed quis",
+        )
+        assert get_file._dirty_sections == {"<section=second> ": 0}
+
+        assert (
+            get_file.get_section_content(section_separator="<section=second> ")
+            == "Sed quis istum new dolorem timet"
+        )
+
+        # an empty edit leaves the section unchanged
+        get_file.edit_section_content(
+            section_separator="<section=first> ",
+            position=28,
+            deleted_length=0,
+            inserted_text="",
+        )
+        assert "<section=first> " not in get_file._dirty_sections
+
+        with pytest.raises(KeyError):
+            get_file.edit_section_content(
+                section_separator="<section=a> ",
+                position=0,
+                deleted_length=0,
+                inserted_text="some content",
+            )
+        with pytest.raises(IndexError):
+            get_file.edit_section_content(
+                section_separator="<section=second> ",
+                position=30,
+                deleted_length=5,
+                inserted_text="",
+            )
+
+    def test_save_edited_section_content(self, get_file):
+        get_file.edit_section_content(
+            section_separator="<section=second> ",
+            position=10,
+            deleted_length=0,
+            inserted_text=" new",
+        )
+        # the file is rewritten from the edit position
+        assert get_file._get_first_changed_section() == (1, 10, 71)
+        assert get_file.save() is None
+        assert (
+            get_file.get_raw_data_content()
+            == """<section=first> Quod equidem non reprehendo
+<section=second> Quis istum new dolorem timet"""
+        )
+
     def test_delete_all_sections_content(self, get_file):
         assert get_file.delete_all_sections_content() is None
         assert get_file._data_by_sections == {}
+        assert get_file.section_separators_sorted == []
 
     def test_delete_section_content(self, get_file):
         get_file.set_section_content(
@@ -104,6 +611,10 @@ class TestFile:
         assert get_file.delete_section_content(section_separator="<section=a> ") is None
         with pytest.raises(KeyError):
             get_file.get_section_content(section_separator="<section=a> ")
+        assert get_file.section_separators_sorted == [
+            "<section=first> ",
+            "<section=second> ",
+        ]
 
     def test_rename_section(self, get_file):
         get_file.set_section_content(
@@ -127,6 +638,8 @@ class TestFile:
             section_separator
             for section_separator in get_file.section_separators_sorted
         ] == ["<section=b> ", "<section=first> ", "<section=second> ",]
+        assert get_file.get_section_separator(section_name="a") is None
+        assert get_file.get_section_separator(section_name="b") == "<section=b> "
 
     def test__transform_raw_data_content_to_data_by_sections(self, get_file):
         assert get_file._transform_raw_data_content_to_data_by_sections() == {
@@ -134,6 +647,424 @@ class TestFile:
             "<section=second> ": "Quis istum dolorem timet",
         }
 
+    def test_save(self, get_file):
+        get_file.set_section_content(
+            section_separator="<section=a> ", section_content="some content"
+        )
+        assert get_file.save() is None
+        assert (
+            get_file.get_raw_data_content()
+            == """<section=first> Quod equidem non reprehendo
+<section=second> Quis istum dolorem timet<section=a> some content"""
+        )
+
+    def test__get_first_changed_section(self, get_file):
+        assert get_file._get_first_changed_section() == (2, 0, 85)
+
+        get_file.set_section_content(
+            section_separator="<section=second> ",
+            section_content="Quis istum dolorem timet appended",
+        )
+        assert get_file._get_first_changed_section() == (1, 24, 85)
+
+        get_file.set_section_content(
+            section_separator="<section=second> ", section_content="Quis"
+        )
+        assert get_file._get_first_changed_section() == (1, 0, 44)
+
+        get_file.delete_section_content(section_separator="<section=first> ")
+        assert get_file._get_first_changed_section() == (0, 0, 0)
+
+    def test_save_changed_sections(self, get_file):
+        get_file.set_section_content(
+            section_separator="<section=second> ",
+            section_content="Quis istum dolorem timet appended",
+        )
+        get_file.set_section_content(
+            section_separator="<section=a> ", section_content="some content"
+        )
+        assert get_file.save() is None
+        assert get_file._dirty_sections == {}
+        assert get_file._synced_section_byte_offsets == {
+            "<section=first> ": (0, 16),
+            "<section=second> ": (44, 61),
+            "<section=a> ": (94, 106),
+        }
+        assert (
+            get_file.get_raw_data_content()
+            == """<section=first> Quod equidem non reprehendo
+<section=second> Quis istum dolorem timet appended<section=a> some content"""
+        )
+
+    def test_save_to_journal(self, get_file):
+        journal_defaults = Defaults()
+        journal_defaults.DEFAULT_FILE_JOURNAL_ENABLED = True
+
+        file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=journal_defaults,
+        )
+        other_file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=journal_defaults,
+        )
+
+        file.set_section_content(
+            section_separator="<section=a> ", section_content="some content"
+        )
+        file.delete_section_content(section_separator="<section=first> ")
+        assert file.save() is None
+
+        # the file itself is not rewritten, the records are replayed when reading it
+        with open(file._file_path) as f:
+            assert (
+                f.read()
+                == """<section=first> Quod equidem non reprehendo
+<section=second> Quis istum dolorem timet"""
+            )
+        assert (
+            file.get_raw_data_content()
+            == """<section=second> Quis istum dolorem timet<section=a> some content"""
+        )
+
+        assert other_file.reload() == {"<section=first> ", "<section=a> "}
+        assert other_file._data_by_sections == {
+            "<section=second> ": "Quis istum dolorem timet",
+            "<section=a> ": "some content",
+        }
+
+        os.remove(get_journal_file_path(file_path=file._file_path))
+
+    def test_save_to_journal_patch(self, get_file):
+        journal_defaults = Defaults()
+        journal_defaults.DEFAULT_FILE_JOURNAL_ENABLED = True
+        journal_defaults.DEFAULT_FILE_JOURNAL_SNAPSHOT_PATCH_COUNT = 2
+
+        file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=journal_defaults,
+        )
+        other_file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=journal_defaults,
+        )
+
+        def get_journal_operations():
+            records, _ = read_journal_records(file_path=file._file_path)
+            return [record["operation"] for record in records]
+
+        # the edited section is saved as a patch of its synced content
+        file.edit_section_content(
+            section_separator="<section=second> ",
+            position=24,
+            deleted_length=0,
+            inserted_text=" a",
+        )
+        assert file.save() is None
+        assert get_journal_operations() == [JOURNAL_RECORD_OPERATION_PATCH]
+
+        assert other_file.reload() == {"<section=second> "}
+        assert other_file._data_by_sections == {
+            "<section=first> ": "Quod equidem non reprehendo\n",
+            "<section=second> ": "Quis istum dolorem timet a",
+        }
+
+        file.edit_section_content(
+            section_separator="<section=second> ",
+            position=0,
+            deleted_length=4,
+            inserted_text="Quid",
+        )
+        assert file.save() is None
+        # the section patched DEFAULT_FILE_JOURNAL_SNAPSHOT_PATCH_COUNT times
+        # gets a snapshot
+        file.edit_section_content(
+            section_separator="<section=second> ",
+            position=26,
+            deleted_length=0,
+            inserted_text="b",
+        )
+        assert file.save() is None
+        # a patch about the size of the section gets a snapshot too
+        file.set_section_content(
+            section_separator="<section=first> ", section_content="changed content"
+        )
+        assert file.save() is None
+        assert get_journal_operations() == [
+            JOURNAL_RECORD_OPERATION_PATCH,
+            JOURNAL_RECORD_OPERATION_PATCH,
+            JOURNAL_RECORD_OPERATION_SET,
+            JOURNAL_RECORD_OPERATION_SET,
+        ]
+
+        assert other_file.reload() == {"<section=first> ", "<section=second> "}
+        assert other_file._data_by_sections == {
+            "<section=first> ": "changed content",
+            "<section=second> ": "Quid istum dolorem timet ab",
+        }
+        assert (
+            file.get_raw_data_content()
+            == "<section=first> changed content"
+            "<section=second> Quid istum dolorem timet ab"
+        )
+
+        os.remove(get_journal_file_path(file_path=file._file_path))
+
+    def test_save_to_journal_other_instance(self, get_file):
+        journal_defaults = Defaults()
+        journal_defaults.DEFAULT_FILE_JOURNAL_ENABLED = True
+
+        file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=journal_defaults,
+        )
+        other_file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=journal_defaults,
+        )
+
+        file.set_section_content(
+            section_separator="<section=a> ", section_content="first line\n"
+        )
+        assert file.save() is None
+        # the other instance replays the records of the first one before appending
+        other_file.set_section_content(
+            section_separator="<section=a> ", section_content="other line\n"
+        )
+        assert other_file.save() is None
+        assert (
+            other_file.get_section_content(section_separator="<section=a> ")
+            == "first other line\n"
+        )
+        # the records appended by the other instance are not skipped
+        file.edit_section_content(
+            section_separator="<section=a> ",
+            position=0,
+            deleted_length=0,
+            inserted_text="new ",
+        )
+        assert file.save() is None
+
+        for saved_file in (
+            file,
+            File(
+                file_path=get_file._file_path,
+                controller=get_file._controller,
+                defaults=journal_defaults,
+            ),
+        ):
+            assert (
+                saved_file.get_section_content(section_separator="<section=a> ")
+                == "new first other line\n"
+            )
+
+        os.remove(get_journal_file_path(file_path=file._file_path))
+
+    def test_section_index(self, get_file):
+        section_index_defaults = Defaults()
+        section_index_defaults.DEFAULT_FILE_SECTION_INDEX_ENABLED = True
+
+        file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=section_index_defaults,
+        )
+        assert read_section_index(file_path=file._file_path)["sections"] == [
+            ["<section=first> ", 0, 16, 44, file._section_hashes["<section=first> "]],
+            ["<section=second> ", 44, 61, 85, file._section_hashes["<section=second> "]],
+        ]
+
+        file.set_section_content(
+            section_separator="<section=a> ", section_content="some content"
+        )
+        file.save()
+        assert read_section_index(file_path=file._file_path)["sections"][2] == [
+            "<section=a> ",
+            85,
+            97,
+            109,
+            file._section_hashes["<section=a> "],
+        ]
+
+        # the sections are sliced by the index offsets instead of being parsed
+        file_from_section_index = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=section_index_defaults,
+        )
+        assert file_from_section_index._data_by_sections == file._data_by_sections
+        assert file_from_section_index._section_hashes == file._section_hashes
+
+        os.remove(get_section_index_file_path(file_path=file._file_path))
+
+    def test_search_index(self, get_file):
+        search_index_defaults = Defaults()
+        search_index_defaults.DEFAULT_FILE_SEARCH_INDEX_ENABLED = True
+
+        file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=search_index_defaults,
+        )
+        assert file.get_search_candidate_section_separators(
+            pattern="dolor", full_words=False
+        ) == ["<section=second> "]
+        # a regular expression is not narrowed down
+        assert (
+            file.get_search_candidate_section_separators(
+                pattern="dolor|equidem", full_words=False, regex=True
+            )
+            is None
+        )
+
+        file.set_section_content(
+            section_separator="<section=a> ", section_content="dolor added"
+        )
+        file.edit_section_content(
+            section_separator="<section=first> ",
+            position=0,
+            deleted_length=0,
+            inserted_text="dolor ",
+        )
+        assert file.get_search_candidate_section_separators(
+            pattern="dolor", full_words=True
+        ) == ["<section=a> ", "<section=first> "]
+
+        file.rename_section(
+            old_section_separator="<section=a> ",
+            new_section_separator="<section=b> ",
+        )
+        file.delete_section_content(section_separator="<section=first> ")
+        assert file.get_search_candidate_section_separators(
+            pattern="dolor", full_words=False
+        ) == ["<section=b> ", "<section=second> "]
+        file.save()
+
+        # the sections changed in the file are indexed again after the reload
+        other_file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=get_file.defaults,
+        )
+        other_file.set_section_content(
+            section_separator="<section=second> ", section_content="changed"
+        )
+        other_file.save()
+        file.reload()
+        assert file.get_search_candidate_section_separators(
+            pattern="dolor", full_words=False
+        ) == ["<section=b> "]
+
+        # the search index is disabled by default
+        assert (
+            get_file.get_search_candidate_section_separators(
+                pattern="dolor", full_words=False
+            )
+            is None
+        )
+
+    def test_get_section_case_folded_text(self, get_file):
+        case_folded_text = get_file.get_section_case_folded_text(
+            section_separator="<section=first> "
+        )
+        assert case_folded_text.text == get_file.get_section_content(
+            section_separator="<section=first> "
+        ).casefold()
+        assert (
+            get_file.get_section_case_folded_text(section_separator="<section=first> ")
+            is case_folded_text
+        )
+
+        # the case folded copy is built again once the section changes
+        get_file.edit_section_content(
+            section_separator="<section=first> ",
+            position=0,
+            deleted_length=0,
+            inserted_text="ẞ",
+        )
+        case_folded_text = get_file.get_section_case_folded_text(
+            section_separator="<section=first> "
+        )
+        assert case_folded_text.text.startswith("ss")
+        assert case_folded_text.get_positions([0, 1, 2]) == [0, 0, 1]
+
+        get_file.rename_section(
+            old_section_separator="<section=first> ",
+            new_section_separator="<section=renamed> ",
+        )
+        assert (
+            get_file.get_section_case_folded_text(
+                section_separator="<section=renamed> "
+            )
+            is case_folded_text
+        )
+
+        get_file.delete_section_content(section_separator="<section=renamed> ")
+        assert "<section=renamed> " not in get_file._section_case_folded_texts
+
+    def test_memory_mapped_file(self, get_file):
+        memory_mapped_defaults = Defaults()
+        memory_mapped_defaults.DEFAULT_FILE_MEMORY_MAPPED = True
+
+        file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=memory_mapped_defaults,
+        )
+        assert isinstance(file._data_by_sections, MemoryMappedSections)
+        assert file.section_separators_sorted == [
+            "<section=first> ",
+            "<section=second> ",
+        ]
+
+        file.set_section_content(
+            section_separator="<section=second> ", section_content="some content"
+        )
+        assert file.save() is None
+        assert isinstance(file._data_by_sections, MemoryMappedSections)
+        assert file._data_by_sections == {
+            "<section=first> ": "Quod equidem non reprehendo\n",
+            "<section=second> ": "some content",
+        }
+
+    def test_compressed_file(self, get_file):
+        with open(get_file._file_path, "rb") as f:
+            data = f.read()
+        with open(get_file._file_path, "wb") as f:
+            f.write(gzip.compress(data))
+
+        file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=get_file.defaults,
+        )
+        assert file._data_by_sections == {
+            "<section=first> ": "Quod equidem non reprehendo\n",
+            "<section=second> ": "Quis istum dolorem timet",
+        }
+        assert file._synced_section_byte_offsets is None
+
+        file.set_section_content(
+            section_separator="<section=second> ", section_content="some content"
+        )
+        assert file._get_first_changed_section() == (0, 0, 0)
+        assert file.save() is None
+        assert file._synced_section_byte_offsets is None
+
+        with open(file._file_path, "rb") as f:
+            assert (
+                gzip.decompress(f.read())
+                == b"""<section=first> Quod equidem non reprehendo
+<section=second> some content"""
+            )
+        assert file.reload() == set()
+
     def test_transform_data_by_sections_to_raw_data_content(self, get_file):
         assert (
             get_file.transform_data_by_sections_to_raw_data_content()
@@ -0,0 +1,189 @@
+import os
+
+from notes_app.defaults import Defaults
+from notes_app.journal import (
+    JOURNAL_FILE_SUFFIX,
+    _get_replayed_records,
+    append_journal_records,
+    apply_journal_records,
+    get_delete_section_record,
+    get_journal_content_hash,
+    get_journal_file_path,
+    get_journal_size,
+    get_patch_section_record,
+    get_set_section_record,
+    read_journal_records,
+)
+
+defaults = Defaults()
+
+
+def test_get_journal_file_path():
+    assert (
+        get_journal_file_path(file_path=defaults.DEFAULT_NOTES_FILE_NAME)
+        == f"{defaults.DEFAULT_NOTES_FILE_NAME}{JOURNAL_FILE_SUFFIX}"
+    )
+
+
+class TestJournal:
+    def test_append_read_journal_records(self):
+        file_path = defaults.DEFAULT_NOTES_FILE_NAME
+        assert get_journal_size(file_path=file_path) == 0
+        assert read_journal_records(file_path=file_path) == ([], 0)
+
+        records = [
+            get_set_section_record(
+                section_separator="<section=a> ", section_content="some\ncontent"
+            ),
+            get_delete_section_record(section_separator="<section=first> "),
+        ]
+        journal_start, journal_size = append_journal_records(
+            file_path=file_path, records=records
+        )
+        assert journal_start == 0
+        assert journal_size == get_journal_size(file_path=file_path)
+
+        assert read_journal_records(file_path=file_path) == (records, journal_size)
+        assert read_journal_records(file_path=file_path, offset=journal_size) == (
+            [],
+            journal_size,
+        )
+
+        # an incomplete record is left for the next read
+        with open(get_journal_file_path(file_path=file_path), "ab") as f:
+            f.write(b'{"operation": "set"')
+        assert read_journal_records(file_path=file_path, offset=journal_size) == (
+            [],
+            journal_size,
+        )
+
+        os.remove(get_journal_file_path(file_path=file_path))
+
+    def test_apply_journal_records(self):
+        data_by_sections = {
+            "<section=first> ": "Quod equidem non reprehendo\n",
+            "<section=second> ": "Quis istum dolorem timet",
+        }
+        records = [
+            get_set_section_record(
+                section_separator="<section=a> ", section_content="some content"
+            ),
+            get_set_section_record(
+                section_separator="<section=first> ", section_content="changed"
+            ),
+            get_delete_section_record(section_separator="<section=second> "),
+        ]
+        expected_data_by_sections = {
+            "<section=first> ": "changed",
+            "<section=a> ": "some content",
+        }
+
+        assert (
+            apply_journal_records(data_by_sections=data_by_sections, records=records)
+            is True
+        )
+        assert data_by_sections == expected_data_by_sections
+
+        # replaying the records again results in the same sections
+        apply_journal_records(data_by_sections=data_by_sections, records=records)
+        assert data_by_sections == expected_data_by_sections
+
+    def test_apply_journal_records_patch(self):
+        base = "Quod equidem non reprehendo\n"
+        data_by_sections = {"<section=first> ": base}
+        records = [
+            get_patch_section_record(
+                section_separator="<section=first> ",
+                patch=[(13, 4, ""), (28, 0, "appended")],
+                base_hash=get_journal_content_hash(section_content=base),
+                section_hash=get_journal_content_hash(
+                    section_content="Quod equidem reprehendo\nappended"
+                ),
+            )
+        ]
+
+        assert (
+            apply_journal_records(data_by_sections=data_by_sections, records=records)
+            is True
+        )
+        assert data_by_sections == {
+            "<section=first> ": "Quod equidem reprehendo\nappended"
+        }
+
+        # replaying the patch again results in the same section
+        assert (
+            apply_journal_records(data_by_sections=data_by_sections, records=records)
+            is True
+        )
+        assert data_by_sections == {
+            "<section=first> ": "Quod equidem reprehendo\nappended"
+        }
+
+        # a patch of a different base is left out
+        data_by_sections = {"<section=first> ": "other content"}
+        assert (
+            apply_journal_records(data_by_sections=data_by_sections, records=records)
+            is False
+        )
+        assert data_by_sections == {"<section=first> ": "other content"}
+
+    def test_apply_journal_records_concurrent_patches(self):
+        base = "Quod equidem non reprehendo\n"
+        data_by_sections = {"<section=first> ": base}
+        # both patches were written from the same base content
+        records = [
+            get_patch_section_record(
+                section_separator="<section=first> ",
+                patch=[(13, 4, "")],
+                base_hash=get_journal_content_hash(section_content=base),
+                section_hash=get_journal_content_hash(
+                    section_content="Quod equidem reprehendo\n"
+                ),
+            ),
+            get_patch_section_record(
+                section_separator="<section=first> ",
+                patch=[(28, 0, "appended")],
+                base_hash=get_journal_content_hash(section_content=base),
+                section_hash=get_journal_content_hash(
+                    section_content="Quod equidem non reprehendo\nappended"
+                ),
+            ),
+        ]
+
+        # the second patch is merged with the first one
+        assert (
+            apply_journal_records(data_by_sections=data_by_sections, records=records)
+            is False
+        )
+        assert data_by_sections == {
+            "<section=first> ": "Quod equidem reprehendo\nappended"
+        }
+
+    def test__get_replayed_records(self):
+        records = [
+            get_patch_section_record(
+                section_separator="<section=first> ",
+                patch=[(0, 0, "a")],
+                base_hash="",
+                section_hash="",
+            ),
+            get_patch_section_record(
+                section_separator="<section=second> ",
+                patch=[(0, 0, "a")],
+                base_hash="",
+                section_hash="",
+            ),
+            get_set_section_record(
+                section_separator="<section=first> ", section_content="snapshot"
+            ),
+            get_delete_section_record(section_separator="<section=first> "),
+            get_patch_section_record(
+                section_separator="<section=second> ",
+                patch=[(0, 0, "b")],
+                base_hash="",
+                section_hash="",
+            ),
+        ]
+
+        # the patches preceding the snapshot of their section are not replayed
+        assert _get_replayed_records(records=records) == records[1:]
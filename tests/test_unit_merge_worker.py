@@ -0,0 +1,197 @@
+import threading
+import time
+
+import pytest
+
+from notes_app.merge_worker import MergeWorker
+
+
+class ScheduleStub:
+    def __init__(self):
+        self.scheduled = []
+
+    def __call__(self, callback, timeout):
+        self.scheduled.append((callback, timeout))
+
+    def wait_for(self, count):
+        deadline = time.monotonic() + 5
+        while len(self.scheduled) < count and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert len(self.scheduled) == count
+
+    def run(self, index):
+        callback, _ = self.scheduled[index]
+        callback(0)
+
+
+def get_blocked_merge(event):
+    def merge():
+        event.wait(5)
+        return "merged"
+
+    return merge
+
+
+def raise_error():
+    raise ValueError
+
+
+class TestMergeWorker:
+    def test_submit(self):
+        schedule = ScheduleStub()
+        merge_worker = MergeWorker(schedule=schedule, time_budget=1, inline_wait=5)
+        results = []
+
+        merge_worker.submit(
+            merge=lambda: "merged", fallback=lambda: "fallback", on_result=results.append
+        )
+
+        # finished within the inline wait so delivered right away
+        assert results == ["merged"]
+        assert schedule.scheduled == []
+        assert merge_worker.is_pending is False
+
+    def test_submit_merge_error(self):
+        schedule = ScheduleStub()
+        merge_worker = MergeWorker(schedule=schedule, time_budget=1, inline_wait=5)
+        results = []
+
+        merge_worker.submit(
+            merge=raise_error, fallback=lambda: "fallback", on_result=results.append
+        )
+
+        assert results == ["fallback"]
+        assert merge_worker.is_pending is False
+
+    @pytest.mark.parametrize("merge_error", [False, True])
+    def test_submit_merge_finished_in_time(self, merge_error):
+        schedule = ScheduleStub()
+        merge_worker = MergeWorker(schedule=schedule, time_budget=1, inline_wait=0.01)
+        results = []
+        event = threading.Event()
+
+        def merge():
+            event.wait(5)
+            if merge_error:
+                raise_error()
+            return "merged"
+
+        merge_worker.submit(
+            merge=merge, fallback=lambda: "fallback", on_result=results.append
+        )
+
+        assert results == []
+        assert merge_worker.is_pending is True
+        schedule.wait_for(count=1)
+        # the fallback is scheduled for the rest of the time budget
+        assert schedule.scheduled[0][1] == pytest.approx(0.99)
+
+        event.set()
+        schedule.wait_for(count=2)
+        schedule.run(index=1)
+
+        assert results == ["fallback" if merge_error else "merged"]
+        assert merge_worker.is_pending is False
+
+        # the time budget runs out after the merge result was delivered
+        schedule.run(index=0)
+        assert len(results) == 1
+
+    def test_submit_time_budget_exceeded(self):
+        schedule = ScheduleStub()
+        merge_worker = MergeWorker(schedule=schedule, time_budget=0, inline_wait=0.01)
+        results = []
+        event = threading.Event()
+
+        merge_worker.submit(
+            merge=get_blocked_merge(event=event),
+            fallback=lambda: "fallback",
+            on_result=results.append,
+        )
+
+        schedule.wait_for(count=1)
+        assert schedule.scheduled[0][1] == 0
+        schedule.run(index=0)
+
+        assert results == ["fallback"]
+        assert merge_worker.is_pending is False
+
+        # the merge result arriving late is not delivered
+        event.set()
+        schedule.wait_for(count=2)
+        schedule.run(index=1)
+        assert results == ["fallback"]
+
+    def test_cancel(self):
+        schedule = ScheduleStub()
+        merge_worker = MergeWorker(schedule=schedule, time_budget=1, inline_wait=0.01)
+        results = []
+        event = threading.Event()
+
+        merge_worker.submit(
+            merge=get_blocked_merge(event=event),
+            fallback=lambda: "fallback",
+            on_result=results.append,
+        )
+        assert merge_worker.is_pending is True
+
+        merge_worker.cancel()
+        assert merge_worker.is_pending is False
+
+        event.set()
+        schedule.wait_for(count=2)
+        schedule.run(index=0)
+        schedule.run(index=1)
+        assert results == []
+
+    def test_submit_after_time_budget_exceeded(self):
+        schedule = ScheduleStub()
+        merge_worker = MergeWorker(schedule=schedule, time_budget=0, inline_wait=0.01)
+        results = []
+        event = threading.Event()
+
+        merge_worker.submit(
+            merge=get_blocked_merge(event=event),
+            fallback=lambda: "fallback",
+            on_result=results.append,
+        )
+        schedule.wait_for(count=1)
+        schedule.run(index=0)
+        assert results == ["fallback"]
+
+        # the next merge does not wait for the merge which ran out of time
+        merge_worker._inline_wait = 5
+        merge_worker.submit(
+            merge=lambda: "merged", fallback=lambda: "fallback", on_result=results.append
+        )
+        assert results == ["fallback", "merged"]
+
+        event.set()
+
+    @pytest.mark.parametrize("merge_done", [False, True])
+    def test_flush(self, merge_done):
+        schedule = ScheduleStub()
+        merge_worker = MergeWorker(schedule=schedule, time_budget=1, inline_wait=0.01)
+        results = []
+        event = threading.Event()
+
+        merge_worker.submit(
+            merge=get_blocked_merge(event=event),
+            fallback=lambda: "fallback",
+            on_result=results.append,
+        )
+        if merge_done:
+            event.set()
+            schedule.wait_for(count=2)
+
+        merge_worker.flush()
+        assert results == ["merged" if merge_done else "fallback"]
+        assert merge_worker.is_pending is False
+
+        # the merge is delivered once
+        event.set()
+        schedule.wait_for(count=2)
+        schedule.run(index=0)
+        schedule.run(index=1)
+        merge_worker.flush()
+        assert len(results) == 1
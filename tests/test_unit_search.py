@@ -1,12 +1,21 @@
 import pytest
 
+from notes_app.case_fold import CaseFoldedText
 from notes_app.defaults import Defaults
+from notes_app.file import File
 from notes_app.search import (
     SEARCH_MINIMAL_CHAR_COUNT,
     validate_search_input,
     _basic_search_function,
     _full_words_search_function,
+    _get_case_folded_regex_pattern,
+    _get_narrowed_positions,
+    _is_self_overlapping,
+    get_search_function,
+    get_section_text_batches,
+    get_text_size,
     search_function,
+    search_sections,
     Search,
     transform_position_text_placeholder_to_position,
     transform_position_to_position_text_placeholder,
@@ -30,6 +39,11 @@ class TestSearch:
     def test_validate_search_input(self, input_string, is_valid):
         assert validate_search_input(input_string) is is_valid
 
+    def test_validate_search_input_regex(self):
+        assert validate_search_input("f(x") is True
+        assert validate_search_input("f(x", regex_search=True) is False
+        assert validate_search_input("f\\(x", regex_search=True) is True
+
     @pytest.mark.parametrize(
         "pattern, text, case_sensitive,occurrences",
         [
@@ -60,6 +74,79 @@ class TestSearch:
     ):
         assert _full_words_search_function(pattern, text, case_sensitive) == occurrences
 
+    @pytest.mark.parametrize(
+        "pattern, text, case_sensitive, full_words_search, regex_search, occurrences",
+        [
+            # the literal mode finds the regex special characters
+            ("c++", "c++ and C++", False, False, False, [0, 8]),
+            ("(", "f(x) g(y)", True, False, False, [1, 6]),
+            ("aa", "aaaaa", True, False, False, [0, 2]),
+            ("a.c", "abc a.c", True, False, False, [4]),
+            ("c++", "c++ and C++", True, True, False, []),
+            ("x)", "f(x) g(y)", True, True, False, []),
+            ("c#", "c# and c", False, True, False, []),
+            # the regex mode compiles the pattern
+            ("a.c", "abc a.c", True, False, True, [0, 4]),
+            ("AB|cd", "ab cd AB", False, False, True, [0, 3, 6]),
+            ("AB|cd", "ab cd AB", True, False, True, [3, 6]),
+            ("S\\W", "s s,sa", False, False, True, [0, 2]),
+            ("se\\w+", "some Section", False, True, True, [5]),
+        ],
+    )
+    def test_get_search_function(
+        self,
+        pattern,
+        text,
+        case_sensitive,
+        full_words_search,
+        regex_search,
+        occurrences,
+    ):
+        assert (
+            get_search_function(
+                pattern=pattern,
+                case_sensitive_search=case_sensitive,
+                full_words_search=full_words_search,
+                regex_search=regex_search,
+            )(text)
+            == occurrences
+        )
+
+    @pytest.mark.parametrize(
+        "pattern, result",
+        [
+            ("AB|Cd", "ab|cd"),
+            ("\\W\\S[A-Z]", "\\W\\S[a-z]"),
+            ("\\\\A", "\\\\a"),
+            ("STRAẞE", "strasse"),
+        ],
+    )
+    def test__get_case_folded_regex_pattern(self, pattern, result):
+        assert _get_case_folded_regex_pattern(pattern=pattern) == result
+
+    @pytest.mark.parametrize(
+        "pattern, text, full_words_search, regex_search, occurrences",
+        [
+            # the positions after a character folded into several ones are mapped back
+            ("strasse", "Straße and STRASSE", False, False, [0, 11]),
+            ("and", "Straße and STRASSE", True, False, [7]),
+            ("İs", "İstanbul is", False, False, [0]),
+            ("s.r", "ﬁ İstr and ßtr", False, True, [3, 11]),
+        ],
+    )
+    def test_get_search_function_case_folded(
+        self, pattern, text, full_words_search, regex_search, occurrences
+    ):
+        section_search_function = get_search_function(
+            pattern=pattern,
+            case_sensitive_search=False,
+            full_words_search=full_words_search,
+            regex_search=regex_search,
+        )
+
+        assert section_search_function(text) == occurrences
+        assert section_search_function(CaseFoldedText(text)) == occurrences
+
     @pytest.mark.parametrize(
         "pattern, text, case_sensitive, full_words_search, occurrences",
         [
@@ -85,6 +172,54 @@ class TestSearch:
             == occurrences
         )
 
+    def test_search_sections(self):
+        section_texts = [
+            ("<section=a> ", "some Text"),
+            ("<section=b> ", "no match"),
+            ("<section=c> ", CaseFoldedText("TEXT and text")),
+        ]
+
+        assert search_sections(
+            section_texts=section_texts,
+            pattern="text",
+            case_sensitive_search=False,
+            full_words_search=False,
+        ) == [("<section=a> ", [5]), ("<section=c> ", [0, 9])]
+
+    @pytest.mark.parametrize(
+        "text, size",
+        [("some text", 9), ("ßß", 4), (CaseFoldedText("ßß"), 4), ("", 0)],
+    )
+    def test_get_text_size(self, text, size):
+        assert get_text_size(text=text) == size
+
+    @pytest.mark.parametrize(
+        "sizes, batch_count, batch_lengths",
+        [
+            ([10, 10, 10, 10], 2, [2, 2]),
+            ([30, 5, 5, 5, 5], 2, [1, 4]),
+            ([10, 10], 4, [1, 1]),
+            ([1, 1, 1], 1, [3]),
+            ([], 2, []),
+        ],
+    )
+    def test_get_section_text_batches(self, sizes, batch_count, batch_lengths):
+        section_texts = [
+            (f"<section=s{idx}> ", "x" * size) for idx, size in enumerate(sizes)
+        ]
+
+        batches = get_section_text_batches(
+            section_texts=section_texts,
+            section_text_sizes=sizes,
+            batch_count=batch_count,
+        )
+
+        assert [len(batch) for batch in batches] == batch_lengths
+        # the sections keep their order
+        assert [
+            section_text for batch in batches for section_text in batch
+        ] == section_texts
+
     def test_search(self):
         search = Search(defaults=defaults)
         assert (
@@ -92,6 +227,7 @@ class TestSearch:
         )
         assert search.search_all_sections == defaults.DEFAULT_VALUE_SEARCH_ALL_SECTIONS
         assert search.search_full_words == defaults.DEFAULT_VALUE_SEARCH_FULL_WORDS
+        assert search.search_regex == defaults.DEFAULT_VALUE_SEARCH_REGEX
 
     def test_search_default(self, get_file):
         search = Search(defaults=defaults)
@@ -135,6 +271,189 @@ class TestSearch:
             pattern="do", file=get_file, current_section_identifier="<section=first> ",
         ) == {"<section=first> ": [25], "<section=second> ": [11]}
 
+    def test_search_all_sections_search_index(self, get_file):
+        search_index_defaults = Defaults()
+        search_index_defaults.DEFAULT_FILE_SEARCH_INDEX_ENABLED = True
+        file = File(
+            file_path=get_file._file_path,
+            controller=get_file._controller,
+            defaults=search_index_defaults,
+        )
+        search = Search(defaults=defaults)
+
+        search.search_case_sensitive = False
+        search.search_all_sections = True
+        search.search_full_words = False
+
+        assert search.search_for_occurrences(
+            pattern="dolor", file=file, current_section_identifier="<section=first> ",
+        ) == {"<section=second> ": [11]}
+        assert search.search_for_occurrences(
+            pattern="do", file=file, current_section_identifier="<section=first> ",
+        ) == {"<section=first> ": [25], "<section=second> ": [11]}
+
+        search.search_full_words = True
+
+        # the candidate sections are verified against their text
+        assert (
+            search.search_for_occurrences(
+                pattern="dolor",
+                file=file,
+                current_section_identifier="<section=first> ",
+            )
+            == {}
+        )
+
+    def test_search_case_folded_text(self, get_file):
+        search = Search(defaults=defaults)
+
+        search.search_case_sensitive = False
+        search.search_all_sections = True
+        search.search_full_words = False
+
+        get_file.set_section_content(
+            section_separator="<section=first> ", section_content="Maße and MASSE"
+        )
+        assert search.search_for_occurrences(
+            pattern="masse",
+            file=get_file,
+            current_section_identifier="<section=first> ",
+        ) == {"<section=first> ": [0, 9]}
+        # the case folded copy of the section is reused by the next query
+        case_folded_text = get_file.get_section_case_folded_text(
+            section_separator="<section=first> "
+        )
+        assert search.search_for_occurrences(
+            pattern="and", file=get_file, current_section_identifier="<section=first> ",
+        ) == {"<section=first> ": [5]}
+        assert (
+            get_file.get_section_case_folded_text(section_separator="<section=first> ")
+            is case_folded_text
+        )
+
+    @pytest.mark.parametrize(
+        "pattern, is_self_overlapping",
+        [("ab", False), ("aa", True), ("abca", True), ("abab", True), ("a", False)],
+    )
+    def test__is_self_overlapping(self, pattern, is_self_overlapping):
+        assert _is_self_overlapping(pattern=pattern) is is_self_overlapping
+
+    @pytest.mark.parametrize(
+        "pattern, text, previous_positions, positions",
+        [
+            ("abc", "abc abd abc", [0, 4, 8], [0, 8]),
+            ("aXa", "aXaXa", [0, 2, 4], [0]),
+            ("ABC", CaseFoldedText("abc ABD aBc"), [0, 4, 8], [0, 8]),
+            ("ssa", CaseFoldedText("ßa"), [0], None),
+        ],
+    )
+    def test__get_narrowed_positions(
+        self, pattern, text, previous_positions, positions
+    ):
+        assert (
+            _get_narrowed_positions(
+                pattern=pattern, text=text, previous_positions=previous_positions
+            )
+            == positions
+        )
+
+    def test_search_recent_occurrences(self, get_file, monkeypatch):
+        search = Search(defaults=defaults)
+        search.search_case_sensitive = False
+        search.search_all_sections = True
+        search.search_full_words = False
+
+        searched_section_texts = []
+        search_section_texts = search.search_section_texts
+
+        def search_section_texts_spy(pattern, section_texts):
+            searched_section_texts.append([text for _, text in section_texts])
+            return search_section_texts(pattern=pattern, section_texts=section_texts)
+
+        monkeypatch.setattr(search, "search_section_texts", search_section_texts_spy)
+
+        for pattern in ("qu", "dolor", "qu"):
+            assert search.search_for_occurrences(
+                pattern=pattern,
+                file=get_file,
+                current_section_identifier="<section=first> ",
+            ) == (
+                {"<section=first> ": [0, 6], "<section=second> ": [0]}
+                if pattern == "qu"
+                else {"<section=second> ": [11]}
+            )
+        # the repeated query is not searched again
+        assert len(searched_section_texts) == 2
+
+        # a changed section invalidates the recent queries it was searched in
+        get_file.set_section_content(
+            section_separator="<section=second> ", section_content="no match"
+        )
+        assert search.search_for_occurrences(
+            pattern="qu", file=get_file, current_section_identifier="<section=first> ",
+        ) == {"<section=first> ": [0, 6]}
+        assert len(searched_section_texts) == 3
+
+    def test_search_recent_occurrences_case_folded(self, get_file):
+        search = Search(defaults=defaults)
+        search.search_case_sensitive = False
+        search.search_all_sections = False
+
+        # both texts are folded into ssxa but the occurrences in them differ
+        for section_content, occurrences in (("ßxa", [1]), ("ssxa", [2])):
+            get_file.set_section_content(
+                section_separator="<section=first> ", section_content=section_content
+            )
+            assert search.search_for_occurrences(
+                pattern="xa",
+                file=get_file,
+                current_section_identifier="<section=first> ",
+            ) == {"<section=first> ": occurrences}
+
+    def test_search_narrowed(self, get_file, monkeypatch):
+        search = Search(defaults=defaults)
+        search.search_case_sensitive = False
+        search.search_all_sections = True
+        search.search_full_words = False
+
+        searched_section_texts = []
+        search_section_texts = search.search_section_texts
+
+        def search_section_texts_spy(pattern, section_texts):
+            searched_section_texts.append([text for _, text in section_texts])
+            return search_section_texts(pattern=pattern, section_texts=section_texts)
+
+        monkeypatch.setattr(search, "search_section_texts", search_section_texts_spy)
+
+        assert search.search_for_occurrences(
+            pattern="qu", file=get_file, current_section_identifier="<section=first> ",
+        ) == {"<section=first> ": [0, 6], "<section=second> ": [0]}
+        # the extended pattern is only checked at the previous positions
+        assert search.search_for_occurrences(
+            pattern="QUo", file=get_file, current_section_identifier="<section=first> ",
+        ) == {"<section=first> ": [0]}
+        assert searched_section_texts[1] == []
+
+        # the changed section is searched again
+        get_file.set_section_content(
+            section_separator="<section=second> ", section_content="quod"
+        )
+        assert search.search_for_occurrences(
+            pattern="quod",
+            file=get_file,
+            current_section_identifier="<section=first> ",
+        ) == {"<section=first> ": [0], "<section=second> ": [0]}
+        assert [text.text for text in searched_section_texts[2]] == ["quod"]
+
+        # a full words query is not narrowed
+        search.search_full_words = True
+        assert search.search_for_occurrences(
+            pattern="quod equidem",
+            file=get_file,
+            current_section_identifier="<section=first> ",
+        ) == {"<section=first> ": [0]}
+        assert len(searched_section_texts[3]) == 2
+
     def test_search_full_words(self, get_file):
         search = Search(defaults=defaults)
 
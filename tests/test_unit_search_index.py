@@ -0,0 +1,121 @@
+import pytest
+
+from notes_app.search_index import (
+    SearchIndex,
+    get_trigrams,
+    get_words,
+    is_literal_pattern,
+)
+
+SECTIONS = {
+    "<section=first> ": "Quod equidem non reprehendo",
+    "<section=second> ": "Quis istum dolorem timet",
+}
+
+
+def get_search_index():
+    search_index = SearchIndex()
+    search_index.update(
+        section_separators=SECTIONS, get_section_content=SECTIONS.__getitem__
+    )
+    return search_index
+
+
+@pytest.mark.parametrize(
+    "pattern, is_literal",
+    [("some text", True), ("c++", False), ("(", False), ("e-mail", True)],
+)
+def test_is_literal_pattern(pattern, is_literal):
+    assert is_literal_pattern(pattern=pattern) is is_literal
+
+
+def test_get_trigrams():
+    assert get_trigrams(text="abcd") == {"abc", "bcd"}
+    assert get_trigrams(text="ab") == set()
+
+
+def test_get_words():
+    assert get_words(text="some text, some") == {"some", "text"}
+
+
+class TestSearchIndex:
+    @pytest.mark.parametrize(
+        "pattern, full_words, regex, result",
+        [
+            ("dolor", False, False, {"<section=second> "}),
+            ("QUIS", False, False, {"<section=second> "}),
+            ("uod", False, False, {"<section=first> "}),
+            ("is", False, False, None),
+            ("is.um", False, False, set()),
+            ("is.um", False, True, None),
+            ("istum", False, True, {"<section=second> "}),
+            ("missing", False, False, set()),
+            ("dolor", True, False, set()),
+            ("Dolorem timet", True, False, {"<section=second> "}),
+        ],
+    )
+    def test_get_candidate_section_separators(self, pattern, full_words, regex, result):
+        search_index = get_search_index()
+
+        assert (
+            search_index.get_candidate_section_separators(
+                pattern=pattern, full_words=full_words, regex=regex
+            )
+            == result
+        )
+
+    def test_update(self):
+        search_index = get_search_index()
+        sections = dict(SECTIONS)
+
+        sections["<section=first> "] = "changed"
+        # the section is indexed again only once it is marked as outdated
+        search_index.update(
+            section_separators=sections, get_section_content=sections.__getitem__
+        )
+        assert search_index.get_candidate_section_separators(
+            pattern="changed", full_words=False
+        ) == set()
+
+        search_index.invalidate_section(section_separator="<section=first> ")
+        assert search_index.outdated_section_separators == {"<section=first> "}
+        search_index.update(
+            section_separators=sections, get_section_content=sections.__getitem__
+        )
+        assert search_index.outdated_section_separators == set()
+        assert search_index.get_candidate_section_separators(
+            pattern="changed", full_words=False
+        ) == {"<section=first> "}
+        assert search_index.get_candidate_section_separators(
+            pattern="equidem", full_words=False
+        ) == set()
+
+    def test_remove_section(self):
+        search_index = get_search_index()
+
+        search_index.remove_section(section_separator="<section=first> ")
+        assert search_index.get_candidate_section_separators(
+            pattern="equidem", full_words=True
+        ) == set()
+        assert search_index.get_candidate_section_separators(
+            pattern="dolorem", full_words=True
+        ) == {"<section=second> "}
+
+    def test_rename_section(self):
+        search_index = get_search_index()
+
+        search_index.rename_section(
+            old_section_separator="<section=first> ",
+            new_section_separator="<section=renamed> ",
+        )
+        assert search_index.get_candidate_section_separators(
+            pattern="equidem", full_words=False
+        ) == {"<section=renamed> "}
+
+    def test_clear(self):
+        search_index = get_search_index()
+
+        search_index.clear()
+        assert search_index.get_candidate_section_separators(
+            pattern="equidem", full_words=False
+        ) == set()
@@ -0,0 +1,235 @@
+import time
+
+import pytest
+
+from notes_app.defaults import Defaults
+from notes_app.search import Search
+from notes_app.search_worker import SearchWorker
+
+defaults = Defaults()
+
+
+class ScheduleStub:
+    def __init__(self):
+        self.scheduled = []
+
+    def __call__(self, callback, timeout):
+        self.scheduled.append((callback, timeout))
+
+    def wait_for(self, count):
+        deadline = time.monotonic() + 5
+        while len(self.scheduled) < count and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert len(self.scheduled) >= count
+
+    def run_all(self):
+        for callback, _ in self.scheduled:
+            callback(0)
+
+
+def get_search(search_all_sections=True):
+    search = Search(defaults=defaults)
+    search.search_case_sensitive = False
+    search.search_all_sections = search_all_sections
+    search.search_full_words = False
+    return search
+
+
+class TestSearchWorker:
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_submit(self, get_file, processes):
+        schedule = ScheduleStub()
+        search_worker = SearchWorker(
+            schedule=schedule, parallel_min_size=0, processes=processes
+        )
+        results = []
+
+        try:
+            search_worker.submit(
+                search=get_search(),
+                pattern="QU",
+                file=get_file,
+                current_section_identifier="<section=first> ",
+                on_result=results.append,
+            )
+            assert search_worker.is_pending is True
+
+            schedule.wait_for(count=1)
+            schedule.run_all()
+        finally:
+            search_worker.shutdown()
+
+        # the found occurrences keep the order of the sections
+        assert results == [{"<section=first> ": [0, 6], "<section=second> ": [0]}]
+        assert list(results[0]) == get_file.section_separators_sorted
+        assert search_worker.is_pending is False
+
+    def test_submit_parallel(self, get_file):
+        schedule = ScheduleStub()
+        search_worker = SearchWorker(
+            schedule=schedule, parallel_min_size=0, processes=2
+        )
+        section_separators = [f"<section=s{idx}> " for idx in range(8)]
+        for section_separator in section_separators:
+            get_file.set_section_content(
+                section_separator=section_separator, section_content="qu " * 16
+            )
+        results = []
+
+        try:
+            search_worker.submit(
+                search=get_search(),
+                pattern="QU",
+                file=get_file,
+                current_section_identifier="<section=first> ",
+                on_result=results.append,
+            )
+            # the sections are searched in batches in the process pool
+            assert len(search_worker._pending_futures) > 1
+
+            schedule.wait_for(count=1)
+            schedule.run_all()
+        finally:
+            search_worker.shutdown()
+
+        # the results of the batches are merged in the order of the sections
+        assert list(results[0]) == get_file.section_separators_sorted
+        assert all(
+            results[0][section_separator] == list(range(0, 48, 3))
+            for section_separator in section_separators
+        )
+
+    def test_submit_parallel_min_size(self, get_file):
+        schedule = ScheduleStub()
+        search_worker = SearchWorker(
+            schedule=schedule, parallel_min_size=1024, processes=2
+        )
+        results = []
+
+        try:
+            search_worker.submit(
+                search=get_search(),
+                pattern="QU",
+                file=get_file,
+                current_section_identifier="<section=first> ",
+                on_result=results.append,
+            )
+            # small sections are not worth sending to the processes
+            assert search_worker._process_executor is None
+
+            schedule.wait_for(count=1)
+            schedule.run_all()
+        finally:
+            search_worker.shutdown()
+
+        assert results == [{"<section=first> ": [0, 6], "<section=second> ": [0]}]
+
+    def test_submit_process_pool_unavailable(self, get_file, monkeypatch):
+        schedule = ScheduleStub()
+        search_worker = SearchWorker(
+            schedule=schedule, parallel_min_size=0, processes=2
+        )
+        results = []
+
+        def raise_not_implemented_error(max_workers):
+            raise NotImplementedError
+
+        monkeypatch.setattr(
+            "notes_app.search_worker.ProcessPoolExecutor", raise_not_implemented_error
+        )
+        try:
+            search_worker.submit(
+                search=get_search(),
+                pattern="QU",
+                file=get_file,
+                current_section_identifier="<section=first> ",
+                on_result=results.append,
+            )
+
+            schedule.wait_for(count=1)
+            schedule.run_all()
+        finally:
+            search_worker.shutdown()
+
+        # the search falls back to the background thread
+        assert results == [{"<section=first> ": [0, 6], "<section=second> ": [0]}]
+
+    def test_submit_search_error(self, get_file, monkeypatch):
+        schedule = ScheduleStub()
+        search_worker = SearchWorker(
+            schedule=schedule, parallel_min_size=0, processes=1
+        )
+        results = []
+
+        def raise_error(text):
+            raise ValueError
+
+        monkeypatch.setattr(
+            "notes_app.search_worker.get_search_function", lambda **kwargs: raise_error
+        )
+        try:
+            search_worker.submit(
+                search=get_search(),
+                pattern="QU",
+                file=get_file,
+                current_section_identifier="<section=first> ",
+                on_result=results.append,
+            )
+
+            schedule.wait_for(count=1)
+            schedule.run_all()
+        finally:
+            search_worker.shutdown()
+
+        # the failed search falls back to searching on the calling thread
+        assert results == [{"<section=first> ": [0, 6], "<section=second> ": [0]}]
+        assert search_worker.is_pending is False
+
+    def test_cancel(self, get_file):
+        schedule = ScheduleStub()
+        search_worker = SearchWorker(
+            schedule=schedule, parallel_min_size=0, processes=1
+        )
+        results = []
+
+        try:
+            search_worker.submit(
+                search=get_search(),
+                pattern="QU",
+                file=get_file,
+                current_section_identifier="<section=first> ",
+                on_result=results.append,
+            )
+            search_worker.cancel()
+            assert search_worker.is_pending is False
+
+            schedule.wait_for(count=1)
+            schedule.run_all()
+        finally:
+            search_worker.shutdown()
+
+        assert results == []
+
+    def test_submit_cancels_pending_search(self, get_file):
+        schedule = ScheduleStub()
+        search_worker = SearchWorker(
+            schedule=schedule, parallel_min_size=0, processes=1
+        )
+        results = []
+
+        try:
+            for pattern in ("QU", "dolor"):
+                search_worker.submit(
+                    search=get_search(),
+                    pattern=pattern,
+                    file=get_file,
+                    current_section_identifier="<section=first> ",
+                    on_result=results.append,
+                )
+
+            schedule.wait_for(count=2)
+            schedule.run_all()
+        finally:
+            search_worker.shutdown()
+
+        assert results == [{"<section=second> ": [11]}]
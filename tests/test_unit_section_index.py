@@ -0,0 +1,49 @@
+import os
+
+from notes_app.defaults import Defaults
+from notes_app.section_index import (
+    SECTION_INDEX_FILE_SUFFIX,
+    get_content_hash,
+    get_section_content_hash,
+    get_section_index_file_path,
+    read_section_index,
+    write_section_index,
+)
+
+defaults = Defaults()
+
+
+def test_get_section_index_file_path():
+    assert (
+        get_section_index_file_path(file_path=defaults.DEFAULT_NOTES_FILE_NAME)
+        == f"{defaults.DEFAULT_NOTES_FILE_NAME}{SECTION_INDEX_FILE_SUFFIX}"
+    )
+
+
+def test_get_section_content_hash():
+    assert get_section_content_hash(
+        section_content="Quis istum dolorem timet", encoding="utf-8"
+    ) == get_content_hash(content=b"Quis istum dolorem timet")
+    assert get_section_content_hash(
+        section_content="Quis istum dolorem timet", encoding="utf-8"
+    ) != get_section_content_hash(section_content="Quis istum", encoding="utf-8")
+
+
+class TestSectionIndex:
+    def test_write_read_section_index(self):
+        file_path = defaults.DEFAULT_NOTES_FILE_NAME
+        assert read_section_index(file_path=file_path) is None
+
+        sections = [
+            ["<section=first> ", 0, 16, 44, "hash"],
+            ["<section=second> ", 44, 61, 85, "hash"],
+        ]
+        assert write_section_index(file_path=file_path, sections=sections) is None
+        assert read_section_index(file_path=file_path)["sections"] == sections
+
+        # the index is not valid anymore once the file changes
+        with open(file_path, "a") as f:
+            f.write(" appended")
+        assert read_section_index(file_path=file_path) is None
+
+        os.remove(get_section_index_file_path(file_path=file_path))
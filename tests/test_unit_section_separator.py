@@ -0,0 +1,105 @@
+import io
+
+import pytest
+
+from notes_app.defaults import Defaults
+from notes_app.section_separator import (
+    SectionSeparatorGrammar,
+    get_section_separator_grammar,
+    parse_section_offsets,
+)
+
+defaults = Defaults()
+
+
+def test_parse_section_offsets():
+    section_separator_grammar = get_section_separator_grammar(defaults=defaults)
+
+    assert parse_section_offsets(
+        section_separator_regex=section_separator_grammar.section_separator_regex,
+        raw_data="<section=a> first<section=b> second",
+    ) == [("<section=a> ", 12, 17), ("<section=b> ", 29, 35)]
+
+    with pytest.raises(ValueError):
+        parse_section_offsets(
+            section_separator_regex=section_separator_grammar.section_separator_regex,
+            raw_data="no section",
+        )
+
+
+def test_get_section_separator_grammar():
+    section_separator_grammar = get_section_separator_grammar(defaults=defaults)
+
+    assert isinstance(section_separator_grammar, SectionSeparatorGrammar)
+    assert get_section_separator_grammar(defaults=Defaults()) is section_separator_grammar
+
+    other_defaults = Defaults()
+    other_defaults.DEFAULT_SECTION_FILE_SEPARATOR = "<part={name}> "
+    other_defaults.DEFAULT_SECTION_FILE_SEPARATOR_REGEX = "<part=[a-z A-Z]+> "
+    other_defaults.DEFAULT_SECTION_FILE_SEPARATOR_GROUP_SUBSTR_REGEX = "<part=(.+?)> "
+    assert (
+        get_section_separator_grammar(defaults=other_defaults)
+        is not section_separator_grammar
+    )
+    assert (
+        get_section_separator_grammar(defaults=other_defaults).format(section_name="a")
+        == "<part=a> "
+    )
+
+
+class TestSectionSeparatorGrammar:
+    def test_search(self):
+        section_separator_grammar = get_section_separator_grammar(defaults=defaults)
+
+        assert section_separator_grammar.search(raw_data="text <section=a> ") is True
+        assert section_separator_grammar.search(raw_data="text") is False
+
+    def test_parse(self):
+        section_separator_grammar = get_section_separator_grammar(defaults=defaults)
+
+        assert section_separator_grammar.parse(
+            raw_data="<section=a> first<section=b> second"
+        ) == [("<section=a> ", 12, 17), ("<section=b> ", 29, 35)]
+
+    def test_parse_binary(self):
+        section_separator_grammar = get_section_separator_grammar(defaults=defaults)
+
+        assert section_separator_grammar.parse_binary(
+            raw_data="<section=a> čaj<section=b> second".encode("utf-8"),
+            encoding="utf-8",
+        ) == [(b"<section=a> ", 12, 16), (b"<section=b> ", 28, 34)]
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 12, 1024])
+    def test_parse_stream(self, chunk_size):
+        section_separator_grammar = get_section_separator_grammar(defaults=defaults)
+
+        assert list(
+            section_separator_grammar.parse_stream(
+                stream=io.StringIO("ignored<section=a> first<section=b> <section=c> c"),
+                chunk_size=chunk_size,
+            )
+        ) == [("<section=a> ", "first"), ("<section=b> ", ""), ("<section=c> ", "c")]
+
+        with pytest.raises(ValueError):
+            list(
+                section_separator_grammar.parse_stream(
+                    stream=io.StringIO("no section"), chunk_size=chunk_size
+                )
+            )
+
+    def test_format(self):
+        section_separator_grammar = get_section_separator_grammar(defaults=defaults)
+
+        assert section_separator_grammar.format(section_name="a") == "<section=a> "
+
+    def test_extract_name(self):
+        section_separator_grammar = get_section_separator_grammar(defaults=defaults)
+
+        assert (
+            section_separator_grammar.extract_name(section_separator="<section=a> ")
+            == "a"
+        )
+        assert (
+            section_separator_grammar.extract_name(section_separator="<section=a>")
+            is None
+        )
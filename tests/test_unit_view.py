@@ -1,7 +1,9 @@
 import os
+import threading
 import time
 from datetime import datetime, timedelta
 from copy import copy
+from functools import partial
 from os import linesep
 
 from kivy.properties import ObjectProperty, StringProperty
@@ -11,12 +13,19 @@ from kivymd.uix.filemanager import MDFileManager, FloatButton
 from kivymd.uix.menu import MDDropdownMenu
 
 from notes_app.defaults import Defaults
+from notes_app.diff import (
+    MERGE_MODE_CONFLICT_MARKERS,
+    MERGE_MODE_UNION,
+    MERGE_RESOLUTION_LOCAL,
+    get_merge_hunks,
+)
 from notes_app.file import (
     File,
     transform_section_name_to_section_separator,
     SECTION_FILE_NEW_SECTION_PLACEHOLDER,
 )
 from notes_app.search import Search
+from notes_app.search_worker import SearchWorker
 from notes_app.view.notes_view import (
     DrawerList,
     MenuSettingsItems,
@@ -334,6 +343,11 @@ class TestView:
             == screen.search.search_all_sections
         )
 
+        assert (
+            screen.get_search_switch_state(switch_id="search_regex_switch")
+            == screen.search.search_regex
+        )
+
     def test_switch_callback(self, get_app):
         screen = get_app.controller.get_screen()
 
@@ -348,6 +362,10 @@ class TestView:
 
         assert screen.search.search_all_sections == "state2"
 
+        screen.search_switch_callback(switch_id="search_regex_switch", state="state3")
+
+        assert screen.search.search_regex == "state3"
+
     def test_execute_search(self, get_app):
         screen = get_app.controller.get_screen()
 
@@ -552,6 +570,88 @@ class TestView:
             )
         )
 
+    def test_execute_search_search_worker(self, get_app, monkeypatch):
+        screen = get_app.controller.get_screen()
+
+        class SearchDialogContent(MDBoxLayout):
+            get_search_switch_state = ObjectProperty(None)
+            switch_callback = ObjectProperty(None)
+            search_string_placeholder = StringProperty(None)
+            search_results_message = StringProperty(None)
+            execute_search = ObjectProperty(None)
+            cancel = ObjectProperty(None)
+
+        def _(*args):
+            return True
+
+        content = SearchDialogContent(
+            get_search_switch_state=_,
+            switch_callback=_,
+            search_string_placeholder="",
+            search_results_message="",
+            execute_search=_,
+            cancel=_,
+        )
+
+        screen.dialog = MDDialog(title="test title", content_cls=content)
+        screen.dialog.open()
+
+        scheduled = []
+        screen.search_worker = SearchWorker(
+            schedule=lambda callback, timeout: scheduled.append(callback),
+            parallel_min_size=screen.defaults.DEFAULT_SEARCH_PARALLEL_MIN_SIZE,
+        )
+        screen.search.search_all_sections = True
+        screen.search.search_case_sensitive = False
+
+        # a file with few sections is searched on the UI thread
+        assert screen.execute_search("Qu") is None
+        assert scheduled == []
+        assert (
+            screen.dialog.content_cls.search_results_message
+            == "Matches on 3 positions found"
+        )
+
+        monkeypatch.setattr(
+            screen.defaults, "DEFAULT_SEARCH_WORKER_MIN_SECTION_COUNT", 2
+        )
+        assert screen.execute_search("Qu") is None
+        assert screen.dialog.content_cls.search_results_message == "Searching..."
+
+        # the results are delivered on the UI thread
+        deadline = time.monotonic() + 5
+        while not scheduled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        for callback in scheduled:
+            callback(0)
+        screen.search_worker.shutdown()
+
+        assert (
+            screen.dialog.content_cls.search_results_message
+            == "Matches on 3 positions found"
+        )
+        assert len(screen.dialog.content_cls.results_list.children) == 3
+
+    def test_search_as_you_type(self, get_app):
+        screen = get_app.controller.get_screen()
+        screen.search_as_you_type_string = ""
+
+        # a too short search string is not searched for while typing
+        screen.search_as_you_type("l")
+        assert screen.search_as_you_type_string == ""
+        assert not screen.search_as_you_type_trigger.is_triggered
+
+        screen.search_as_you_type("lo")
+        screen.search_as_you_type("lor")
+        assert screen.search_as_you_type_string == "lor"
+        assert screen.search_as_you_type_trigger.is_triggered
+
+        screen.search.search_regex = True
+        screen.search_as_you_type("lor(")
+        assert screen.search_as_you_type_string == "lor"
+        assert not screen.search_as_you_type_trigger.is_triggered
+        screen.search.search_regex = False
+
     def test_execute_add_section(self, get_app):
         screen = get_app.controller.get_screen()
 
@@ -858,6 +958,258 @@ class TestView:
             == """<section=first> Quod equidem non reprehendo\n<section=second> Quis istum dolorem timet<section=test> test data"""
         )
 
+    def test_save_current_section_to_file_is_external_update_skips_merge_of_unchanged_current_section(
+        self, get_app, monkeypatch
+    ):
+        screen = get_app.controller.get_screen()
+
+        merge_calls = []
+        monkeypatch.setattr(
+            "notes_app.view.notes_view.merge_strings",
+            lambda before, after, engine: merge_calls.append((before, after)),
+        )
+
+        screen.text_section_view.section_file_separator = "<section=first> "
+        screen.text_section_view.text = "test text"
+
+        # external update to a different section than the current section=first
+        screen.file._data_by_sections = {
+            "<section=first> ": "Quod equidem non reprehendo\n",
+            "<section=second> ": "Quis istum dolorem timet mod",
+        }
+        text_data = screen.file.transform_data_by_sections_to_raw_data_content()
+        screen.controller.save_file_data(data=text_data)
+
+        # setting model._last_updated_on manually to the past will guarantee model.external_update returns True
+        d = datetime.today() - timedelta(hours=1)
+        get_app.controller.model._last_updated_on = int(d.timestamp())
+
+        assert screen.save_current_section_to_file() is None
+        assert merge_calls == []
+        assert screen.text_section_view.focus is False
+        assert (
+            screen.file.get_raw_data_content()
+            == """<section=first> test text<section=second> Quis istum dolorem timet mod"""
+        )
+
+    def test_save_current_section_to_file_is_external_update_three_way_merge(
+        self, get_app
+    ):
+        screen = get_app.controller.get_screen()
+
+        screen.text_section_view.section_file_separator = "<section=first> "
+        # the word deleted in the text input stays deleted after the merge
+        screen.text_section_view.text = "Quod equidem reprehendo\n"
+
+        # external update written by another device
+        screen.controller.save_file_data(
+            data="<section=first> Quod equidem non reprehendo\nappended<section=second> Quis istum dolorem timet"
+        )
+
+        # setting model._last_updated_on manually to the past will guarantee model.external_update returns True
+        d = datetime.today() - timedelta(hours=1)
+        get_app.controller.model._last_updated_on = int(d.timestamp())
+
+        assert screen.save_current_section_to_file() is None
+        assert screen.text_section_view.text == "Quod equidem reprehendo\nappended"
+        assert (
+            screen.file.get_raw_data_content()
+            == """<section=first> Quod equidem reprehendo\nappended<section=second> Quis istum dolorem timet"""
+        )
+
+    def test_save_current_section_to_file_merge_pending(self, get_app):
+        get_app.controller.model._last_updated_on = int(time.time())
+
+        screen = get_app.controller.get_screen()
+        screen.merge_worker._pending_merge = object()
+
+        screen.text_section_view.section_file_separator = "<section=first> "
+        screen.text_section_view.text = "test text"
+
+        # the section is saved once the pending merge result is applied
+        assert screen.save_current_section_to_file() is None
+        assert (
+            screen.file.get_raw_data_content()
+            == """<section=first> Quod equidem non reprehendo\n<section=second> Quis istum dolorem timet"""
+        )
+
+        screen.merge_worker.cancel()
+
+    def test_save_current_section_to_file_merge_pending_flush(self, get_app):
+        get_app.controller.model._last_updated_on = int(time.time())
+
+        screen = get_app.controller.get_screen()
+        screen.merge_worker._inline_wait = 0
+        event = threading.Event()
+
+        screen.text_section_view.section_file_separator = "<section=first> "
+        screen.text_section_view.text = "test text"
+
+        screen.merge_worker.submit(
+            merge=lambda: event.wait(5) and "merged text",
+            fallback=lambda: "fallback text",
+            on_result=partial(
+                screen.apply_merged_current_section,
+                section_separator="<section=first> ",
+                current_section_text_after="test text",
+            ),
+        )
+        assert screen.merge_worker.is_pending is True
+
+        # closing the app saves the fallback result of the merge still running
+        assert screen.merge_worker.flush() is None
+        assert screen.merge_worker.is_pending is False
+        assert (
+            screen.file.get_raw_data_content()
+            == """<section=first> fallback text<section=second> Quis istum dolorem timet"""
+        )
+
+        event.set()
+
+    def test_apply_merged_current_section(self, get_app):
+        get_app.controller.model._last_updated_on = int(time.time())
+
+        screen = get_app.controller.get_screen()
+
+        screen.text_section_view.section_file_separator = "<section=first> "
+        # the text typed while the merge was running
+        screen.text_section_view.text = "Quod equidem reprehendo\ntyped"
+
+        assert (
+            screen.apply_merged_current_section(
+                "Quod equidem reprehendo\nappended",
+                section_separator="<section=first> ",
+                current_section_text_after="Quod equidem reprehendo\n",
+            )
+            is None
+        )
+        assert screen.text_section_view.text == "Quod equidem reprehendo\nappended typed"
+        assert (
+            screen.file.get_raw_data_content()
+            == """<section=first> Quod equidem reprehendo\nappended typed<section=second> Quis istum dolorem timet"""
+        )
+
+        # the current section was switched while the merge was running
+        screen.text_section_view.section_file_separator = "<section=second> "
+        screen.text_section_view.text = "Quis istum dolorem timet"
+
+        assert (
+            screen.apply_merged_current_section(
+                "merged",
+                section_separator="<section=first> ",
+                current_section_text_after="Quod equidem reprehendo\n",
+            )
+            is None
+        )
+        assert screen.text_section_view.text == "Quis istum dolorem timet"
+        assert (
+            screen.file.get_raw_data_content()
+            == """<section=first> merged<section=second> Quis istum dolorem timet"""
+        )
+
+    def test_save_current_section_to_file_is_external_update_conflict_markers_merge_mode(
+        self, get_app
+    ):
+        screen = get_app.controller.get_screen()
+        screen.defaults.DEFAULT_MERGE_MODE = MERGE_MODE_CONFLICT_MARKERS
+
+        screen.text_section_view.section_file_separator = "<section=first> "
+        screen.text_section_view.text = "Quod equidem reprehendo\n"
+
+        # external update written by another device
+        screen.controller.save_file_data(
+            data="<section=first> Quod equidem non reprehendo\nexternal<section=second> Quis istum dolorem timet"
+        )
+
+        # setting model._last_updated_on manually to the past will guarantee model.external_update returns True
+        d = datetime.today() - timedelta(hours=1)
+        get_app.controller.model._last_updated_on = int(d.timestamp())
+
+        assert screen.save_current_section_to_file() is None
+        merged_text = "<<<<<<< local\nQuod equidem reprehendo\n=======\nQuod equidem non reprehendo\nexternal\n>>>>>>> external\n"
+        assert screen.text_section_view.text == merged_text
+        assert (
+            screen.file.get_raw_data_content()
+            == f"<section=first> {merged_text}<section=second> Quis istum dolorem timet"
+        )
+        assert [
+            hunk.text
+            for hunk in screen.get_section_merge_hunks(
+                section_separator="<section=first> ", section_text=merged_text
+            )
+        ] == [merged_text]
+
+        screen.defaults.DEFAULT_MERGE_MODE = MERGE_MODE_UNION
+
+    def test_get_section_merge_hunks(self, get_app):
+        screen = get_app.controller.get_screen()
+
+        merge_hunks = get_merge_hunks(before="external\n", after="local\n")
+        screen.merge_hunks["<section=first> "] = ("merged text", merge_hunks)
+
+        assert (
+            screen.get_section_merge_hunks(
+                section_separator="<section=first> ", section_text="merged text"
+            )
+            == merge_hunks
+        )
+
+        # the cached hunks are dropped once the section text changed
+        assert (
+            screen.get_section_merge_hunks(
+                section_separator="<section=first> ", section_text="typed text"
+            )
+            is None
+        )
+        assert "<section=first> " not in screen.merge_hunks
+
+    def test_press_menu_item_goto_next_conflict(self, get_app):
+        screen = get_app.controller.get_screen()
+
+        merge_hunks = get_merge_hunks(
+            before="first\nexternal\nlast\n", after="first\nlocal\nlast\n"
+        )
+        screen.text_section_view.text = "".join([hunk.text for hunk in merge_hunks])
+        screen.merge_hunks[screen.text_section_view.section_file_separator] = (
+            screen.text_section_view.text,
+            merge_hunks,
+        )
+
+        screen.press_menu_item_goto_next_conflict()
+        assert screen.text_section_view.selection_text == merge_hunks[1].text
+        assert screen.text_section_view.cursor_index() == merge_hunks[1].start
+
+        # no conflict in the section typed into after the merge
+        screen.text_section_view.text = "typed text"
+        screen.press_menu_item_goto_next_conflict()
+        assert isinstance(screen.snackbar, CustomSnackbar)
+        assert screen.snackbar.text == "No merge conflict in this section"
+
+    def test_press_menu_item_resolve_conflict(self, get_app):
+        screen = get_app.controller.get_screen()
+
+        merge_hunks = get_merge_hunks(
+            before="first\nexternal\nlast\n", after="first\nlocal\nlast\n"
+        )
+        screen.text_section_view.text = "".join([hunk.text for hunk in merge_hunks])
+        screen.merge_hunks[screen.text_section_view.section_file_separator] = (
+            screen.text_section_view.text,
+            merge_hunks,
+        )
+
+        screen.press_menu_item_resolve_conflict(resolution=MERGE_RESOLUTION_LOCAL)
+        assert screen.text_section_view.text == "first\nlocal\nlast\n"
+        assert [
+            hunk.text
+            for hunk in screen.get_section_merge_hunks(
+                section_separator=screen.text_section_view.section_file_separator,
+                section_text=screen.text_section_view.text,
+            )
+        ] == ["first\n", "local\n", "last\n"]
+
+        screen.press_menu_item_resolve_conflict(resolution=MERGE_RESOLUTION_LOCAL)
+        assert screen.snackbar.text == "No merge conflict in this section"
+
     def test_press_menu_item_save_file_is_not_external_update(self, get_app):
         # setting model._last_updated_on manually will guarantee model.external_update returns False
         get_app.controller.model._last_updated_on = int(time.time())